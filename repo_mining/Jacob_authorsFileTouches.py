@@ -1,38 +1,24 @@
-import json
-import requests
-import csv
-
 import os
 
-if not os.path.exists("data"):
- os.makedirs("data")
+from csv_stream import CsvStreamWriter
+from github_api import github_auth
+from source_classifier import SourceClassifier
 
 #For determining source file extensions
 SOURCE_EXT = (".java", ".py", ".cpp", ".c", ".h")
+is_source = SourceClassifier(SOURCE_EXT)
 
-# GitHub Authentication function
-def github_auth(url, lsttoken, ct):
-    jsonData = None
-    try:
-        ct = ct % len(lstTokens)
-        headers = {'Authorization': 'Bearer {}'.format(lsttoken[ct])}
-        request = requests.get(url, headers=headers)
-        jsonData = json.loads(request.content)
-        ct += 1
-    except Exception as e:
-        pass
-        print(e)
-    return jsonData, ct
     
 #remember the date and author in addition to #touched
 
 # @dictFiles, empty dictionary of files
 # @lstTokens, GitHub authentication tokens
 # @repo, GitHub repo
-def countfiles(dictfiles, lsttokens, repo):
+# @touchWriter, CSV writer that receives each file/author/date row as soon as it is found
+def countfiles(dictfiles, lsttokens, repo, touchWriter):
     ipage = 1  # url page counter
     ct = 0  # token counter
-    touches = [] # list of file/author/date objects
+    touches = 0 # number of file/author/date rows written
 
     try:
         # loop though all the commit pages until the last returned empty page
@@ -54,16 +40,17 @@ def countfiles(dictfiles, lsttokens, repo):
                 for filenameObj in filesjson:
                     filename = filenameObj['filename']
                     #make sure is source file
-                    if filename.endswith(SOURCE_EXT):
+                    if is_source(filename):
                         author = shaDetails['commit']['author']['name'] #save author info
                         date = shaDetails['commit']['author']['date'] #save date info
-                        touches.append((filename,author,date)) # append author date and filename to list
+                        touchWriter.writerow((filename,author,date)) # stream author date and filename to the CSV
+                        touches += 1
                         dictfiles[filename] = dictfiles.get(filename, 0) + 1
                         print(filename)
             ipage += 1
-    except:
-        print("Error receiving data")
-        exit(0) 
+    except Exception as e:
+        print("Error receiving data:", repr(e))
+        raise
     return touches
 
 # GitHub repo
@@ -79,35 +66,19 @@ repo = 'scottyab/rootbeer'
 # I would advise to create more than one token for repos with heavy commits
 lstTokens = []
 
-dictfiles = dict()
-touches = countfiles(dictfiles, lstTokens, repo)
-print('Total number of files: ' + str(len(dictfiles)))
 
-#file = repo.split('/')[1]
-# change this to the path of your file
-#fileOutput = 'data/file_' + file + '.csv'
-#rows = ["Filename", "Touches"]
-#fileCSV = open(fileOutput, 'w')
-#writer = csv.writer(fileCSV)
-#writer.writerow(rows)
-#
-#bigcount = None
-#bigfilename = None
-#for filename, count in dictfiles.items():
-#    rows = [filename, count]
-#    writer.writerow(rows)
-#    if bigcount is None or count > bigcount:
- #       bigcount = count
-#        bigfilename = filename
-#fileCSV.close()
-#print('The file ' + bigfilename + ' has been touched ' + str(bigcount) + ' times.')
+def main():
+    os.makedirs("data", exist_ok=True)
+
+    #updated CSV for scatterplot, written while the commits are crawled
+    output_csv = 'data/authorsFileTouches.csv'
+    dictfiles = dict()
+    with CsvStreamWriter(output_csv, ['file', 'author', 'date']) as writer:
+        touches = countfiles(dictfiles, lstTokens, repo, writer)
+    print('Total number of files: ' + str(len(dictfiles)))
+
+    print(f'CSV sucessfully written to {output_csv} ({touches} touches)')
 
-#updated CSV for scatterplot
-output_csv = 'data/authorsFileTouches.csv'
-with open(output_csv, 'w', newline='') as fileCSV:
-    writer = csv.writer(fileCSV)
-    writer.writerow(['file', 'author', 'date'])
-    for row in touches:
-        writer.writerow(row)
 
-print(f'CSV sucessfully written to {output_csv}')
\ No newline at end of file
+if __name__ == "__main__":
+    main()
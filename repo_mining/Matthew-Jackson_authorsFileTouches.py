@@ -1,30 +1,18 @@
 # Author: Matthew Jackson 
 # collects the authors and the dates when they touched each file 
 # in the list of files generated by the adapted file CollectFiles.py
-import json
-import requests
 import csv
 import os
-print('starting...')
-if not os.path.exists("data"):
- os.makedirs("data")
 
-# GitHub Authentication function
-def github_auth(url, lsttoken, ct):
-    jsonData = None
-    try:
-        ct = ct % len(lstTokens)
-        headers = {'Authorization': 'Bearer {}'.format(lsttoken[ct])}
-        request = requests.get(url, headers=headers)
-        jsonData = json.loads(request.content)
-        ct += 1
-    except Exception as e:
-        pass
-        print(e)
-    return jsonData, ct
+from github_api import github_auth
+from source_classifier import SourceClassifier
+from touch_table import TouchTable
 
+# @touches, TouchTable receiving one row per source file touched by a commit
 # @repo, GitHub repo
-def countfiles(dictfiles, lsttokens, repo, source_ext):
+# @source_ext, extensions of the files to collect
+def countfiles(touches, lsttokens, repo, source_ext):
+    is_source = SourceClassifier(source_ext)
     ipage = 1  # url page counter
     ct = 0  # token counter
 
@@ -48,45 +36,48 @@ def countfiles(dictfiles, lsttokens, repo, source_ext):
                 filesjson = shaDetails['files']
                 for filenameObj in filesjson:
                     filename = filenameObj['filename']
-                    _, ext = os.path.splitext(filename)
-                    if ext.lower() not in source_ext:
+                    if not is_source(filename):
                         continue
-                    if filename not in dictfiles:
-                        dictfiles[filename] = []
-                    dictfiles[filename].append({
-                        'author': author,
-                        'date': date
-                    })
+                    touches.append(filename, sha, None, author, None, date)
                     print(filename)
             ipage += 1
-    except:
-        print("Error receiving data")
-        exit(0)
+    except Exception as e:
+        print("Error receiving data:", repr(e))
+        raise
 # GitHub repo
 repo = 'scottyab/rootbeer'
-print(f"trying repo: {repo}")
 
 # tokens
 lstTokens = []
 
-dictfiles = dict()
-source_ext = [".kt", ".java", ".cpp", ".h", ".c", ".md", ".kts"]
-countfiles(dictfiles, lstTokens, repo, source_ext)
-print('Total number of files: ' + str(len(dictfiles)))
 
-file = repo.split('/')[1] + "COMMITMORE"
-# change this to the path of your file
-fileOutput = 'data/file_' + file + '.csv'
-rows = ["Filename", "Author", "Date"]
-fileCSV = open(fileOutput, 'w')
-writer = csv.writer(fileCSV)
-writer.writerow(rows)
+def main():
+    print('starting...')
+    os.makedirs("data", exist_ok=True)
+    print(f"trying repo: {repo}")
+
+    touches = TouchTable()
+    source_ext = [".kt", ".java", ".cpp", ".h", ".c", ".md", ".kts"]
+    countfiles(touches, lstTokens, repo, source_ext)
+    print('Total number of files: ' + str(len(touches.files)))
 
-bigcount = None
-bigfilename = None
-for filename, commitData in dictfiles.items():
-    for data in commitData:
-        rows = [filename, data['author'], data['date']]
+    file = repo.split('/')[1] + "COMMITMORE"
+    # change this to the path of your file
+    fileOutput = 'data/file_' + file + '.csv'
+    rows = ["Filename", "Author", "Date"]
+    fileCSV = open(fileOutput, 'w')
+    writer = csv.writer(fileCSV)
+    writer.writerow(rows)
+
+    bigcount = None
+    bigfilename = None
+    # grouped by file, as the rows were when they were kept per file
+    for data in touches.by_file():
+        rows = [data['filename'], data['author_name'], data['date_iso']]
         writer.writerow(rows)
-fileCSV.close()
-print(f"saved file to {fileOutput}")
\ No newline at end of file
+    fileCSV.close()
+    print(f"saved file to {fileOutput}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,20 @@
 # Author: Matthew Jackson 
 # creates a scatterplot of weeks vs file variables
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import csv
 import os
 
+from touch_csv import read_touch_csv
+
 #change file paths as needed
 file = "scatterplot"
 fileOutput = "C:/Users/HP/Desktop/Projects/cs472/group-8/repo_mining/data/RootbeerCommit.png"
 csv_file = "C:/Users/HP/Desktop/Projects/cs472/group-8/repo_mining/data/file_rootbeerCOMMITMORE.csv"
-CommitDF = pd.read_csv(csv_file)
+CommitDF = read_touch_csv(csv_file)  # dates already parsed
 
 # return weeks since start date
-CommitDF['Date'] = pd.to_datetime(CommitDF['Date'])
 start = CommitDF['Date'].min()
 CommitDF['Week'] = (CommitDF['Date'] - start).dt.days // 7
 
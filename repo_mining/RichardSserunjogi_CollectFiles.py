@@ -1,72 +1,80 @@
-import json
-import requests
-import csv
-
 import os
 
-if not os.path.exists("data"):
- os.makedirs("data")
-
- 
-
-# GitHub Authentication function
-def github_auth(url, lsttoken, ct):
-    jsonData = None
-    try:
-        ct = ct % len(lstTokens)
-        headers = {'Authorization': 'Bearer {}'.format(lsttoken[ct])}
-        request = requests.get(url, headers=headers)
-        jsonData = json.loads(request.content)
-        ct += 1
-    except Exception as e:
-        pass
-        print(e)
-    return jsonData, ct
+from async_fetch import crawl_commit_details, DEFAULT_CONCURRENCY
+from crawl_journal import CrawlJournal, journal_path
+from github_api import github_auth
+from mining_backends import write_file_counts_csv
+from source_classifier import classifier_for
+from watermark import load_watermark, watermark_of, merge_file_counts
 
 # @dictFiles, empty dictionary of files
 # @lstTokens, GitHub authentication tokens
 # @repo, GitHub repo
-def countfiles(dictfiles, lsttokens, repo):
-    ipage = 1  # url page counter
-    ct = 0  # token counter
-
+# @concurrency, number of commit-detail requests in flight at once
+# @watermark, newest commit of a previous run; only commits after it are counted
+# @journal, CrawlJournal recording progress so an interrupted crawl can resume
+# Returns the watermark of the newest commit counted (None if there was nothing new)
+def countfiles(dictfiles, lsttokens, repo, concurrency=DEFAULT_CONCURRENCY, watermark=None,
+               journal=None):
     # detect languages once
     languages = get_repo_languages(repo, lsttokens)
     print("Detected languages:", languages)
-    
+    is_source = classifier_for(languages)
+
+    newest = []
+    start_page = 1
+    head = None
+    if journal is not None:
+        if journal.newest:
+            newest.append(journal.newest)
+            # list the history of the newest commit the interrupted crawl saw: commits
+            # pushed since would not be covered by its watermark and be counted twice
+            head = journal.newest["sha"]
+        if journal.resuming():
+            # counts of the commits done before the interruption, without any request
+            journal.replay_counts(dictfiles)
+            # the last finished page is listed again (pinned to head, the pages do not shift)
+            start_page = max(journal.last_page, 1)
+            print(f"Resuming crawl at page {start_page} ({len(journal.shas)} commits already done)")
+
+    # called for each commit, in history order, once its details are downloaded
+    def count_commit(shaObject, shaDetails):
+        if not newest:
+            newest.append(watermark_of(shaObject))
+            if journal is not None:
+                journal.record_newest(newest[0])
+        counted = []
+        filesjson = shaDetails['files']
+        for filenameObj in filesjson:
+            filename = filenameObj['filename']
+            if not filename:
+                continue
+            # ONLY count source files
+            if is_source(filename):
+                dictfiles[filename] = dictfiles.get(filename, 0) + 1
+                counted.append(filename)
+                print(filename)
+        if journal is not None:
+            journal.record_commit(shaObject['sha'], counted)
+
     try:
-        # loop though all the commit pages until the last returned empty page
-        while True:
-            spage = str(ipage)
-            commitsUrl = 'https://api.github.com/repos/' + repo + '/commits?page=' + spage + '&per_page=100'
-            jsonCommits, ct = github_auth(commitsUrl, lsttokens, ct)
-
-            # break out of the while loop if there are no more commits in the pages
-            if len(jsonCommits) == 0:
-                break
-            # iterate through the list of commits in  spage
-            for shaObject in jsonCommits:
-                sha = shaObject['sha']
-                # For each commit, use the GitHub commit API to extract the files touched by the commit
-                shaUrl = 'https://api.github.com/repos/' + repo + '/commits/' + sha
-                shaDetails, ct = github_auth(shaUrl, lsttokens, ct)
-                filesjson = shaDetails['files']
-                for filenameObj in filesjson:
-                    filename = filenameObj['filename']
-                    # if not is_source_file(filename, languages):
-                    #     continue
-                    # dictfiles[filename] = dictfiles.get(filename, 0) + 1
-                    # print(filename)
-                    if not filename:
-                        continue
-                    # ONLY count source files
-                    if is_source_file(filename, languages):
-                        dictfiles[filename] = dictfiles.get(filename, 0) + 1
-                        print(filename)
-            ipage += 1
-    except:
-        print("Error receiving data")
-        exit(0)
+        # loop though all the commit pages until the last returned empty page,
+        # fetching the commit details of each page in parallel
+        crawl_commit_details(repo, lsttokens, github_auth, count_commit,
+                             concurrency=concurrency,
+                             since=watermark and watermark["date"],
+                             stop_sha=watermark and watermark["sha"],
+                             start_page=start_page,
+                             skip_shas=journal.shas if journal is not None else (),
+                             on_page_done=journal.record_page if journal is not None else None,
+                             ref=head)
+    except Exception as e:
+        print("Error receiving data:", repr(e))
+        if journal is not None:
+            journal.close()
+            print(f"Progress is saved in {journal.path}; run again to resume the crawl")
+        raise SystemExit(1)
+    return newest[0] if newest else None
 
 
 # Retrieve the set of languages used in the given GitHub repo
@@ -83,28 +91,10 @@ def get_repo_languages(repo, lsttokens):
     return set()
 
 
-# Map GitHub language names -> file extensions considered "source"
-LANGUAGE_EXTENSIONS = {
-    "Java": {".java"},
-    "Kotlin": {".kt", ".kts"},
-    "C": {".c", ".h"},
-    "C++": {".cpp", ".cc", ".cxx", ".hpp", ".hh", ".hxx", ".h"},
-    "CMake": {".cmake", "CMakeLists.txt"},
-}
-
+# Kept for the callers that pass the languages on every call; the classifier
+# for a set of languages is only built once
 def is_source_file(filename, languages):
-    # handle special filenames
-    if filename.endswith("CMakeLists.txt") and "CMake" in languages:
-        return True
-
-    _, ext = os.path.splitext(filename.lower())
-
-    allowed_exts = set()
-    for lang in languages:
-        allowed_exts |= {e.lower() for e in LANGUAGE_EXTENSIONS.get(lang, set())
-                         if e.startswith(".")}
-
-    return ext in allowed_exts
+    return classifier_for(languages)(filename)
 
 # GitHub repo
 repo = 'scottyab/rootbeer'
@@ -120,29 +110,54 @@ repo = 'scottyab/rootbeer'
 lstTokens = ["",
              "" ]
 
-languages = get_repo_languages(repo, lstTokens)
-print(f"Repo languages: {languages}")
-
-dictfiles = dict()
-countfiles(dictfiles, lstTokens, repo)
-print('Total number of files: ' + str(len(dictfiles)))
-
-
-file = repo.split('/')[1]
-# change this to the path of your file
-fileOutput = 'data/file_' + file + '.csv'
-rows = ["Filename", "Touches"]
-fileCSV = open(fileOutput, 'w')
-writer = csv.writer(fileCSV)
-writer.writerow(rows)
-
-bigcount = None
-bigfilename = None
-for filename, count in dictfiles.items():
-    rows = [filename, count]
-    writer.writerow(rows)
-    if bigcount is None or count > bigcount:
-        bigcount = count
-        bigfilename = filename
-fileCSV.close()
-print('The file ' + bigfilename + ' has been touched ' + str(bigcount) + ' times.')
+
+# Output CSV of a repo: data/file_<repo name>.csv
+def output_csv_for(repo, out_dir="data"):
+    return os.path.join(out_dir, 'file_' + repo.split('/')[1] + '.csv')
+
+
+# Count the source file touches of repo into fileOutput, picking up where the
+# previous run (watermark) or an interrupted one (journal) stopped
+# Returns the touch counts of every file, old and new
+def mine_repo(repo, lsttokens, fileOutput, concurrency=DEFAULT_CONCURRENCY):
+    os.makedirs(os.path.dirname(fileOutput) or ".", exist_ok=True)
+
+    # only crawl the commits that landed since the last run
+    watermark = load_watermark(fileOutput)
+    if watermark:
+        print(f"{repo}: resuming after commit {watermark['sha']} ({watermark['date']})")
+
+    # progress of this crawl, so that an interrupted run picks up where it stopped
+    journal = CrawlJournal(journal_path(fileOutput))
+
+    dictfiles = dict()
+    newest = countfiles(dictfiles, lsttokens, repo, concurrency=concurrency, watermark=watermark,
+                        journal=journal)
+    print(f'{repo}: new touches in ' + str(len(dictfiles)) + ' files')
+    if watermark:
+        dictfiles = merge_file_counts(fileOutput, dictfiles)
+
+    # the CSV is replaced in one step, then the journal is dropped and the watermark saved
+    journal.close()
+    write_file_counts_csv(fileOutput, dictfiles, newest or watermark)
+    journal.finish()
+    return dictfiles
+
+
+def main():
+    # change this to the path of your file
+    fileOutput = output_csv_for(repo)
+    dictfiles = mine_repo(repo, lstTokens, fileOutput)
+    print('Total number of files: ' + str(len(dictfiles)))
+
+    bigcount = None
+    bigfilename = None
+    for filename, count in dictfiles.items():
+        if bigcount is None or count > bigcount:
+            bigcount = count
+            bigfilename = filename
+    print('The file ' + bigfilename + ' has been touched ' + str(bigcount) + ' times.')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,46 @@
 
-import csv
-import os
 import time
 
-# Reuse github_auth + countfiles from Richard_CollectFiles.py
-from RichardSserunjogi_CollectFiles import github_auth, countfiles
+# Reuse the shared github_auth + countfiles from Richard_CollectFiles.py
+from github_api import github_auth
+from RichardSserunjogi_CollectFiles import countfiles, get_repo_languages
+from source_classifier import classifier_for
+from touch_table import TouchTable
+from mining_backends import GitHubBackend, mine_touches, write_file_counts_csv, open_touches_csv, touch_row
 
 
 # Configurations
 repo = "scottyab/rootbeer" 
 lstTokens = ["", ""] #DO NOT COMMIT real tokens
 
-OUTPUT_CSV = "data/file_touches_authors_dates.csv"
+OUTPUT_CSV = "data/file_touches_authors_dates.csv"  # end it in .gz to compress the output
+COLUMNAR = True  # also write data/file_touches_authors_dates.touches/, which the scatterplot loads much faster
+COUNTS_CSV = "data/file_" + repo.split("/")[1] + ".csv"
 PER_PAGE = 100
 
+# "single-pass": one crawl of the commit details builds both CSVs
+# "path": the older countfiles crawl followed by one commits?path= query per file
+CRAWL_MODE = "single-pass"
+
 
 # Collect touches per file (author + date)
 def collect_file_touches(repo, source_files, lstTokens):
     """
     For each source file, fetch commits touching that file and
-    collect (author, date) information.
+    collect (author, date) information, in a compact TouchTable
+    (iterating it gives back the row dicts).
     """
+    touches = TouchTable()
+    for r in iter_file_touches(repo, source_files, lstTokens):
+        touches.add(r)
+    return touches
+
+
+# Same as collect_file_touches, but yields the rows as they are fetched
+# @since, @until, only the commits made in this range (ISO 8601, both inclusive)
+def iter_file_touches(repo, source_files, lstTokens, since=None, until=None):
     ct = 0
-    rows = []
+    dateRange = (f"&since={since}" if since else "") + (f"&until={until}" if until else "")
 
     for idx, filename in enumerate(source_files, start=1):
         print(f"[{idx}/{len(source_files)}] Processing: {filename}")
@@ -33,7 +51,7 @@ def collect_file_touches(repo, source_files, lstTokens):
 
             commitsUrl = (
                 f"https://api.github.com/repos/{repo}/commits"
-                f"?path={safe_filename}&page={page}&per_page={PER_PAGE}"
+                f"?path={safe_filename}&page={page}&per_page={PER_PAGE}{dateRange}"
             )
 
             jsonCommits, ct = github_auth(commitsUrl, lstTokens, ct)
@@ -53,59 +71,79 @@ def collect_file_touches(repo, source_files, lstTokens):
                 commitMeta = commitObj.get("commit") or {}
                 commitAuthor = commitMeta.get("author") or {}
 
-                rows.append({
+                yield {
                     "filename": filename,
                     "sha": sha,
                     "author_login": author_login,
                     "author_name": commitAuthor.get("name"),
                     "author_email": commitAuthor.get("email"),
                     "date_iso": commitAuthor.get("date")
-                })
+                }
 
             page += 1
 
-    return rows
 
+# Touches the single-pass crawl could not see: commits whose file list
+# was cut off by the API limit. Only these commits are looked up by path,
+# each file's history listed just at the commit dates of the truncated commits.
+# @truncated, {sha: committer date} of the truncated commits
+# @seen, (filename, sha) pairs of the truncated commits already written
+def iter_missing_touches(repo, source_files, lstTokens, truncated, seen):
+    for date in sorted(set(truncated.values())):
+        for r in iter_file_touches(repo, source_files, lstTokens, since=date, until=date):
+            if r["sha"] in truncated and (r["filename"], r["sha"]) not in seen:
+                seen.add((r["filename"], r["sha"]))
+                yield r
 
-# Write output to CSV 
-def write_touches_csv(output_path, rows):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Filename",
-            "CommitSHA",
-            "AuthorLogin",
-            "AuthorName",
-            "AuthorEmail",
-            "CommitDate"
-        ])
+# Build the touch counts and stream the author/date rows to writer from a single crawl
+# @newest, optional dict that receives the watermark of the newest commit crawled
+def single_pass(repo, lstTokens, writer, newest=None):
+    languages = get_repo_languages(repo, lstTokens)
+    print("Detected languages:", languages)
 
-        for r in rows:
-            writer.writerow([
-                r["filename"],
-                r["sha"],
-                r["author_login"],
-                r["author_name"],
-                r["author_email"],
-                r["date_iso"]
-            ])
+    truncated = {}
+    seen = set()
 
+    def on_touch(r):
+        writer.writerow(touch_row(r))
+        if r["sha"] in truncated:
+            seen.add((r["filename"], r["sha"]))
 
-if __name__ == "__main__":
-    # 1) Call adapted countfiles() from Richard_CollectFiles.py
-    #    This already filters to SOURCE FILES ONLY
-    source_files_dict = {}
-    countfiles(source_files_dict, lstTokens, repo)
+    dictfiles, _ = mine_touches(GitHubBackend(repo, lstTokens),
+                                classifier_for(languages),
+                                truncated, on_touch, newest)
 
-    source_files = list(source_files_dict.keys())
-    print(f"Total source files detected: {len(source_files)}")
+    if truncated:
+        print(f"{len(truncated)} commits list more than the API limit of files, looking them up by path")
+        for r in iter_missing_touches(repo, list(dictfiles), lstTokens, truncated, seen):
+            dictfiles[r["filename"]] += 1
+            writer.writerow(touch_row(r))
 
-    # 2) Collect author + date touches
-    touches = collect_file_touches(repo, source_files, lstTokens)
+    return dictfiles
 
-    # 3) Write results to CSV
-    write_touches_csv(OUTPUT_CSV, touches)
 
-    print(f"Done. Output written to: {OUTPUT_CSV}")
+if __name__ == "__main__":
+    # Rows are written to OUTPUT_CSV as they are found, not collected first
+    with open_touches_csv(OUTPUT_CSV, columnar=COLUMNAR) as writer:
+        if CRAWL_MODE == "single-pass":
+            # 1) One crawl gives both the touch counts and the author + date touches
+            newest = {}
+            source_files_dict = single_pass(repo, lstTokens, writer, newest)
+            print(f"Total source files detected: {len(source_files_dict)}")
+            # also moves the watermark of COUNTS_CSV, which RichardSserunjogi_CollectFiles.py resumes from
+            write_file_counts_csv(COUNTS_CSV, source_files_dict, newest)
+        else:
+            # 1) Call adapted countfiles() from Richard_CollectFiles.py
+            #    This already filters to SOURCE FILES ONLY
+            source_files_dict = {}
+            countfiles(source_files_dict, lstTokens, repo)
+
+            source_files = list(source_files_dict.keys())
+            print(f"Total source files detected: {len(source_files)}")
+
+            # 2) Collect author + date touches and write them to CSV
+            for r in iter_file_touches(repo, source_files, lstTokens):
+                writer.writerow(touch_row(r))
+
+    print(f"Done. {writer.rows_written} touches written to: {OUTPUT_CSV}")
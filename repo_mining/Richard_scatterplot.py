@@ -1,15 +1,27 @@
 
+import argparse
+import time
+
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # figures are only saved, never shown
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import os
+
+import author_scatter
+from author_scatter import density_by_author, scatter_by_author
+from figure_build import FigureJob, build_figures, print_build, WORKERS
+from touch_cube import cube_for
 
 # Configurations
-CSV_PATH = "data/file_touches_authors_dates.csv"
+CSV_PATH = "data/file_touches_authors_dates.csv"  # or its columnar copy, see touch_cube.read_touches
 TOP_N_FILES = 50
 AUTHOR_COL = "AuthorLogin"
 DATE_COL = "CommitDate"
 FILE_COL = "Filename"
+# Above this many touches the weeks-vs-files plots are drawn as a file x week grid
+# (colored by the dominant author) instead of one marker per touch
+DENSITY_ABOVE = 200_000
 
 OUTPUT_FIG_CAL = "data/figures/weeks_vs_files_calendar.png"
 OUTPUT_FIG_NUM = "data/figures/weeks_vs_files_numeric.png"
@@ -18,158 +30,157 @@ OUTPUT_FIG_TOP_AUTHORS = "data/figures/top_authors.png"
 OUTPUT_FIG_TOP_FILES = "data/figures/top_files.png"
 OUTPUT_FIG_BOTTOM_AUTHORS = "data/figures/bottom_authors.png"
 OUTPUT_FIG_BOTTOM_FILES = "data/figures/bottom_files.png"
+FIGURES_MANIFEST = "data/figures/.build.json"
 
-# Load & preprocess
-df = pd.read_csv(CSV_PATH)
-df[DATE_COL] = pd.to_datetime(df[DATE_COL], errors="coerce", utc=True)
-df = df.dropna(subset=[DATE_COL, FILE_COL])
-df[AUTHOR_COL] = df[AUTHOR_COL].fillna("unknown").astype(str)
-
-# Short file names
-df["ShortFile"] = df[FILE_COL].apply(lambda x: os.path.basename(x))
-
-# Week start (calendar)
-df["WeekStart"] = df[DATE_COL].dt.to_period("W").dt.start_time
-
-# Numeric project week (0 = first week of project)
-project_start = df["WeekStart"].min()
-df["ProjectWeek"] = ((df["WeekStart"] - project_start).dt.days // 7).astype(int)
-
-# Reduce to top-N files
-top_files = df["ShortFile"].value_counts().head(TOP_N_FILES).index.tolist()
-dff = df[df["ShortFile"].isin(top_files)].copy()
 
-# Map files to x positions
-file_to_x = {f: i for i, f in enumerate(top_files)}
-dff["x"] = dff["ShortFile"].map(file_to_x)
-
-# Colors per author (use matplotlib defaults)
-authors = sorted(dff[AUTHOR_COL].unique())
-color_cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
-author_to_color = {a: color_cycle[i % len(color_cycle)] for i, a in enumerate(authors)}
+# Each figure is drawn by its own function from only the data it shows, so that
+# figure_build can render them in parallel and skip those whose data did not change.
 
 # Plot 1: Showing Calendar weeks on Y-axis
-plt.figure(figsize=(16, 10))
-for author in authors:
-    sub = dff[dff[AUTHOR_COL] == author]
-    plt.scatter(sub["x"], sub["WeekStart"], label=author, s=35, alpha=0.75,
-                c=author_to_color[author])
-
-plt.xticks(range(len(top_files)), top_files, rotation=45, ha="right")
-plt.xlabel("File")
-
-ax = plt.gca()
-ax.yaxis.set_major_locator(mdates.MonthLocator(interval=3))
-ax.yaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
-plt.ylabel("Weeks")
+# @dff, one row per (file, author, week) cell with touches: x, ProjectWeek, AUTHOR_COL, Touches
+def plot_weeks_calendar(output, dff, top_files, project_start, density):
+    # Colors per author (matplotlib defaults, authors in name order)
+    plt.figure(figsize=(16, 10))
+    if density:
+        density_by_author(plt.gca(), dff["x"], dff["ProjectWeek"], dff[AUTHOR_COL],
+                          legend_kw={"bbox_to_anchor": (1.02, 1), "loc": "upper left"}, weights=dff["Touches"],
+                          y_origin=mdates.date2num(project_start), y_step=7)
+    else:
+        week_start = project_start + pd.to_timedelta(dff["ProjectWeek"] * 7, unit="D")
+        scatter_by_author(plt.gca(), dff["x"], week_start, dff[AUTHOR_COL], s=35, alpha=0.75,
+                          legend_kw={"bbox_to_anchor": (1.02, 1), "loc": "upper left"})
+
+    plt.xticks(range(len(top_files)), top_files, rotation=45, ha="right")
+    plt.xlabel("File")
+
+    ax = plt.gca()
+    ax.yaxis.set_major_locator(mdates.MonthLocator(interval=3))
+    ax.yaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
+    plt.ylabel("Weeks")
+
+    plt.title("Source File Touches Over Time — Weeks vs Files (Colored by Author)")
+    plt.tight_layout()
+    plt.savefig(output, dpi=300)
+    plt.close()
 
-plt.title("Source File Touches Over Time — Weeks vs Files (Colored by Author)")
-plt.legend(title="Author", bbox_to_anchor=(1.02, 1), loc="upper left")
-plt.tight_layout()
-
-os.makedirs(os.path.dirname(OUTPUT_FIG_CAL), exist_ok=True)
-plt.savefig(OUTPUT_FIG_CAL, dpi=300)
-#plt.show()
 
 # Plot 2: Showing Numeric project weeks on Y-axis (Main scatter plot required for the exercise)
-plt.figure(figsize=(12, 6))
-for author in authors:
-    sub = dff[dff[AUTHOR_COL] == author]
-    plt.scatter(sub["x"], sub["ProjectWeek"], label=author, s=35, alpha=0.75,
-                c=author_to_color[author])
-
-plt.xticks(range(len(top_files)), top_files, rotation=45, ha="right",fontsize=10)
-plt.xlabel("File",  fontsize=12)
-plt.ylabel("Project Weeks (0 = project start)",  fontsize=12)
+def plot_weeks_numeric(output, dff, top_files, density):
+    plt.figure(figsize=(12, 6))
+    if density:
+        density_by_author(plt.gca(), dff["x"], dff["ProjectWeek"], dff[AUTHOR_COL],
+                          legend_kw={"bbox_to_anchor": (1.02, 1), "loc": "upper left", "fontsize": 9},
+                          weights=dff["Touches"])
+    else:
+        scatter_by_author(plt.gca(), dff["x"], dff["ProjectWeek"], dff[AUTHOR_COL], s=35, alpha=0.75,
+                          legend_kw={"bbox_to_anchor": (1.02, 1), "loc": "upper left", "fontsize": 9})
 
-# Make numeric scale readable
-plt.yticks(range(0, dff["ProjectWeek"].max() + 1, 25), fontsize=10)
+    plt.xticks(range(len(top_files)), top_files, rotation=45, ha="right",fontsize=10)
+    plt.xlabel("File",  fontsize=12)
+    plt.ylabel("Project Weeks (0 = project start)",  fontsize=12)
 
-plt.title("Source File Touches Over Project Lifetime — Weeks vs Files (Colored by Author)", fontsize=14)
-plt.legend(title="Author", bbox_to_anchor=(1.02, 1), loc="upper left", fontsize=9)
-plt.tight_layout()
-os.makedirs(os.path.dirname(OUTPUT_FIG_NUM), exist_ok=True)
-plt.savefig(OUTPUT_FIG_NUM, dpi=300, bbox_inches="tight")
-#plt.show()
+    # Make numeric scale readable
+    plt.yticks(range(0, dff["ProjectWeek"].max() + 1, 25), fontsize=10)
 
-OUTPUT_FIG_CAL, OUTPUT_FIG_NUM
+    plt.title("Source File Touches Over Project Lifetime — Weeks vs Files (Colored by Author)", fontsize=14)
+    plt.tight_layout()
+    plt.savefig(output, dpi=300, bbox_inches="tight")
+    plt.close()
 
 
 ### Additional Insights for the executive summary report..
 
-# parse dates
-df['CommitDate'] = pd.to_datetime(df['CommitDate'])
-
-# top authors by touches
-top_authors = df['AuthorLogin'].value_counts().head(15)
-
-top_files = df['ShortFile'].value_counts().head(15)
-
-bottom_authors = df['AuthorLogin'].value_counts().tail(15)
-
-bottom_files = df['ShortFile'].value_counts().tail(15)
-
-top_authors, top_files , bottom_authors , bottom_files
-
-
-plt.figure(figsize=(12, 4))  
-
-plt.subplot(1, 2, 1)
-top_files.plot(kind="bar")
-plt.title("Top Source Files by Touches", fontsize=14)
-plt.ylabel("Number of Touches", fontsize=12)
-plt.xlabel("File", fontsize=12)
-plt.xticks(rotation=45, ha="right", fontsize=10)
-
-plt.subplot(1, 2, 2)
-top_authors.plot(kind="bar")
-plt.title("Top Authors by Source-File Touches", fontsize=14)
-plt.ylabel("Number of Touches", fontsize=12)
-plt.xlabel("Author", fontsize=12)
-plt.xticks(rotation=45, ha="right", fontsize=10)
-
-plt.tight_layout()
-#plt.savefig("figures/bar_charts.png", dpi=300, bbox_inches="tight")
-os.makedirs(os.path.dirname(OUTPUT_FIG_TOP_AUTHORS_AND_FILES), exist_ok=True)
-plt.savefig(OUTPUT_FIG_TOP_AUTHORS_AND_FILES, dpi=300,bbox_inches="tight")
-#plt.show()
-
-plt.figure()
-top_authors.plot(kind='bar')
-plt.title("Top Authors by Source-File Touches")
-plt.ylabel("Number of Touches")
-plt.xlabel("Author")
-plt.tight_layout()
-os.makedirs(os.path.dirname(OUTPUT_FIG_TOP_AUTHORS), exist_ok=True)
-plt.savefig(OUTPUT_FIG_TOP_AUTHORS, dpi=300)
-#plt.show()
-
-plt.figure()
-top_files.plot(kind='bar')
-plt.title("Top Source Files by Touches")
-plt.ylabel("Number of Touches")
-plt.xlabel("File")
-plt.tight_layout()
-os.makedirs(os.path.dirname(OUTPUT_FIG_TOP_FILES), exist_ok=True)
-plt.savefig(OUTPUT_FIG_TOP_FILES, dpi=300)
-#plt.show()
-
-plt.figure()
-bottom_authors.plot(kind='bar')
-plt.title("Bottom Authors by Source-File Touches")
-plt.ylabel("Number of Touches")
-plt.xlabel("Author")
-plt.tight_layout()
-os.makedirs(os.path.dirname(OUTPUT_FIG_BOTTOM_AUTHORS), exist_ok=True)
-plt.savefig(OUTPUT_FIG_BOTTOM_AUTHORS, dpi=300)
-#plt.show()
-
-plt.figure()
-bottom_files.plot(kind='bar')
-plt.title("Bottom Source Files by Touches")
-plt.ylabel("Number of Touches")
-plt.xlabel("File")
-plt.tight_layout()
-os.makedirs(os.path.dirname(OUTPUT_FIG_BOTTOM_FILES), exist_ok=True)
-plt.savefig(OUTPUT_FIG_BOTTOM_FILES, dpi=300)
-#plt.show()
\ No newline at end of file
+def plot_top_authors_and_files(output, top_files, top_authors):
+    plt.figure(figsize=(12, 4))
+
+    plt.subplot(1, 2, 1)
+    top_files.plot(kind="bar")
+    plt.title("Top Source Files by Touches", fontsize=14)
+    plt.ylabel("Number of Touches", fontsize=12)
+    plt.xlabel("File", fontsize=12)
+    plt.xticks(rotation=45, ha="right", fontsize=10)
+
+    plt.subplot(1, 2, 2)
+    top_authors.plot(kind="bar")
+    plt.title("Top Authors by Source-File Touches", fontsize=14)
+    plt.ylabel("Number of Touches", fontsize=12)
+    plt.xlabel("Author", fontsize=12)
+    plt.xticks(rotation=45, ha="right", fontsize=10)
+
+    plt.tight_layout()
+    plt.savefig(output, dpi=300,bbox_inches="tight")
+    plt.close()
+
+
+# @ranking, touches per author or file, as a Series
+def plot_ranking(output, ranking, title, xlabel):
+    plt.figure()
+    ranking.plot(kind='bar')
+    plt.title(title)
+    plt.ylabel("Number of Touches")
+    plt.xlabel(xlabel)
+    plt.tight_layout()
+    plt.savefig(output, dpi=300)
+    plt.close()
+
+
+def figure_jobs(cube):
+    """The report figures of a TouchCube, with the data each one is drawn from."""
+    file_totals = cube.file_totals()
+    author_totals = cube.author_totals()
+
+    # Reduce to top-N files (short file names)
+    top_files = file_totals.head(TOP_N_FILES).index.tolist()
+
+    # Map files to x positions; one point per (file, author, week) cell with touches
+    cells, x = cube.cells_of_files(top_files)
+    dff = pd.DataFrame({
+        "x": x,
+        "ProjectWeek": cube.week[cells],  # numeric project week (0 = first week of project)
+        AUTHOR_COL: cube.authors[cube.author_id[cells]],
+        "Touches": cube.count[cells],
+    })
+    density = bool(dff["Touches"].sum() > DENSITY_ABOVE)
+
+    # top and bottom authors and files by touches
+    top_authors = author_totals.head(15)
+    top_files_15 = file_totals.head(15)
+    bottom_authors = author_totals.tail(15)
+    bottom_files = file_totals.tail(15)
+
+    return [
+        FigureJob(OUTPUT_FIG_CAL, plot_weeks_calendar,
+                  {"dff": dff, "top_files": top_files, "project_start": cube.project_start}, {"density": density},
+                  helpers=[author_scatter]),
+        FigureJob(OUTPUT_FIG_NUM, plot_weeks_numeric,
+                  {"dff": dff, "top_files": top_files}, {"density": density}, helpers=[author_scatter]),
+        FigureJob(OUTPUT_FIG_TOP_AUTHORS_AND_FILES, plot_top_authors_and_files,
+                  {"top_files": top_files_15, "top_authors": top_authors}),
+        FigureJob(OUTPUT_FIG_TOP_AUTHORS, plot_ranking, {"ranking": top_authors},
+                  {"title": "Top Authors by Source-File Touches", "xlabel": "Author"}),
+        FigureJob(OUTPUT_FIG_TOP_FILES, plot_ranking, {"ranking": top_files_15},
+                  {"title": "Top Source Files by Touches", "xlabel": "File"}),
+        FigureJob(OUTPUT_FIG_BOTTOM_AUTHORS, plot_ranking, {"ranking": bottom_authors},
+                  {"title": "Bottom Authors by Source-File Touches", "xlabel": "Author"}),
+        FigureJob(OUTPUT_FIG_BOTTOM_FILES, plot_ranking, {"ranking": bottom_files},
+                  {"title": "Bottom Source Files by Touches", "xlabel": "File"}),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the report figures from the mined touches.")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--force", action="store_true", help="rebuild the figures even when up to date")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    # Load & aggregate
+    # every figure and ranking is drawn from the file x author x week cube; it is
+    # saved next to the CSV and reused while the touches are unchanged, so the CSV is not read again
+    cube = cube_for(CSV_PATH, FILE_COL, AUTHOR_COL, DATE_COL)
+    status = build_figures(figure_jobs(cube), FIGURES_MANIFEST, args.workers, args.force)
+    print_build(status, started)
+
+
+if __name__ == "__main__":
+    main()
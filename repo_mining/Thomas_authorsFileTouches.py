@@ -1,25 +1,9 @@
-import json
-import requests
 import csv
 
 import os
 
-if not os.path.exists("data"):
- os.makedirs("data")
-
-# GitHub Authentication function
-def github_auth(url, lsttoken, ct):
-    jsonData = None
-    try:
-        ct = ct % len(lstTokens)
-        headers = {'Authorization': 'Bearer {}'.format(lsttoken[ct])}
-        request = requests.get(url, headers=headers)
-        jsonData = json.loads(request.content)
-        ct += 1
-    except Exception as e:
-        pass
-        print(e)
-    return jsonData, ct
+from github_api import github_auth
+from source_classifier import SourceClassifier
 
 # @authorAndDates, empty dictionary of files, authors and dates
 # @lstTokens, GitHub authentication tokens
@@ -30,6 +14,7 @@ def github_auth(url, lsttoken, ct):
 # and some source files seen in the CollectFiles.pt such as .h and .sh
 # .h is for C/C++ header files
 SOURCE_FILE_EXTENSIONS = ('.java', '.kt', '.kts', '.cpp', '.c', '.h', '.sh')
+is_source = SourceClassifier(SOURCE_FILE_EXTENSIONS)
 
 def collectAuthorAndDates(authorAndDates, lsttokens, repo):
     ipage = 1  # url page counter
@@ -60,14 +45,14 @@ def collectAuthorAndDates(authorAndDates, lsttokens, repo):
                 for filenameObj in filesjson:
                     filename = filenameObj['filename']
                     # only collect source files by checking their file extension
-                    if (filename.endswith(SOURCE_FILE_EXTENSIONS)): 
+                    if is_source(filename): 
                         # append the source file's author, date
                         authorAndDates.append([filename, author, date.split('T')[0]])
                         print(filename)
             ipage += 1
-    except:
-        print("Error receiving data")
-        exit(0)
+    except Exception as e:
+        print("Error receiving data:", repr(e))
+        raise
 # GitHub repo
 repo = 'scottyab/rootbeer'
 # repo = 'Skyscanner/backpack' # This repo is commit heavy. It takes long to finish executing
@@ -81,19 +66,27 @@ repo = 'scottyab/rootbeer'
 # I would advise to create more than one token for repos with heavy commits
 lstTokens = []
 
-authorAndDates = []
-collectAuthorAndDates(authorAndDates, lstTokens, repo)
-print('Total number of files: ' + str(len(authorAndDates)))
 
-file = repo.split('/')[1]
-# change this to the path of your file
-fileOutput = 'data/authorsAndDates_' + file + '.csv'
-rows = ["File", "Author", "Date"]
-fileCSV = open(fileOutput, 'w')
-writer = csv.writer(fileCSV)
-writer.writerow(rows)
+def main():
+    os.makedirs("data", exist_ok=True)
 
-for filename, author, date in authorAndDates:
-    rows = [filename, author, date]
+    authorAndDates = []
+    collectAuthorAndDates(authorAndDates, lstTokens, repo)
+    print('Total number of files: ' + str(len(authorAndDates)))
+
+    file = repo.split('/')[1]
+    # change this to the path of your file
+    fileOutput = 'data/authorsAndDates_' + file + '.csv'
+    rows = ["File", "Author", "Date"]
+    fileCSV = open(fileOutput, 'w')
+    writer = csv.writer(fileCSV)
     writer.writerow(rows)
-fileCSV.close()
+
+    for filename, author, date in authorAndDates:
+        rows = [filename, author, date]
+        writer.writerow(rows)
+    fileCSV.close()
+
+
+if __name__ == "__main__":
+    main()
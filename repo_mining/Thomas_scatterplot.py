@@ -1,10 +1,11 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import pandas as pd
+
+from touch_csv import read_touch_csv
 
 # Structured after CollectFiles.py
 try:
-    df = pd.read_csv('data/authorsAndDates_rootbeer.csv')
+    df = read_touch_csv('data/authorsAndDates_rootbeer.csv')  # dates already parsed
 
     # load the data from the csv file 
     # Give each unique filename an index
@@ -27,7 +28,6 @@ try:
     df['AuthorColorIndex'] = df['Author'].map(authorIndex)
 
     # convert to weeks
-    df['Date'] = pd.to_datetime(df['Date'])
     df['Week'] = df['Date'].dt.isocalendar().week   
 except:
     print ("Error reading data")
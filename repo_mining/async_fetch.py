@@ -0,0 +1,184 @@
+import asyncio
+import collections
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from github_api import github_request, http_session, last_page
+
+# Base URL of the GitHub REST API (point it at a local mock server for benchmarks)
+API_URL = "https://api.github.com"
+
+# Number of requests allowed in flight at the same time
+DEFAULT_CONCURRENCY = 16
+
+# Number of listing pages whose commit details may be downloading at once
+DEFAULT_PREFETCH_PAGES = 2
+
+
+# Fetch commit details concurrently, page by page
+# @repo, GitHub repo
+# @lsttokens, GitHub authentication tokens
+# @fetch, function with the github_auth(url, lsttoken, ct) signature
+# @on_commit, called as on_commit(shaObject, shaDetails) for every commit
+# @since, only list commits made at or after this ISO 8601 date
+# @until, only list commits made at or before this ISO 8601 date
+# @stop_sha, stop at this commit (exclusive), e.g. the newest one of a previous run
+# @request, function with the github_request(url, lsttoken) signature, used for the first page
+# @start_page, listing page to start from (to resume an interrupted crawl)
+# @skip_shas, commits that are neither fetched nor passed to on_commit (already processed)
+# @on_page_done, called as on_page_done(ipage) once every commit of a page was handed over
+# @end_page, last listing page to crawl (inclusive), e.g. for one unit of a split crawl
+# @ref, list the history of this commit instead of the default branch, so pages do not shift
+def crawl_commit_details(repo, lsttokens, fetch, on_commit,
+                         concurrency=DEFAULT_CONCURRENCY,
+                         prefetch_pages=DEFAULT_PREFETCH_PAGES,
+                         api_url=API_URL, since=None, stop_sha=None,
+                         request=github_request, start_page=1, skip_shas=(),
+                         on_page_done=None, end_page=None, ref=None, until=None):
+    """
+    Walks commits?page=N&per_page=100 like countfiles does, but downloads the
+    /commits/{sha} details of a page (and of the next pages) in parallel.
+    on_commit is still called in the original history order, so callers that
+    fill a dict get the same insertion order as the sequential loop.
+
+    The Link header of the first page gives the number of pages, so the
+    following listing pages are fetched in parallel too. Without it the
+    crawl falls back to requesting pages until one comes back empty.
+    """
+    asyncio.run(_crawl(repo, lsttokens, fetch, request, on_commit, on_page_done,
+                       concurrency, prefetch_pages, api_url, since, stop_sha,
+                       start_page, skip_shas, end_page, ref, until))
+
+
+# Fetch a list of URLs concurrently; results are returned in the same order
+def fetch_all(urls, lsttokens, fetch, concurrency=DEFAULT_CONCURRENCY):
+    return asyncio.run(_fetch_all(urls, lsttokens, fetch, concurrency))
+
+
+async def _fetch_all(urls, lsttokens, fetch, concurrency):
+    with _Fetcher(lsttokens, fetch, github_request, concurrency) as fetcher:
+        return await asyncio.gather(*(fetcher.get(url) for url in urls))
+
+
+async def _crawl(repo, lsttokens, fetch, request, on_commit, on_page_done, concurrency, prefetch_pages,
+                 api_url, since, stop_sha, start_page, skip_shas, end_page, ref, until):
+    def page_url(ipage):
+        commitsUrl = f"{api_url}/repos/{repo}/commits?page={ipage}&per_page=100"
+        if since:
+            commitsUrl += f"&since={since}"
+        if until:
+            commitsUrl += f"&until={until}"
+        if ref:
+            commitsUrl += f"&sha={ref}"
+        return commitsUrl
+
+    with _Fetcher(lsttokens, fetch, request, concurrency) as fetcher:
+        pages = _list_pages(fetcher, page_url, window=max(concurrency, prefetch_pages),
+                            start_page=start_page, end_page=end_page)
+        pending = collections.deque()  # (page, shaObjects, detail tasks) not yet handed to on_commit
+        try:
+            async for ipage, jsonCommits in pages:
+                # everything from stop_sha on was already seen
+                shas = [shaObject['sha'] for shaObject in jsonCommits]
+                stop = stop_sha in shas
+                if stop:
+                    jsonCommits = jsonCommits[:shas.index(stop_sha)]
+                jsonCommits = [shaObject for shaObject in jsonCommits if shaObject['sha'] not in skip_shas]
+
+                tasks = [asyncio.ensure_future(fetcher.get(f"{api_url}/repos/{repo}/commits/{shaObject['sha']}"))
+                         for shaObject in jsonCommits]
+                pending.append((ipage, jsonCommits, tasks))
+                if stop:
+                    break
+
+                # keep up to prefetch_pages pages of details downloading
+                while len(pending) >= prefetch_pages:
+                    await _deliver(pending.popleft(), on_commit, on_page_done)
+
+            while pending:
+                await _deliver(pending.popleft(), on_commit, on_page_done)
+        finally:
+            await pages.aclose()
+            for _, _, tasks in pending:
+                for task in tasks:
+                    task.cancel()
+
+
+async def _deliver(page, on_commit, on_page_done):
+    ipage, jsonCommits, tasks = page
+    details = await asyncio.gather(*tasks)
+    for shaObject, shaDetails in zip(jsonCommits, details):
+        on_commit(shaObject, shaDetails)
+    if on_page_done is not None:
+        on_page_done(ipage)
+
+
+# Yield (page number, commits) for the non-empty listing pages, in order
+async def _list_pages(fetcher, page_url, window, start_page=1, end_page=None):
+    ipage = start_page
+    jsonCommits, headers = await fetcher.get_with_headers(page_url(ipage))
+    last = last_page(headers.get("Link"))
+
+    if last is None:
+        # no Link header: probe until the first empty page, as the sequential loop does
+        while len(jsonCommits) != 0:
+            yield ipage, jsonCommits
+            if ipage == end_page:
+                return
+            ipage += 1
+            jsonCommits = await fetcher.get(page_url(ipage))
+        return
+    if end_page is not None:
+        last = min(last, end_page)
+
+    if len(jsonCommits) == 0:
+        return
+    yield ipage, jsonCommits
+
+    # the page count is known: keep up to window listing pages downloading at once
+    tasks = collections.deque()
+    next_page = ipage + 1
+    try:
+        while tasks or next_page <= last:
+            while next_page <= last and len(tasks) < window:
+                tasks.append((next_page, asyncio.ensure_future(fetcher.get(page_url(next_page)))))
+                next_page += 1
+            ipage, task = tasks.popleft()
+            jsonCommits = await task
+            # the history can shrink while we crawl (e.g. a force push)
+            if len(jsonCommits) == 0:
+                return
+            yield ipage, jsonCommits
+    finally:
+        for _, task in tasks:
+            task.cancel()
+
+
+# Runs the blocking fetch functions on a bounded thread pool
+class _Fetcher:
+    def __init__(self, lsttokens, fetch, request, concurrency):
+        self.lsttokens = lsttokens
+        self.fetch = fetch
+        self.request = request
+        self.semaphore = asyncio.Semaphore(concurrency)
+        http_session(concurrency)  # one keep-alive connection per worker thread
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+        self.counter = itertools.count()  # token counter shared by all requests
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def get(self, url):
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            ct = next(self.counter)
+            jsonData, _ = await loop.run_in_executor(self.pool, self.fetch, url, self.lsttokens, ct)
+            return jsonData
+
+    async def get_with_headers(self, url):
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, self.request, url, self.lsttokens)
@@ -0,0 +1,115 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.colors import to_rgba_array
+from matplotlib.lines import Line2D
+
+
+# Authors as integer codes (-1 for a missing author) and one color per author
+def _encode_authors(authors, palette, sort):
+    codes, names = pd.factorize(np.asarray(authors), sort=sort)
+    if palette is None:
+        palette = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+    palette = to_rgba_array(palette)
+    return codes, names, palette[np.arange(len(names)) % len(palette)]
+
+
+def _author_legend(ax, names, colors, alpha, title, legend_kw):
+    handles = [Line2D([], [], linestyle="", marker="o", markerfacecolor=color, markeredgecolor=color,
+                      alpha=alpha, label=name)
+               for name, color in zip(names, colors)]
+    ax.legend(handles=handles, title=title, **(legend_kw or {}))
+
+
+# @ax, matplotlib axes to draw on
+# @x, @y, point positions (numbers or dates), one per touch
+# @authors, author of each touch
+# @palette, colors given to the authors in turn (default: matplotlib's color cycle)
+# @sort, order the authors by name (else by first appearance) for colors and legend
+def scatter_by_author(ax, x, y, authors, palette=None, sort=True, legend_title="Author",
+                      legend_kw=None, **scatter_kw):
+    """
+    Draw one point per touch, colored by author.
+
+    Authors are encoded once as integer codes and the rows put in code order
+    with one stable sort, so each author's points are a contiguous slice:
+    the work is linear in the number of rows whatever the number of authors,
+    where filtering the frame per author is rows x authors. Each slice is
+    still drawn as its own single-color scatter, as matplotlib stamps a
+    single-color marker instead of rendering every point (a single
+    per-point-colored collection draws several times slower). The legend is
+    built from proxy markers.
+    """
+    codes, names, colors = _encode_authors(authors, palette, sort)
+
+    # rows without an author (code -1) sort first and are left out, as no author's filter matched them
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+    x = pd.Series(x).iloc[order]
+    y = pd.Series(y).iloc[order]
+    for code, color in enumerate(colors):
+        start, end = bounds[code], bounds[code + 1]
+        ax.scatter(x.iloc[start:end], y.iloc[start:end], color=color, **scatter_kw)
+
+    _author_legend(ax, names, colors, scatter_kw.get("alpha"), legend_title, legend_kw)
+
+
+# @x, @y, integer cell of each touch (e.g. file position and project week), from 0
+# @codes, author code of each touch (-1 for none)
+# @weights, touches each entry stands for (e.g. the counts of a TouchCube), 1 if None
+def bin_touches(x, y, codes, n_x, n_y, n_authors, weights=None):
+    """
+    Histogram touches into an (n_y, n_x) grid: the touches per cell and the
+    author with the most touches in it (-1 for an empty cell; ties go to the
+    lowest code).
+    """
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    codes = np.asarray(codes, dtype=np.int64)
+    keep = codes >= 0
+    cells = (y * n_x + x)[keep]
+    weights = np.ones(len(cells), dtype=np.int64) if weights is None else np.asarray(weights)[keep]
+    counts = np.bincount(cells, weights=weights, minlength=n_x * n_y).astype(np.int64)
+
+    # touches per (cell, author), then the largest per cell
+    pairs, pair_index = np.unique(cells * n_authors + codes[keep], return_inverse=True)
+    pair_counts = np.bincount(pair_index.ravel(), weights=weights, minlength=len(pairs))
+    pair_cells, pair_authors = np.divmod(pairs, n_authors)
+    order = np.lexsort((pair_authors, -pair_counts, pair_cells))
+    first = order[np.r_[True, pair_cells[order][1:] != pair_cells[order][:-1]]] if len(order) else order
+    dominant = np.full(n_x * n_y, -1, dtype=np.int64)
+    dominant[pair_cells[first]] = pair_authors[first]
+    return counts.reshape(n_y, n_x), dominant.reshape(n_y, n_x)
+
+
+# @ax, matplotlib axes to draw on
+# @x, @y, integer cell of each touch (e.g. file position and project week), from 0
+# @authors, author of each touch
+# @weights, touches each entry stands for, 1 if None
+# @y_origin, @y_step, axis value of row 0 and between rows (e.g. a date number and 7 for calendar weeks)
+def density_by_author(ax, x, y, authors, palette=None, sort=True, legend_title="Author", legend_kw=None,
+                      weights=None, y_origin=0, y_step=1):
+    """
+    Draw touches as a grid image instead of one marker per touch.
+
+    Each cell takes the color of its dominant author, more opaque the more
+    touches it holds (log scale), and the whole grid is a single imshow, so
+    drawing and saving cost depends on the grid size, not on the number of
+    touches.
+    """
+    codes, names, colors = _encode_authors(authors, palette, sort)
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n_x = int(x.max()) + 1 if len(x) else 1
+    n_y = int(y.max()) + 1 if len(y) else 1
+    counts, dominant = bin_touches(x, y, codes, n_x, n_y, max(len(names), 1), weights)
+
+    image = np.zeros((n_y, n_x, 4))
+    filled = dominant >= 0
+    image[filled] = colors[dominant[filled]]
+    image[..., 3] = np.log1p(counts) / np.log1p(max(counts.max(), 1))
+    image[filled, 3] = 0.25 + 0.75 * image[filled, 3]  # a single touch stays visible
+
+    ax.imshow(image, origin="lower", aspect="auto", interpolation="nearest",
+              extent=(-0.5, n_x - 0.5, y_origin - 0.5 * y_step, y_origin + (n_y - 0.5) * y_step))
+    _author_legend(ax, names, colors, None, legend_title, legend_kw)
@@ -0,0 +1,67 @@
+import time
+
+from async_fetch import crawl_commit_details
+from github_api import github_auth, use_commit_store, use_response_cache
+from mock_github import MockGitHubServer, SyntheticRepo
+
+# Configurations
+REPO = "mock/repo"
+N_COMMITS = 500
+FILES_PER_COMMIT = 3
+LATENCY = 0.02  # seconds added to every response, to mimic the round trip to GitHub
+SEND_LINK = True  # send a Link rel="last" header with the listing pages, as GitHub does
+CONCURRENCY = 16
+
+
+# The current countfiles loop: one request at a time
+def sequential_countfiles(dictfiles, lsttokens, repo, api_url):
+    ipage = 1
+    ct = 0
+    while True:
+        commitsUrl = api_url + '/repos/' + repo + '/commits?page=' + str(ipage) + '&per_page=100'
+        jsonCommits, ct = github_auth(commitsUrl, lsttokens, ct)
+        if len(jsonCommits) == 0:
+            break
+        for shaObject in jsonCommits:
+            shaUrl = api_url + '/repos/' + repo + '/commits/' + shaObject['sha']
+            shaDetails, ct = github_auth(shaUrl, lsttokens, ct)
+            for filenameObj in shaDetails['files']:
+                filename = filenameObj['filename']
+                dictfiles[filename] = dictfiles.get(filename, 0) + 1
+        ipage += 1
+
+
+def async_countfiles(dictfiles, lsttokens, repo, api_url):
+    def count_commit(shaObject, shaDetails):
+        for filenameObj in shaDetails['files']:
+            filename = filenameObj['filename']
+            dictfiles[filename] = dictfiles.get(filename, 0) + 1
+
+    crawl_commit_details(repo, lsttokens, github_auth, count_commit,
+                         concurrency=CONCURRENCY, api_url=api_url)
+
+
+def timed(fn, api_url):
+    dictfiles = {}
+    start = time.perf_counter()
+    fn(dictfiles, ["token"], REPO, api_url)
+    return dictfiles, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # measure the network path, not the local caches
+    use_commit_store(None)
+    use_response_cache(None)
+
+    repo = SyntheticRepo(REPO, N_COMMITS, FILES_PER_COMMIT, files=50)
+    with MockGitHubServer([repo], latency=LATENCY, link_header=SEND_LINK) as server:
+        seq_files, seq_time = timed(sequential_countfiles, server.url)
+        async_files, async_time = timed(async_countfiles, server.url)
+
+    # the async engine must produce exactly the same result, in the same order
+    assert list(seq_files.items()) == list(async_files.items())
+
+    print(f"{N_COMMITS} commits, {LATENCY * 1000:.0f} ms latency per request")
+    print(f"sequential loop : {seq_time:.2f} s")
+    print(f"async (x{CONCURRENCY})     : {async_time:.2f} s")
+    print(f"speedup         : {seq_time / async_time:.1f}x")
@@ -0,0 +1,71 @@
+import argparse
+import os
+import random
+import time
+
+from source_classifier import LANGUAGE_EXTENSIONS, LANGUAGE_BASENAMES, SourceClassifier, classifier_for
+
+# Configurations
+N_PATHS = 2_000_000
+DISTINCT_PATHS = 20_000  # a history touches the same files over and over
+LANGUAGES = {"Java", "Kotlin", "C", "C++", "CMake"}
+
+DIRS = ["app/src/main/java/com/example", "app/src/test/java/com/example", "lib/src/main/cpp",
+        "lib/src/main/cpp/include", "buildSrc", "docs", "vendor/openssl", "node_modules/left-pad",
+        "app/build/generated/source", "gradle/wrapper"]
+NAMES = ["Main.java", "Util.kt", "build.gradle.kts", "native.cpp", "native.h", "README.md",
+         "CMakeLists.txt", "strings.xml", "index.min.js", "gradle-wrapper.properties", "Makefile"]
+
+
+# The classifier as it was in RichardSserunjogi_CollectFiles.py: the set of
+# extensions is rebuilt for every file
+def legacy_is_source_file(filename, languages):
+    if filename.endswith("CMakeLists.txt") and "CMake" in languages:
+        return True
+
+    _, ext = os.path.splitext(filename.lower())
+
+    allowed_exts = set()
+    for lang in languages:
+        allowed_exts |= {e.lower() for e in LANGUAGE_EXTENSIONS.get(lang, set())
+                         if e.startswith(".")}
+
+    return ext in allowed_exts
+
+
+def make_paths(n, distinct, seed=0):
+    rng = random.Random(seed)
+    pool = [f"{rng.choice(DIRS)}/pkg{rng.randrange(50)}/m{rng.randrange(1000)}/{rng.choice(NAMES)}"
+            for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def timed(label, classify, paths):
+    start = time.perf_counter()
+    matches = sum(1 for path in paths if classify(path))
+    seconds = time.perf_counter() - start
+    print(f"{label:<28} {seconds:7.2f} s  {len(paths) / seconds / 1e6:6.2f} M paths/s  ({matches} sources)")
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the source file classifiers over many paths.")
+    parser.add_argument("--paths", type=int, default=N_PATHS)
+    parser.add_argument("--distinct", type=int, default=DISTINCT_PATHS)
+    args = parser.parse_args(argv)
+
+    paths = make_paths(args.paths, args.distinct)
+    print(f"{len(paths)} paths, {args.distinct} distinct, languages {sorted(LANGUAGES)}")
+
+    legacy = timed("legacy is_source_file", lambda path: legacy_is_source_file(path, LANGUAGES), paths)
+    uncached = SourceClassifier(
+        set().union(*(LANGUAGE_EXTENSIONS.get(lang, set()) for lang in LANGUAGES)),
+        set().union(*(LANGUAGE_BASENAMES.get(lang, set()) for lang in LANGUAGES)))
+    timed("SourceClassifier.classify", uncached.classify, paths)
+    cached = timed("classifier_for (memoised)", classifier_for(LANGUAGES), paths)
+    print(f"speedup: {legacy / cached:.1f}x")
+    timed("classifier_for (no vendored)", classifier_for(LANGUAGES, exclude_vendored=True), paths)
+
+
+if __name__ == "__main__":
+    main()
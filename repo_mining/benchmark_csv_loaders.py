@@ -0,0 +1,116 @@
+import argparse
+import csv
+import gc
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from touch_csv import csv_engine, read_touch_csv
+from touch_store import TouchStoreWriter, store_path
+
+# Configurations
+SIZES = [1_000_000, 4_000_000]
+FILES_PER_COMMIT = 5
+N_FILES = 20_000
+N_AUTHORS = 300
+CUBE_COLUMNS = ("Filename", "AuthorLogin", "CommitDate")
+
+
+def write_csv(path, rows, seed=0):
+    """
+    A touches CSV like Richard_authorsFileTouches.py writes: each commit touches
+    a few files. Its columnar copy is written next to it, as the miners do.
+    """
+    rng = random.Random(seed)
+    files = [f"app/src/main/java/com/example/pkg{i % 50}/File{i}.java" for i in range(N_FILES)]
+    authors = [(f"dev{i}", f"Developer {i}", f"dev{i}@example.com") for i in range(N_AUTHORS)]
+    date = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    store = TouchStoreWriter(store_path(path))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Filename", "CommitSHA", "AuthorLogin", "AuthorName", "AuthorEmail", "CommitDate"])
+        written = 0
+        while written < rows:
+            sha = "%040x" % rng.getrandbits(160)
+            login, name, email = rng.choice(authors)
+            date += timedelta(minutes=rng.randrange(1, 120))
+            for _ in range(min(FILES_PER_COMMIT, rows - written)):
+                row = [rng.choice(files), sha, login, name, email, date.strftime("%Y-%m-%dT%H:%M:%SZ")]
+                writer.writerow(row)
+                store.writerow(row)
+                written += 1
+    store.close()
+
+
+# The loaders as the scripts had them
+
+# Richard_scatterplot.py (and touch_cube.read_touches): untyped read_csv, then to_datetime
+def legacy_pandas(path):
+    df = pd.read_csv(path)
+    df["CommitDate"] = pd.to_datetime(df["CommitDate"], errors="coerce", utc=True)
+    return df
+
+
+# nevryk_scatterplot.load_touches: csv.reader and datetime.fromisoformat per row
+def legacy_rows(path):
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            rows.append((row[0], row[2], datetime.fromisoformat(row[5].replace("Z", "+00:00"))))
+    return rows
+
+
+def timed(label, load, path):
+    gc.collect()
+    start = time.perf_counter()
+    result = load(path)
+    seconds = time.perf_counter() - start
+    memory = result.memory_usage(deep=True).sum() / 2**20 if isinstance(result, pd.DataFrame) else float("nan")
+    print(f"  {label:<32} {seconds:7.2f} s  {memory:8.0f} MB")
+    return result, seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the touch CSV loaders on large files.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--skip-rows-loader", action="store_true", help="leave out the per-row Python loader")
+    args = parser.parse_args(argv)
+
+    print(f"multithreaded engine: {csv_engine()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            path = os.path.join(tmp, f"touches_{rows}.csv")
+            write_csv(path, rows)
+            print(f"{rows} rows ({os.path.getsize(path) / 2**20:.0f} MB)")
+            legacy, legacy_seconds = timed("read_csv + to_datetime", legacy_pandas, path)
+            if not args.skip_rows_loader:
+                timed("csv.reader + fromisoformat", legacy_rows, path)
+            csv_only = {"prefer_store": False}
+            typed, typed_seconds = timed("read_touch_csv (C engine)",
+                                         lambda p: read_touch_csv(p, threaded=False, **csv_only), path)
+            timed("read_touch_csv, categoricals",
+                  lambda p: read_touch_csv(p, threaded=False, categories=True, **csv_only), path)
+            # what touch_cube reads for the figures
+            timed("read_touch_csv, 3 columns",
+                  lambda p: read_touch_csv(p, usecols=CUBE_COLUMNS, threaded=False, **csv_only), path)
+            if csv_engine() != "c":
+                timed("read_touch_csv (pyarrow)", lambda p: read_touch_csv(p, **csv_only), path)
+            stored, stored_seconds = timed("read_touch_csv (columnar store)", read_touch_csv, path)
+            timed("columnar store, 3 columns", lambda p: read_touch_csv(p, usecols=CUBE_COLUMNS), path)
+            # the same touches and dates come out
+            assert legacy["CommitDate"].equals(typed["CommitDate"])
+            assert (legacy["Filename"] == typed["Filename"]).all()
+            assert stored.equals(typed)
+            print(f"  speedup over read_csv + to_datetime: {legacy_seconds / typed_seconds:.1f}x, "
+                  f"{legacy_seconds / stored_seconds:.1f}x from the columnar store")
+            del legacy, typed, stored
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+try:
+    import resource  # peak RSS of the miner process (not available on Windows)
+except ImportError:
+    resource = None
+
+from mock_github import MockGitHubServer, SyntheticRepo
+
+# Configurations
+SIZES = [1000, 10000, 100000]  # commits in the synthetic repo
+MINERS = ["countfiles", "collect_file_touches", "collectAuthorAndDates"]
+TOKENS = ["bench"]
+TIMEOUT = 3600  # seconds a miner may run before it is stopped and reported as failed
+RSS_PER_MB = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is in bytes on macOS, KB elsewhere
+
+
+# Run one miner against the synthetic repo; returns the number of results it produced
+def run_miner(miner, repo, source_files):
+    if miner == "countfiles":
+        from RichardSserunjogi_CollectFiles import countfiles
+        dictfiles = {}
+        countfiles(dictfiles, TOKENS, repo)
+        return len(dictfiles)
+    if miner == "collect_file_touches":
+        from Richard_authorsFileTouches import collect_file_touches
+        return len(collect_file_touches(repo, source_files, TOKENS))
+    if miner == "collectAuthorAndDates":
+        from Thomas_authorsFileTouches import collectAuthorAndDates
+        authorAndDates = []
+        collectAuthorAndDates(authorAndDates, TOKENS, repo)
+        return len(authorAndDates)
+    raise ValueError(f"unknown miner {miner}")
+
+
+# Body of the child process: each miner runs in a fresh process so that its
+# peak memory is its own and module-level state does not leak between runs
+def _child(miner, repo, source_files, results):
+    import github_api
+    github_api.use_commit_store(None)  # measure the network path, not the local caches
+    github_api.use_response_cache(None)
+    github_api.BACKOFF_BASE = 0.01  # injected errors should not turn into minutes of sleep
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        count = run_miner(miner, repo, source_files)
+        wall = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / RSS_PER_MB if resource else None
+    results.put((wall, peak, count))
+
+
+def benchmark(miner, server, repo, source_files, timeout=TIMEOUT):
+    """
+    Time one miner in a child process; returns (wall seconds, requests served, peak MB, results).
+    Raises RuntimeError when the child dies, fails or is still running after timeout seconds.
+    """
+    before = sum(server.stats.values())
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    child = ctx.Process(target=_child, args=(miner, repo, source_files, results))
+    child.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                wall, peak, count = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not child.is_alive():
+                    # it may have reported just before exiting
+                    try:
+                        wall, peak, count = results.get(timeout=1)
+                        break
+                    except queue.Empty:
+                        raise RuntimeError(f"exited with code {child.exitcode} without a result")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"still running after {timeout}s")
+        child.join(timeout=60)
+        if child.exitcode != 0:
+            raise RuntimeError(f"exited with code {child.exitcode}")
+    finally:
+        if child.is_alive():
+            child.terminate()
+            child.join()
+    return wall, sum(server.stats.values()) - before, peak, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the miners against a local mock GitHub API.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--miners", nargs="+", choices=MINERS, default=MINERS)
+    parser.add_argument("--files-per-commit", type=int, default=3)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--authors", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    parser.add_argument("--rate-limit", type=int, help="requests per token per window")
+    parser.add_argument("--reset-seconds", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 502")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="seconds before a miner is stopped")
+    args = parser.parse_args(argv)
+
+    print(f"{'miner':<22} {'commits':>8} {'wall s':>8} {'requests':>9} {'req/s':>8} {'peak MB':>8} {'results':>8}")
+    for size in args.sizes:
+        repo = SyntheticRepo(f"mock/bench-{size}", size, args.files_per_commit, args.files, args.authors)
+        repo.by_path()  # build the path index before timing anything
+        source_files = [repo.filename(k) for k in range(args.files)
+                        if repo.filename(k).endswith((".java", ".kt", ".kts"))]
+
+        with MockGitHubServer([repo], args.latency, args.rate_limit, args.reset_seconds,
+                              args.error_rate) as server:
+            os.environ["GITHUB_API_URL"] = server.url  # inherited by the child processes
+            for miner in args.miners:
+                try:
+                    wall, requests, peak, count = benchmark(miner, server, repo.name, source_files, args.timeout)
+                except RuntimeError as e:
+                    print(f"{miner:<22} {size:>8} failed: {e}", flush=True)
+                    continue
+                peak = f"{peak:8.1f}" if peak is not None else f"{'n/a':>8}"
+                print(f"{miner:<22} {size:>8} {wall:>8.2f} {requests:>9} {requests / wall:>8.0f} {peak} {count:>8}",
+                      flush=True)
+
+
+if __name__ == "__main__":
+    main()
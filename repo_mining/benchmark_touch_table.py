@@ -0,0 +1,71 @@
+import argparse
+import gc
+import tracemalloc
+
+from mock_github import SyntheticRepo
+from touch_table import TouchTable
+
+# Configurations
+N_COMMITS = 100_000
+FILES_PER_COMMIT = 10
+N_FILES = 20_000
+
+
+# Touch rows the way the miners produce them: every commit's JSON is parsed
+# separately, so each row has its own copies of the strings
+def iter_rows(repo):
+    for i in range(repo.n_commits):
+        summary = repo.summary(i)
+        author = summary["commit"]["author"]
+        login = (summary["author"] or {}).get("login")
+        for filename in repo.files_of(i):
+            yield {
+                "filename": "".join(filename),  # a fresh string, as json.loads would give
+                "sha": "".join(summary["sha"]),
+                "author_login": login,
+                "author_name": author["name"],
+                "author_email": author["email"],
+                "date_iso": author["date"],
+            }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory per touch: list of dicts vs TouchTable.")
+    parser.add_argument("--commits", type=int, default=N_COMMITS)
+    parser.add_argument("--files-per-commit", type=int, default=FILES_PER_COMMIT)
+    parser.add_argument("--files", type=int, default=N_FILES)
+    args = parser.parse_args(argv)
+
+    repo = SyntheticRepo("mock/touches", args.commits, args.files_per_commit, args.files)
+
+    rows, rows_size = measure(lambda: list(iter_rows(repo)))
+    n = len(rows)
+    del rows
+
+    def build_table():
+        table = TouchTable()
+        for r in iter_rows(repo):
+            table.add(r)
+        return table
+
+    table, table_size = measure(build_table)
+    # the table must give back exactly the rows it was given
+    assert all(a == b for a, b in zip(table, iter_rows(repo)))
+
+    print(f"{n} touches")
+    print(f"list of dicts : {rows_size / n:7.1f} bytes/touch  ({rows_size / 2**20:.0f} MB)")
+    print(f"TouchTable    : {table_size / n:7.1f} bytes/touch  ({table_size / 2**20:.0f} MB)")
+    print(f"reduction     : {rows_size / table_size:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
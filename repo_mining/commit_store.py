@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Shared by every miner, whatever directory it is run from
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", ".commit_store")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# After an eviction the store is brought down to this fraction of max_bytes
+EVICT_TO = 0.9
+
+
+class CommitStore:
+    """
+    Local store of /commits/{sha} details, gzip-compressed and keyed by repo and SHA.
+
+    A commit's details never change, so an entry never needs revalidating. The
+    total size on disk is tracked and, once it passes max_bytes, the least
+    recently used entries (by file mtime, refreshed on every hit) are evicted.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None  # computed on first write
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, repo, sha):
+        return os.path.join(self.root, repo.replace("/", "__"), sha[:2], sha + ".json.gz")
+
+    def get(self, repo, sha):
+        """Return the stored details of a commit, or None."""
+        path = self.path(repo, sha)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                details = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return details
+
+    def put(self, repo, sha, details):
+        path = self.path(repo, sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(details, separators=(",", ":")).encode("utf-8"))
+        size = os.path.getsize(tmp_path)
+
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self.total_bytes = self._total_bytes() + size - old_size
+            if self.total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * EVICT_TO))
+
+    def size(self):
+        """Bytes used on disk and number of stored commits."""
+        with self.lock:
+            entries = self._entries()
+            self.total_bytes = sum(size for _, size, _ in entries)
+            return self.total_bytes, len(entries)
+
+    def evict(self, target_bytes):
+        with self.lock:
+            self._evict(target_bytes)
+
+    def _total_bytes(self):
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, size, _ in self._entries())
+        return self.total_bytes
+
+    def _entries(self):
+        return cache_entries(self.root)
+
+    def _evict(self, target_bytes):
+        self.total_bytes = evict_lru(self.root, target_bytes)
+
+
+# (path, size, mtime) of every .json.gz entry under root
+def cache_entries(root):
+    entries = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith(".json.gz"):
+                st = os.stat(os.path.join(dirpath, name))
+                entries.append((os.path.join(dirpath, name), st.st_size, st.st_mtime))
+    return entries
+
+
+# Remove the least recently used entries under root until they fit in target_bytes
+# Returns the bytes left
+def evict_lru(root, target_bytes):
+    entries = sorted(cache_entries(root), key=lambda e: e[2])  # least recently used first
+    total = sum(size for _, size, _ in entries)
+    for path, size, _ in entries:
+        if total <= target_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    return total
+
+
+if __name__ == "__main__":
+    store = CommitStore()
+    start = time.perf_counter()
+    total_bytes, count = store.size()
+    print(f"{store.root}: {count} commits, {total_bytes / 1024 / 1024:.1f} MB "
+          f"(limit {store.max_bytes / 1024 / 1024:.0f} MB, scanned in {time.perf_counter() - start:.2f}s)")
@@ -0,0 +1,85 @@
+import json
+import os
+
+
+# Where the journal of an output CSV is kept: data/file_rootbeer.csv -> data/file_rootbeer.journal.jsonl
+def journal_path(output_csv):
+    return os.path.splitext(output_csv)[0] + ".journal.jsonl"
+
+
+class CrawlJournal:
+    """
+    Append-only record of a crawl in progress, one JSON object per line:
+
+        {"newest": {"sha": ..., "date": ...}}  first commit of the crawl (its watermark)
+        {"sha": ..., "files": [...]}           a commit and the files it was counted for
+        {"page": N}                            every commit of listing page N was recorded
+
+    If the crawl dies, the next run replays the journal: counts are rebuilt from
+    the recorded commits without any request, the crawl restarts after the last
+    finished page and recorded commits are skipped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.newest = None
+        self.shas = set()
+        self.commits = []  # (sha, files) in the order they were recorded
+        self.last_page = 0
+
+        if os.path.exists(path):
+            self._replay()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _replay(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn last line from a crash
+                if "newest" in entry:
+                    self.newest = entry["newest"]
+                elif "sha" in entry:
+                    if entry["sha"] not in self.shas:
+                        self.shas.add(entry["sha"])
+                        self.commits.append((entry["sha"], entry["files"]))
+                elif "page" in entry:
+                    self.last_page = max(self.last_page, entry["page"])
+
+    def resuming(self):
+        return bool(self.commits or self.last_page)
+
+    def replay_counts(self, dictfiles):
+        """Add the touch counts of the recorded commits to dictfiles."""
+        for _, files in self.commits:
+            for filename in files:
+                dictfiles[filename] = dictfiles.get(filename, 0) + 1
+
+    def record_newest(self, watermark):
+        if self.newest is None:
+            self.newest = watermark
+            self._append({"newest": watermark})
+
+    def record_commit(self, sha, files):
+        self.shas.add(sha)
+        self._append({"sha": sha, "files": files})
+
+    def record_page(self, ipage):
+        self.last_page = max(self.last_page, ipage)
+        self._append({"page": ipage})
+        os.fsync(self.file.fileno())
+
+    def _append(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def finish(self):
+        """The crawl completed and its output was written: the journal is no longer needed."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
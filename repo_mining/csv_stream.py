@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import os
+
+# Rows written between two flushes to disk
+DEFAULT_FLUSH_EVERY = 1000
+
+# Size of the write buffer in front of the file
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class CsvStreamWriter:
+    """
+    Writes CSV rows to disk as they are produced instead of collecting them first.
+
+    Rows go through a buffered writer and are flushed every flush_every rows, so
+    memory stays flat however long the history is, and a crash only loses the
+    last unflushed rows. A path ending in .gz (or compress=True) is gzip-compressed.
+    """
+
+    def __init__(self, path, header, compress=None, flush_every=DEFAULT_FLUSH_EVERY,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        if compress is None:
+            compress = path.endswith(".gz")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self.flush_every = flush_every
+        self.rows_written = 0
+        raw = open(path, "wb", buffering=buffer_size)
+        binary = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+        self.raw = raw
+        self.binary = binary
+        self.file = io.TextIOWrapper(binary, encoding="utf-8", newline="", write_through=False)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        self.file.flush()
+        if self.binary is not self.raw:
+            self.binary.flush()
+        self.raw.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.close()  # closes the gzip stream too
+        if not self.raw.closed:
+            self.raw.close()
@@ -0,0 +1,188 @@
+import argparse
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from async_fetch import crawl_commit_details, API_URL, DEFAULT_CONCURRENCY
+from github_api import github_auth, github_request, last_page
+from mining_backends import write_file_counts_csv
+from RichardSserunjogi_CollectFiles import get_repo_languages, output_csv_for
+from source_classifier import classifier_for
+from watermark import watermark_of
+
+# Configurations
+LIFETIME_START = "1970-01-01T00:00:00Z"  # no repo has commits before this; empty windows cost one request
+MAX_COMMITS = 1000   # windows holding more commits than this are split in two
+PARALLEL_WINDOWS = 4  # windows crawled at the same time
+PER_PAGE = 100
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# put your tokens here
+# Remember to empty the list when going to commit to GitHub.
+lstTokens = [""]
+
+
+def parse_date(date):
+    return datetime.datetime.strptime(date, DATE_FORMAT).replace(tzinfo=datetime.timezone.utc)
+
+
+def format_date(date):
+    return date.strftime(DATE_FORMAT)
+
+
+# Split [since, until] into windows of at most max_commits commits each
+# @since, @until, ISO 8601 dates bounding the part of the history to crawl (until=None: now)
+# Returns [(since, until, pages)] newest window first; empty windows are dropped
+def plan_windows(repo, lsttokens, since=LIFETIME_START, until=None, max_commits=MAX_COMMITS,
+                 concurrency=DEFAULT_CONCURRENCY):
+    """
+    Adaptive bisection: the first listing page of each window tells (through
+    its Link header) how many pages the window has. Windows that are too big
+    are cut in half at their middle second and probed again, a level at a time
+    with the probes of a level running in parallel.
+    """
+    until = until or format_date(datetime.datetime.now(datetime.timezone.utc))
+    max_pages = max(1, max_commits // PER_PAGE)
+    windows = []
+    level = [(since, until)]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while level:
+            probes = executor.map(lambda window: _count_pages(repo, lsttokens, *window), level)
+            next_level = []
+            for (start, end), pages in zip(level, probes):
+                if pages == 0:
+                    continue
+                first, last = parse_date(start), parse_date(end)
+                # a window can hold more commits than allowed only if they share one second
+                if pages <= max_pages or (last - first).total_seconds() <= 1:
+                    windows.append((start, end, pages))
+                    continue
+                middle = first + (last - first) / 2
+                middle = middle.replace(microsecond=0)
+                next_level.append((start, format_date(middle)))
+                next_level.append((format_date(middle + datetime.timedelta(seconds=1)), end))
+            level = next_level
+
+    # newest window first, like the commits listing
+    return sorted(windows, key=lambda window: window[0], reverse=True)
+
+
+def _count_pages(repo, lsttokens, since, until):
+    url = f"{API_URL}/repos/{repo}/commits?page=1&per_page={PER_PAGE}&since={since}&until={until}"
+    jsonCommits, headers = github_request(url, lsttokens)
+    # a failed probe is not an empty window: its commits would silently go uncounted
+    if not isinstance(jsonCommits, list):
+        raise RuntimeError(f"could not list the commits of {repo} from {since} to {until}: {jsonCommits!r}")
+    if not jsonCommits:
+        return 0
+    return last_page(headers.get("Link")) or 1
+
+
+# Crawl the commit details of every window, several windows at a time
+# @on_commit, called as on_commit(sha, filenames) once per commit, newest window first
+# Returns the watermark of the newest commit crawled (None if there was none)
+def crawl_windows(repo, lsttokens, windows, on_commit, parallel=PARALLEL_WINDOWS,
+                  concurrency=DEFAULT_CONCURRENCY):
+    """
+    GitHub's since and until are both inclusive, so a commit made on the very
+    second two windows meet is listed by both: only its first sighting is
+    handed to on_commit. Windows finish in any order but are handed over in
+    plan order, so callers see the history newest first as with page crawling.
+    Until then a window only keeps the SHA and file names of its commits.
+    """
+    parallel = max(1, min(parallel, len(windows)))
+    per_window = max(1, concurrency // parallel)
+    done = {}
+    next_window = 0
+    seen = set()
+
+    newest = []
+
+    def crawl(window):
+        commits = []
+        first = []  # watermark of the window's newest commit
+        since, until, _ = window
+
+        def keep(shaObject, shaDetails):
+            if not first:
+                first.append(watermark_of(shaObject))
+            commits.append((shaObject['sha'], [f['filename'] for f in shaDetails['files']]))
+
+        crawl_commit_details(repo, lsttokens, github_auth, keep,
+                             concurrency=per_window, since=since, until=until)
+        return first, commits
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = {executor.submit(crawl, window): i for i, window in enumerate(windows)}
+        for future in as_completed(futures):
+            done[futures[future]] = future.result()
+            while next_window in done:
+                first, commits = done.pop(next_window)
+                if not newest:
+                    newest.extend(first)
+                for sha, filenames in commits:
+                    if sha not in seen:
+                        seen.add(sha)
+                        on_commit(sha, filenames)
+                next_window += 1
+    return newest[0] if newest else None
+
+
+# countfiles over a date range, crawled window by window
+# @dictFiles, dictionary of files receiving the touch counts
+# @lstTokens, GitHub authentication tokens
+# @repo, GitHub repo
+# @since, @until, ISO 8601 dates bounding the range to mine
+# @newest, optional dict that receives the watermark of the newest commit crawled
+def countfiles_by_date(dictfiles, lsttokens, repo, since=LIFETIME_START, until=None,
+                       max_commits=MAX_COMMITS, parallel=PARALLEL_WINDOWS,
+                       concurrency=DEFAULT_CONCURRENCY, newest=None):
+    languages = get_repo_languages(repo, lsttokens)
+    print("Detected languages:", languages)
+    is_source = classifier_for(languages)
+
+    windows = plan_windows(repo, lsttokens, since, until, max_commits, concurrency)
+    print(f"{len(windows)} windows of at most {max_commits} commits")
+
+    def count_commit(sha, filenames):
+        for filename in filenames:
+            if filename and is_source(filename):
+                dictfiles[filename] = dictfiles.get(filename, 0) + 1
+
+    watermark = crawl_windows(repo, lsttokens, windows, count_commit, parallel, concurrency)
+    if newest is not None and watermark:
+        newest.update(watermark)
+    return windows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count source file touches by crawling date windows in parallel.")
+    parser.add_argument("repo")
+    parser.add_argument("--since", default=LIFETIME_START, help="e.g. 2021-01-01T00:00:00Z")
+    parser.add_argument("--until", help="default: now")
+    parser.add_argument("--max-commits", type=int, default=MAX_COMMITS, help="commits per window")
+    parser.add_argument("--parallel", type=int, default=PARALLEL_WINDOWS, help="windows crawled at once")
+    parser.add_argument("--out", help="default: data/file_<repo>.csv, or a name with the range when one is given")
+    args = parser.parse_args(argv)
+
+    output_csv = args.out or output_csv_for(args.repo)
+    whole_history = args.since == LIFETIME_START and not args.until
+    if not args.out and not whole_history:
+        # a partial range does not overwrite the output of the whole history
+        suffix = "_" + args.since[:10] + "_" + (args.until or "now")[:10]
+        output_csv = os.path.splitext(output_csv)[0] + suffix + ".csv"
+
+    dictfiles = {}
+    newest = {}
+    countfiles_by_date(dictfiles, lstTokens, args.repo, args.since, args.until, args.max_commits, args.parallel,
+                       newest=newest)
+
+    # the counts of the whole history continue from its newest commit in
+    # RichardSserunjogi_CollectFiles.py; a partial range has no watermark
+    write_file_counts_csv(output_csv, dictfiles, newest if whole_history else None)
+    print(f"{len(dictfiles)} files written to {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Configurations
+MANIFEST = "data/figures/.build.json"  # input hash of every figure, as last built
+WORKERS = os.cpu_count() or 1
+
+
+class FigureJob:
+    """
+    One figure to build: render(output, **inputs, **params) must be a
+    module-level function that draws and saves the figure at output. inputs
+    hold the data (DataFrames, Series, arrays, lists) and params the
+    settings, and helpers the modules (or functions) render draws with;
+    together with the source code of render and its helpers they decide
+    whether the figure has to be built again.
+    """
+
+    def __init__(self, output, render, inputs=None, params=None, helpers=()):
+        self.output = output
+        self.render = render
+        self.inputs = inputs or {}
+        self.params = params or {}
+        self.helpers = tuple(helpers)
+
+    def key(self):
+        digest = hashlib.sha256()
+        for code in (self.render,) + self.helpers:
+            try:
+                digest.update(inspect.getsource(code).encode())
+            except (OSError, TypeError):
+                digest.update(code.__name__.encode())
+        for name in sorted(self.inputs):
+            digest.update(name.encode())
+            _hash_value(digest, self.inputs[name])
+        digest.update(json.dumps(self.params, sort_keys=True, default=repr).encode())
+        return digest.hexdigest()
+
+
+def _hash_value(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def _headless():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+# (takes the parts of the job the worker needs: helpers may be modules, which do not pickle)
+def _render(render, output, inputs, params):
+    render(output, **inputs, **params)
+    return output
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# @jobs, FigureJobs, each with its own output
+# @force, build every figure even when it is up to date
+def build_figures(jobs, manifest_path=MANIFEST, workers=WORKERS, force=False):
+    """
+    Build the figures whose inputs, parameters or render code changed since
+    the last build (or whose file is gone), in a pool of worker processes on
+    the Agg backend. Returns {output: "built" | "skipped" | "failed: <error>"}.
+    """
+    manifest = _load_manifest(manifest_path)
+    keys = {job.output: job.key() for job in jobs}
+    todo = [job for job in jobs
+            if force or manifest.get(job.output) != keys[job.output] or not os.path.exists(job.output)]
+    status = {job.output: "skipped" for job in jobs}
+    for job in todo:
+        os.makedirs(os.path.dirname(job.output) or ".", exist_ok=True)
+
+    def done(job, error=None):
+        if error is None:
+            status[job.output] = "built"
+            manifest[job.output] = keys[job.output]
+        else:
+            status[job.output] = f"failed: {error!r}"
+            manifest.pop(job.output, None)
+
+    if len(todo) <= 1 or workers <= 1:
+        # a worker process costs more than drawing a single figure here
+        _headless()
+        for job in todo:
+            try:
+                _render(job.render, job.output, job.inputs, job.params)
+                done(job)
+            except Exception as e:
+                done(job, e)
+    else:
+        # spawned, not forked: the parent may already hold a GUI backend or threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(min(workers, len(todo)), mp_context=context, initializer=_headless) as pool:
+            futures = [(job, pool.submit(_render, job.render, job.output, job.inputs, job.params)) for job in todo]
+            for job, future in futures:
+                try:
+                    future.result()
+                    done(job)
+                except Exception as e:
+                    done(job, e)
+    _save_manifest(manifest_path, manifest)
+    return status
+
+
+def print_build(status, started):
+    for output, state in status.items():
+        print(f"{state:8s} {output}")
+    states = [state.split(":")[0] for state in status.values()]
+    print(f"{states.count('built')} built, {states.count('skipped')} up to date, "
+          f"{states.count('failed')} failed in {time.perf_counter() - started:.1f}s")
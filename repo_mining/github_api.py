@@ -0,0 +1,231 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from commit_store import CommitStore
+from response_cache import ResponseCache
+from token_pool import TokenPool, TokenShare
+
+# The miners build their URLs on the public API; GITHUB_API_URL sends them somewhere else
+# (e.g. a mock_github server for benchmarks)
+GITHUB_API = "https://api.github.com"
+api_url = os.environ.get("GITHUB_API_URL", GITHUB_API).rstrip("/")
+
+# /repos/{owner}/{repo}/commits/{sha}: immutable, so answered from the commit store when possible
+COMMIT_DETAIL_URL = re.compile(r"/repos/([^/]+/[^/?]+)/commits/([0-9a-f]{40})$")
+
+# <...commits?page=34&per_page=100>; rel="last"
+LAST_PAGE_LINK = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+# Store used by github_auth for commit details (None disables it)
+commit_store = CommitStore()
+
+# Conditional-request cache used by github_auth for every other URL (None disables it)
+response_cache = ResponseCache()
+
+# Transient failures (connection errors, timeouts, 5xx) are retried with exponential backoff
+MAX_RETRIES = 8
+BACKOFF_BASE = 1.0   # seconds before the first retry
+BACKOFF_MAX = 120.0  # longest wait between two attempts
+SECONDARY_LIMIT_WAIT = 60  # seconds a token is parked after a secondary rate limit without Retry-After
+
+# Shared keep-alive HTTP client: connections (and their TLS sessions) are reused between requests
+POOL_SIZE = 16         # connections kept open per host; grown to the crawl concurrency by async_fetch
+CONNECT_TIMEOUT = 10   # seconds to establish a connection
+READ_TIMEOUT = 60      # seconds without a byte from the server before giving up on a response
+_session = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+# One token pool per list of tokens, shared by every caller of github_auth
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_token_pool(lsttoken):
+    """Return the TokenPool tracking the budget of these tokens (lsttoken may already be a pool or a share)."""
+    if isinstance(lsttoken, (TokenPool, TokenShare)):
+        return lsttoken
+    key = tuple(lsttoken)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = TokenPool(lsttoken)
+        return pool
+
+
+def use_commit_store(store):
+    """Replace the commit store used by github_auth; pass None to always go to the network."""
+    global commit_store
+    commit_store = store
+
+
+def use_response_cache(cache):
+    """Replace the ETag / Last-Modified cache used by github_auth; pass None to disable it."""
+    global response_cache
+    response_cache = cache
+
+
+def use_api_url(url):
+    """Send the requests made to https://api.github.com to another server instead."""
+    global api_url
+    api_url = url.rstrip("/")
+
+
+def http_session(pool_size=None):
+    """
+    Return the requests.Session shared by every github_auth call, creating it on
+    first use. Passing a pool_size larger than the current one rebuilds the
+    connection pool so that many threads can each keep a connection alive.
+    """
+    global _session, _session_pool_size
+    pool_size = max(pool_size or 0, POOL_SIZE)
+    with _session_lock:
+        if _session is None or pool_size > _session_pool_size:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = _session if _session is not None else requests.Session()
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            # retries are handled by github_request, not by urllib3
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session, _session_pool_size = session, pool_size
+        return _session
+
+
+# GitHub Authentication function
+# @ct is kept for compatibility with the old round-robin callers; the pool picks the token
+def github_auth(url, lsttoken, ct):
+    jsonData, _ = github_request(url, lsttoken)
+    return jsonData, ct + 1
+
+
+# Same as github_auth, but also returns the response headers (e.g. for the Link header)
+# Raises GitHubError when GitHub still answers with an error once the retries are used up
+def github_request(url, lsttoken):
+    if api_url != GITHUB_API and url.startswith(GITHUB_API):
+        url = api_url + url[len(GITHUB_API):]
+    store = commit_store
+    commit = COMMIT_DETAIL_URL.search(url) if store is not None else None
+    if commit:
+        jsonData = store.get(*commit.groups())
+        if jsonData is not None:
+            return jsonData, {}
+
+    cache = response_cache if not commit else None
+    cached = cache.get(url) if cache is not None else None
+
+    # imported here so that importing the miners does not pay for requests
+    import requests
+
+    session = http_session()
+    pool = get_token_pool(lsttoken)
+    attempt = 0
+    revalidated = False
+    while True:
+        token = pool.acquire()
+        headers = {'Authorization': 'Bearer {}'.format(token)} if token else {}
+        if cache is not None:
+            headers.update(cache.conditional_headers(cached))
+        try:
+            request = session.get(url, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= MAX_RETRIES:
+                raise GitHubError(url, None, repr(e)) from e
+            attempt = backoff(attempt, url, e)
+            continue
+        responseHeaders = request.headers
+        pool.update(token, request.headers)
+        # out of budget: park this token and retry with another one
+        if is_rate_limited(request):
+            pool.exhaust(token, rate_limit_reset(request))
+            continue
+        # GitHub hiccup: wait and try again
+        if request.status_code >= 500:
+            if attempt >= MAX_RETRIES:
+                raise GitHubError(url, request.status_code, error_message(request))
+            attempt = backoff(attempt, url, f"HTTP {request.status_code}")
+            continue
+        if request.status_code == 304:
+            if cached is None:
+                # nothing cached to revalidate (e.g. it was evicted meanwhile): ask once more, unconditionally
+                if revalidated:
+                    raise GitHubError(url, 304, "Not Modified without a cached copy")
+                revalidated = True
+                continue
+            # unchanged since the cached copy (and free of charge)
+            cache.hit()
+            jsonData = json.loads(cached["body"])
+            if cached.get("link") and "Link" not in responseHeaders:
+                responseHeaders["Link"] = cached["link"]
+            return jsonData, responseHeaders
+        if request.status_code >= 400:
+            raise GitHubError(url, request.status_code, error_message(request))
+        jsonData = json.loads(request.content)
+        break
+    if commit and "files" in jsonData:
+        store.put(*commit.groups(), jsonData)
+    elif cache is not None:
+        cache.put(url, request)
+    return jsonData, responseHeaders
+
+
+class GitHubError(Exception):
+    """A request GitHub answered with an error status (or not at all) after every retry."""
+
+    def __init__(self, url, status, message):
+        super().__init__(f"{'HTTP ' + str(status) if status else 'no response'} for {url}: {message}")
+        self.url = url
+        self.status = status
+
+
+def error_message(response):
+    try:
+        return response.json().get("message", "")
+    except (ValueError, AttributeError):
+        return response.text[:200]
+
+
+def last_page(link_header):
+    """Page number of the rel="last" entry of a Link header, or None."""
+    if not link_header:
+        return None
+    match = LAST_PAGE_LINK.search(link_header)
+    return int(match.group(1)) if match else None
+
+
+def backoff(attempt, url, reason):
+    """Sleep before retry number attempt + 1 and return the new attempt count."""
+    wait = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+    print(f"{reason} for {url}, retrying in {wait:.1f}s")
+    time.sleep(wait)
+    return attempt + 1
+
+
+# Primary limit (no budget left), Retry-After, or a secondary (abuse) limit, which
+# GitHub only reports in the message: "You have exceeded a secondary rate limit"
+def is_rate_limited(response):
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    return (response.headers.get("X-RateLimit-Remaining") == "0"
+            or "Retry-After" in response.headers
+            or "rate limit" in error_message(response).lower())
+
+
+def rate_limit_reset(response):
+    """Epoch time at which a rate-limited response says the token can be used again."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        return time.time() + int(retry_after)
+    reset = response.headers.get("X-RateLimit-Reset")
+    if response.headers.get("X-RateLimit-Remaining") == "0" and reset is not None:
+        return float(reset)
+    # a secondary limit without Retry-After: GitHub asks to wait at least a minute
+    return time.time() + SECONDARY_LIMIT_WAIT
@@ -0,0 +1,78 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from async_fetch import DEFAULT_CONCURRENCY
+from github_api import get_token_pool
+from RichardSserunjogi_CollectFiles import mine_repo, output_csv_for
+
+# Configurations
+# The repos the CollectFiles scripts used to keep as commented-out alternatives
+REPOS = [
+    'scottyab/rootbeer',
+    'Skyscanner/backpack',
+    'k9mail/k-9',
+    'mendhak/gpslogger',
+]
+
+# put your tokens here; every repo draws from the same budget
+# Remember to empty the list when going to commit to GitHub.
+lstTokens = [""]
+
+WORKERS = 4  # repos mined at the same time
+
+
+# Mine several repos at once, each into its own data/file_<name>.csv
+# @repos, GitHub repos ("owner/name")
+# @lstTokens, GitHub authentication tokens shared by all the repos
+# @workers, number of repos crawled at the same time
+# @concurrency, requests in flight across all the repos being crawled
+# Returns {repo: number of files} for the repos that finished
+def mine_repos(repos, lstTokens, out_dir="data", workers=WORKERS, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Every repo runs the incremental, resumable countfiles crawl of
+    RichardSserunjogi_CollectFiles with its own output CSV, watermark and
+    journal. The repos take shares of one TokenPool: the rate-limit budget is
+    common, and when requests queue up for it the repo that got the fewest so
+    far is served first. A repo that fails keeps its journal and is simply
+    resumed by the next run; the other repos carry on.
+    """
+    pool = get_token_pool(lstTokens)
+    workers = max(1, min(workers, len(repos)))
+    per_repo = max(1, concurrency // workers)
+
+    def mine(repo):
+        start = time.perf_counter()
+        dictfiles = mine_repo(repo, pool.share(repo), output_csv_for(repo, out_dir), concurrency=per_repo)
+        return len(dictfiles), time.perf_counter() - start
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(mine, repo): repo for repo in repos}
+        for future in as_completed(futures):
+            repo = futures[future]
+            try:
+                nfiles, seconds = future.result()
+            except (Exception, SystemExit) as e:  # countfiles exits with SystemExit on errors
+                print(f"{repo}: failed ({e!r}); run again to resume it")
+                continue
+            results[repo] = nfiles
+            print(f"{repo}: {nfiles} files written to {output_csv_for(repo, out_dir)} in {seconds:.0f}s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mine the file touches of several GitHub repos at once.")
+    parser.add_argument("repos", nargs="*", default=REPOS, help="owner/name of the repos (default: REPOS)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="repos crawled at the same time")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests in flight across all repos")
+    parser.add_argument("--out-dir", default="data")
+    args = parser.parse_args(argv)
+
+    results = mine_repos(args.repos, lstTokens, args.out_dir, args.workers, args.concurrency)
+    print(f"{len(results)}/{len(args.repos)} repos mined")
+
+
+if __name__ == "__main__":
+    main()
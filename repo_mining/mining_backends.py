@@ -0,0 +1,286 @@
+import argparse
+import collections
+import csv
+import os
+import subprocess
+import tempfile
+
+from async_fetch import crawl_commit_details, DEFAULT_CONCURRENCY
+from csv_stream import CsvStreamWriter
+from github_api import github_auth
+from source_classifier import SourceClassifier, EXCLUDED_DIRS, EXCLUDED_GLOBS
+from touch_table import TouchTable
+from watermark import reset_watermark
+
+# Column headers of the two CSVs every backend produces
+FILE_COUNTS_HEADER = ["Filename", "Touches"]
+TOUCHES_HEADER = ["Filename", "CommitSHA", "AuthorLogin", "AuthorName", "AuthorEmail", "CommitDate"]
+
+# The commit API lists at most 300 files per page and 3000 files in total
+COMMIT_FILES_PER_PAGE = 300
+COMMIT_FILES_LIMIT = 3000
+
+# One commit as seen by the miners, whatever backend it came from
+# @truncated, True when the backend could not list every file of the commit
+# @committed_iso, committer date, which the commits?since=&until= filters use (None when unknown)
+Commit = collections.namedtuple(
+    "Commit", ["sha", "author_login", "author_name", "author_email", "date_iso", "filenames", "truncated",
+               "committed_iso"],
+    defaults=(False, None))
+
+
+# Mines commits through the GitHub REST API (one request per commit)
+class GitHubBackend:
+    def __init__(self, repo, lsttokens, concurrency=DEFAULT_CONCURRENCY):
+        self.repo = repo
+        self.lsttokens = lsttokens
+        self.concurrency = concurrency
+
+    def crawl(self, on_commit):
+        def to_commit(shaObject, shaDetails):
+            authorObj = shaDetails.get("author") or {}
+            commitAuthor = (shaDetails.get("commit") or {}).get("author") or {}
+            commitCommitter = (shaDetails.get("commit") or {}).get("committer") or {}
+            filenames = [f["filename"] for f in shaDetails["files"]]
+            if len(filenames) == COMMIT_FILES_PER_PAGE:
+                filenames += self.more_filenames(shaDetails["sha"])
+            on_commit(Commit(
+                sha=shaDetails["sha"],
+                author_login=authorObj.get("login"),
+                author_name=commitAuthor.get("name"),
+                author_email=commitAuthor.get("email"),
+                date_iso=commitAuthor.get("date"),
+                filenames=filenames,
+                truncated=len(filenames) >= COMMIT_FILES_LIMIT,
+                committed_iso=commitCommitter.get("date"),
+            ))
+
+        crawl_commit_details(self.repo, self.lsttokens, github_auth, to_commit,
+                             concurrency=self.concurrency)
+
+    def more_filenames(self, sha):
+        """Files of a large commit beyond the first page of its details."""
+        filenames = []
+        for page in range(2, COMMIT_FILES_LIMIT // COMMIT_FILES_PER_PAGE + 1):
+            shaUrl = f"https://api.github.com/repos/{self.repo}/commits/{sha}?page={page}"
+            shaDetails, _ = github_auth(shaUrl, self.lsttokens, 0)
+            files = shaDetails["files"]
+            filenames += [f["filename"] for f in files]
+            if len(files) < COMMIT_FILES_PER_PAGE:
+                break
+        return filenames
+
+
+# Split the output of a git command run with -z into its NUL-terminated fields
+# @stream, binary stream of the command's output
+# Paths come out verbatim (no C quoting of tabs, quotes or non-ASCII characters);
+# bytes that are not UTF-8 are kept as surrogates, as os.fsdecode does
+def nul_fields(stream, chunk_size=1 << 16):
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        *fields, pending = (pending + chunk).split(b"\0")
+        for field in fields:
+            yield field.decode("utf-8", "surrogateescape")
+    if pending:
+        yield pending.decode("utf-8", "surrogateescape")
+
+
+# Mines commits from a local (possibly bare) clone with a single git log
+class LocalGitBackend:
+    # \x1e starts a commit header, \x1f separates its fields; with -z every header,
+    # status and path ends with a NUL
+    LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%ad%x1f%cd"
+
+    def __init__(self, repo_path, rev="HEAD"):
+        self.repo_path = repo_path
+        self.rev = rev
+
+    def crawl(self, on_commit):
+        """
+        Same commits and files as the GitHub API reports: every commit reachable
+        from rev, newest first, merges diffed against their first parent, renamed
+        files under their new name and dates in UTC ("2024-10-04T07:42:57Z").
+        GitHub logins are not known locally, so author_login is None.
+        """
+        cmd = ["git", "-C", self.repo_path, "log", "-z",
+               "--name-status", "--diff-merges=first-parent",
+               "--date=format-local:%Y-%m-%dT%H:%M:%SZ",
+               "--format=" + self.LOG_FORMAT, self.rev]
+        env = dict(os.environ, TZ="UTC")
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, env=env) as proc:
+            header = None
+            committed = None
+            filenames = []
+            fields = nul_fields(proc.stdout)
+            for field in fields:
+                field = field.lstrip("\n")
+                if field.startswith("\x1e"):
+                    if header is not None:
+                        on_commit(Commit(*header, filenames, committed_iso=committed))
+                    *header, committed = field[1:].split("\x1f")
+                    header.insert(1, None)  # no GitHub login in a local clone
+                    filenames = []
+                elif field:
+                    # "M", "D" or "A" is followed by the path, "R100" or "C75" by the
+                    # old and the new path: keep the current name
+                    path = next(fields)
+                    if field[0] in "RC":
+                        path = next(fields)
+                    filenames.append(path)
+            if header is not None:
+                on_commit(Commit(*header, filenames, committed_iso=committed))
+        if proc.returncode != 0:
+            raise RuntimeError(f"git log failed in {self.repo_path} (exit {proc.returncode})")
+
+
+# Build the touch counts and the author/date rows from one pass over a backend
+# @is_source, function deciding whether a filename is counted
+# @truncated, optional dict that receives {sha: committer date} of the commits whose file list was cut off
+# @on_touch, optional function receiving each row as it is found; rows are then not kept in memory
+# @newest, optional dict that receives the watermark ({"sha", "date"}) of the newest commit crawled
+# Returns (dictfiles, rows) where rows is a TouchTable (empty when on_touch is given)
+def mine_touches(backend, is_source, truncated=None, on_touch=None, newest=None):
+    dictfiles = {}
+    rows = TouchTable()
+    if on_touch is None:
+        on_touch = rows.add
+
+    def on_commit(commit):
+        if newest is not None and not newest:
+            # commits come newest first
+            newest.update(sha=commit.sha, date=commit.committed_iso or commit.date_iso)
+        if commit.truncated and truncated is not None:
+            truncated[commit.sha] = commit.committed_iso or commit.date_iso
+        for filename in commit.filenames:
+            if not filename or not is_source(filename):
+                continue
+            dictfiles[filename] = dictfiles.get(filename, 0) + 1
+            on_touch({
+                "filename": filename,
+                "sha": commit.sha,
+                "author_login": commit.author_login,
+                "author_name": commit.author_name,
+                "author_email": commit.author_email,
+                "date_iso": commit.date_iso,
+            })
+
+    backend.crawl(on_commit)
+    return dictfiles, rows
+
+
+# Write the Filename,Touches CSV
+# @newest, watermark of the newest commit the counts include; RichardSserunjogi_CollectFiles.py
+# continues from it (without it, that script counts the whole history again next time)
+def write_file_counts_csv(output_path, dictfiles, newest=None):
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    # written next to the output and renamed over it, so a crash never leaves half a CSV
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".csv")
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FILE_COUNTS_HEADER)
+        for filename, count in dictfiles.items():
+            writer.writerow([filename, count])
+    os.replace(tmp_path, output_path)
+    reset_watermark(output_path, newest or None)
+
+
+# Write the Filename,CommitSHA,AuthorLogin,AuthorName,AuthorEmail,CommitDate CSV
+# (rows may be any iterable, e.g. a generator, and a .gz path is compressed)
+def write_touches_csv(output_path, rows):
+    with open_touches_csv(output_path) as writer:
+        for r in rows:
+            writer.writerow(touch_row(r))
+
+
+# Streaming writer for the touches CSV: call writerow(touch_row(r)) as rows come in
+# @columnar, also write the rows as a touch_store next to the CSV (for fast loading)
+def open_touches_csv(output_path, columnar=False):
+    writer = CsvStreamWriter(output_path, TOUCHES_HEADER)
+    if not columnar:
+        return writer
+    # numpy is only needed by the miners that ask for the columnar copy
+    from touch_store import TouchStoreWriter, store_path
+    return TouchesWriter(writer, TouchStoreWriter(store_path(output_path)))
+
+
+class TouchesWriter:
+    """Sends every touches row to several writers (the CSV and its columnar copy)."""
+
+    def __init__(self, *writers):
+        self.writers = writers
+
+    @property
+    def rows_written(self):
+        return self.writers[0].rows_written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def writerow(self, row):
+        for writer in self.writers:
+            writer.writerow(row)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+
+def touch_row(r):
+    return [
+        r["filename"],
+        r["sha"],
+        r["author_login"],
+        r["author_name"],
+        r["author_email"],
+        r["date_iso"]
+    ]
+
+
+# @exclude_vendored, also reject vendored and generated code (see source_classifier.EXCLUDED_DIRS)
+def extension_filter(extensions, exclude_vendored=False):
+    """is_source function accepting filenames that end with one of extensions (all files if empty)."""
+    excluded = {"excluded_dirs": EXCLUDED_DIRS, "excluded_globs": EXCLUDED_GLOBS} if exclude_vendored else {}
+    if not extensions:
+        if not excluded:
+            return lambda filename: True
+        return SourceClassifier(globs=["*"], **excluded)
+    return SourceClassifier(extensions, **excluded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mine file touches from a local git clone.")
+    parser.add_argument("repo_path", help="path to a local (bare) clone")
+    parser.add_argument("--name", help="repo name used in the output file names (default: folder name)")
+    parser.add_argument("--ext", default=".java,.kt,.kts",
+                        help="comma-separated source file extensions, empty for all files")
+    parser.add_argument("--exclude-vendored", action="store_true",
+                        help="skip vendored and generated code (vendor/, gen/, generated/, ...)")
+    parser.add_argument("--rev", default="HEAD")
+    parser.add_argument("--out-dir", default="data")
+    parser.add_argument("--gzip", action="store_true", help="gzip the touches CSV")
+    parser.add_argument("--no-columnar", action="store_true",
+                        help="do not write the .touches columnar copy of the touches CSV")
+    args = parser.parse_args(argv)
+
+    name = args.name or os.path.basename(os.path.abspath(args.repo_path)).removesuffix(".git")
+    is_source = extension_filter([e for e in args.ext.split(",") if e], args.exclude_vendored)
+
+    counts_csv = os.path.join(args.out_dir, "file_" + name + ".csv")
+    touches_csv = os.path.join(args.out_dir, "file_touches_authors_dates_" + name + ".csv" + (".gz" if args.gzip else ""))
+
+    newest = {}
+    with open_touches_csv(touches_csv, columnar=not args.no_columnar) as writer:
+        dictfiles, _ = mine_touches(LocalGitBackend(args.repo_path, args.rev), is_source,
+                                    on_touch=lambda r: writer.writerow(touch_row(r)), newest=newest)
+    write_file_counts_csv(counts_csv, dictfiles, newest)
+    print(f"{len(dictfiles)} files, {writer.rows_written} touches written to {counts_csv} and {touches_csv}")
+
+
+if __name__ == "__main__":
+    main()
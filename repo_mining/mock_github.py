@@ -0,0 +1,260 @@
+import argparse
+import collections
+import datetime
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# File extensions of the synthetic files; only some of them are "source" files
+FILE_KINDS = [".java", ".kt", ".java", ".xml", ".md", ".kts", ".java", ".gradle"]
+
+
+class SyntheticRepo:
+    """
+    A fake repository whose commits are generated on demand from their index
+    (0 = newest), so even 100k commits cost almost no memory until asked for.
+    """
+
+    def __init__(self, name="mock/repo", commits=1000, files_per_commit=3, files=200, authors=10,
+                 start=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc), seed=0):
+        self.name = name
+        self.n_commits = commits
+        self.files_per_commit = files_per_commit
+        self.n_files = files
+        self.n_authors = authors
+        self.start = start
+        self.seed = seed
+        self.shas = [hashlib.sha1(f"{seed}:{name}:{i}".encode()).hexdigest() for i in range(commits)]
+        self.index = {sha: i for i, sha in enumerate(self.shas)}
+        self._by_path = None
+
+    def filename(self, k):
+        return f"app/src/main/java/com/example/pkg{k % 7}/File{k}{FILE_KINDS[k % len(FILE_KINDS)]}"
+
+    def files_of(self, i):
+        rng = random.Random(self.seed * 1000003 + i)
+        count = min(self.files_per_commit, self.n_files)
+        return [self.filename(k) for k in rng.sample(range(self.n_files), count)]
+
+    def date_of(self, i):
+        # one commit per hour, index 0 being the newest
+        date = self.start + datetime.timedelta(hours=self.n_commits - 1 - i)
+        return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def summary(self, i):
+        author = i % self.n_authors
+        person = {"name": f"Author {author}", "email": f"author{author}@example.com", "date": self.date_of(i)}
+        return {
+            "sha": self.shas[i],
+            "commit": {"author": person, "committer": person, "message": f"commit {i}"},
+            "author": {"login": f"author{author}"} if author % 4 else None,  # some authors have no GitHub account
+        }
+
+    def details(self, i):
+        body = self.summary(i)
+        body["files"] = [{"filename": f, "status": "modified"} for f in self.files_of(i)]
+        return body
+
+    def listing(self, since=None, path=None, until=None, sha=None):
+        """Indexes of the commits matching the commits?since=&until=&path=&sha= filters, newest first."""
+        if path is not None:
+            indexes = self.by_path().get(path, [])
+        else:
+            indexes = range(self.n_commits)
+        if sha is not None:
+            # the history of that commit: it and everything older
+            head = self.index.get(sha, self.n_commits)
+            indexes = [i for i in indexes if i >= head]
+        if since is not None:
+            indexes = [i for i in indexes if self.date_of(i) >= since]
+        if until is not None:
+            # both bounds are inclusive, as on GitHub
+            indexes = [i for i in indexes if self.date_of(i) <= until]
+        return indexes
+
+    def by_path(self):
+        if self._by_path is None:
+            by_path = collections.defaultdict(list)
+            for i in range(self.n_commits):
+                for f in self.files_of(i):
+                    by_path[f].append(i)
+            self._by_path = by_path
+        return self._by_path
+
+
+class MockGitHubServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the parts of api.github.com used by the miners:
+    /repos/{repo}/commits (page, per_page, since, until, path, sha), /repos/{repo}/commits/{sha}
+    and /repos/{repo}/languages. It can add latency, enforce a per-token rate limit
+    with GitHub's headers, answer conditional requests and inject 5xx errors.
+    link_header=False leaves the Link header out of the listing pages.
+    """
+    daemon_threads = True
+    request_queue_size = 256  # the default of 5 drops connections under concurrent load
+
+    def __init__(self, repos, latency=0.0, rate_limit=None, reset_seconds=3600, error_rate=0.0,
+                 link_header=True, host="127.0.0.1", port=0, seed=0):
+        super().__init__((host, port), _Handler)
+        self.repos = {repo.name: repo for repo in repos}
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.reset_seconds = reset_seconds
+        self.error_rate = error_rate
+        self.link_header = link_header
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.budgets = {}  # token -> [remaining, reset]
+        self.stats = collections.Counter()
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def charge(self, token):
+        """Take one request off token's budget; returns the rate-limit headers and whether it was allowed."""
+        if self.rate_limit is None:
+            return {}, True
+        now = time.time()
+        with self.lock:
+            budget = self.budgets.get(token)
+            if budget is None or budget[1] <= now:
+                budget = self.budgets[token] = [self.rate_limit, now + self.reset_seconds]
+            allowed = budget[0] > 0
+            if allowed:
+                budget[0] -= 1
+            headers = {"X-RateLimit-Limit": str(self.rate_limit),
+                       "X-RateLimit-Remaining": str(budget[0]),
+                       "X-RateLimit-Used": str(self.rate_limit - budget[0]),
+                       "X-RateLimit-Reset": str(int(budget[1]))}
+        return headers, allowed
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like api.github.com
+    # send headers and body in one segment; otherwise Nagle's algorithm and the
+    # client's delayed ACK add ~40 ms to every response on a kept-alive connection
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.should_fail():
+            return self.reply(502, {"message": "Server Error"})
+
+        token = self.headers.get("Authorization", "")
+        rate_headers, allowed = server.charge(token)
+        if not allowed:
+            return self.reply(403, {"message": "API rate limit exceeded"}, rate_headers)
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        if len(parts) < 4 or parts[0] != "repos" or f"{parts[1]}/{parts[2]}" not in server.repos:
+            return self.reply(404, {"message": "Not Found"}, rate_headers)
+        repo = server.repos[f"{parts[1]}/{parts[2]}"]
+
+        headers = dict(rate_headers)
+        if parts[3:] == ["languages"]:
+            body = {"Java": 100000, "Kotlin": 20000}
+        elif parts[3:] == ["commits"]:
+            body = self.commits_page(repo, query, url.path, headers)
+        elif len(parts) == 5 and parts[3] == "commits" and parts[4] in repo.index:
+            body = repo.details(repo.index[parts[4]])
+        else:
+            return self.reply(404, {"message": "Not Found"}, rate_headers)
+
+        content = json.dumps(body).encode()
+        etag = '"' + hashlib.md5(content).hexdigest() + '"'
+        headers["ETag"] = etag
+        if self.headers.get("If-None-Match") == etag:
+            server.stats[304] += 1
+            return self.send(304, b"", headers)
+        server.stats[200] += 1
+        self.send(200, content, headers)
+
+    def commits_page(self, repo, query, path, headers):
+        page = int(query.get("page", 1))
+        per_page = min(int(query.get("per_page", 30)), 100)
+        indexes = repo.listing(query.get("since"), query.get("path"), query.get("until"), query.get("sha"))
+        last = max((len(indexes) + per_page - 1) // per_page, 1)
+
+        # like GitHub, rel="next"/"last" are only sent while there are more pages
+        if page < last and self.server.link_header:
+            other = "&".join(f"{k}={v}" for k, v in query.items() if k != "page")
+            headers["Link"] = (f'<{self.server.url}{path}?page={page + 1}&{other}>; rel="next", '
+                               f'<{self.server.url}{path}?page={last}&{other}>; rel="last"')
+        start = (page - 1) * per_page
+        return [repo.summary(i) for i in indexes[start:start + per_page]]
+
+    def reply(self, status, body, headers=None):
+        self.server.stats[status] += 1
+        self.send(status, json.dumps(body).encode(), headers or {})
+
+    def send(self, status, content, headers):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a synthetic repository through a fake GitHub API.")
+    parser.add_argument("--repo", default="mock/repo")
+    parser.add_argument("--commits", type=int, default=1000)
+    parser.add_argument("--files-per-commit", type=int, default=3)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--authors", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    parser.add_argument("--rate-limit", type=int, help="requests per token per window")
+    parser.add_argument("--reset-seconds", type=int, default=3600)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 502")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    repo = SyntheticRepo(args.repo, args.commits, args.files_per_commit, args.files, args.authors)
+    server = MockGitHubServer([repo], args.latency, args.rate_limit, args.reset_seconds,
+                              args.error_rate, port=args.port)
+    print(f"Serving {args.repo} ({args.commits} commits) at {server.url}")
+    print(f"Point the miners at it with: export GITHUB_API_URL={server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,39 @@
-import json
-import requests
 import csv
 
 import os
 
+from async_fetch import crawl_commit_details, DEFAULT_CONCURRENCY
+from github_api import github_auth
+from source_classifier import SourceClassifier
+
 DATA_DIR = os.path.join("repo_mining", "data")
-if not os.path.exists(DATA_DIR):
- os.makedirs(DATA_DIR)
 
 # Only treat these as "source files" for scottyab/rootbeer
 SOURCE_FILE_EXT = (".java", ".kt", ".kts")
-
-# GitHub Authentication function
-def github_auth(url, lsttoken, ct):
-    jsonData = None
-    try:
-        ct = ct % len(lstTokens)
-        headers = {'Authorization': 'Bearer {}'.format(lsttoken[ct])}
-        request = requests.get(url, headers=headers)
-        jsonData = json.loads(request.content)
-        ct += 1
-    except Exception as e:
-        pass
-        print(e)
-    return jsonData, ct
+is_source = SourceClassifier(SOURCE_FILE_EXT)
 
 # @dictFiles, empty dictionary of files
 # @lstTokens, GitHub authentication tokens
 # @repo, GitHub repo
-def countfiles(dictfiles, lsttokens, repo):
-    ipage = 1  # url page counter
-    ct = 0  # token counter
+# @concurrency, number of commit-detail requests in flight at once
+def countfiles(dictfiles, lsttokens, repo, concurrency=DEFAULT_CONCURRENCY):
+    # called for each commit, in history order, once its details are downloaded
+    def count_commit(shaObject, shaDetails):
+        filesjson = shaDetails['files']
+        for filenameObj in filesjson:
+            filename = filenameObj['filename']
+            if not is_source(filename):
+                continue
+            dictfiles[filename] = dictfiles.get(filename, 0) + 1
+            print(filename)
 
     try:
-        # loop though all the commit pages until the last returned empty page
-        while True:
-            spage = str(ipage)
-            commitsUrl = 'https://api.github.com/repos/' + repo + '/commits?page=' + spage + '&per_page=100'
-            jsonCommits, ct = github_auth(commitsUrl, lsttokens, ct)
-
-            # break out of the while loop if there are no more commits in the pages
-            if len(jsonCommits) == 0:
-                break
-            # iterate through the list of commits in  spage
-            for shaObject in jsonCommits:
-                sha = shaObject['sha']
-                # For each commit, use the GitHub commit API to extract the files touched by the commit
-                shaUrl = 'https://api.github.com/repos/' + repo + '/commits/' + sha
-                shaDetails, ct = github_auth(shaUrl, lsttokens, ct)
-                filesjson = shaDetails['files']
-                for filenameObj in filesjson:
-                    filename = filenameObj['filename']
-                    if not filename.lower().endswith(SOURCE_FILE_EXT):
-                        continue
-                    dictfiles[filename] = dictfiles.get(filename, 0) + 1
-                    print(filename)
-            ipage += 1
-    except:
-        print("Error receiving data")
-        exit(0)
+        # loop though all the commit pages until the last returned empty page,
+        # fetching the commit details of each page in parallel
+        crawl_commit_details(repo, lsttokens, github_auth, count_commit, concurrency=concurrency)
+    except Exception as e:
+        print("Error receiving data:", repr(e))
+        raise
 # GitHub repo
 repo = 'scottyab/rootbeer'
 # repo = 'Skyscanner/backpack' # This repo is commit heavy. It takes long to finish executing
@@ -72,25 +47,33 @@ repo = 'scottyab/rootbeer'
 # I would advise to create more than one token for repos with heavy commits
 lstTokens = ["", ""]
 
-dictfiles = dict()
-countfiles(dictfiles, lstTokens, repo)
-print('Total number of files: ' + str(len(dictfiles)))
 
-file = repo.split('/')[1]
-# change this to the path of your file
-fileOutput = os.path.join(DATA_DIR, 'nevryk_file_' + file + '.csv')
-rows = ["Filename", "Touches"]
-fileCSV = open(fileOutput, 'w')
-writer = csv.writer(fileCSV)
-writer.writerow(rows)
+def main():
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    dictfiles = dict()
+    countfiles(dictfiles, lstTokens, repo)
+    print('Total number of files: ' + str(len(dictfiles)))
 
-bigcount = None
-bigfilename = None
-for filename, count in dictfiles.items():
-    rows = [filename, count]
+    file = repo.split('/')[1]
+    # change this to the path of your file
+    fileOutput = os.path.join(DATA_DIR, 'nevryk_file_' + file + '.csv')
+    rows = ["Filename", "Touches"]
+    fileCSV = open(fileOutput, 'w')
+    writer = csv.writer(fileCSV)
     writer.writerow(rows)
-    if bigcount is None or count > bigcount:
-        bigcount = count
-        bigfilename = filename
-fileCSV.close()
-print('The file ' + bigfilename + ' has been touched ' + str(bigcount) + ' times.')
+
+    bigcount = None
+    bigfilename = None
+    for filename, count in dictfiles.items():
+        rows = [filename, count]
+        writer.writerow(rows)
+        if bigcount is None or count > bigcount:
+            bigcount = count
+            bigfilename = filename
+    fileCSV.close()
+    print('The file ' + bigfilename + ' has been touched ' + str(bigcount) + ' times.')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,14 @@
 import csv
-import json
 import os
-import requests
+
+from github_api import github_auth
+from watermark import load_watermark, save_watermark, watermark_of, prepend_csv_rows
 
 REPO = "scottyab/rootbeer"
 SOURCE_FILES_CSV = "repo_mining/data/nevryk_file_rootbeer.csv"
 OUTPUT_CSV = "repo_mining/data/nevryk_file_touches_authors_dates.csv"
 
 
-def github_auth(url, lsttoken, ct):
-    jsonData = None
-    try:
-        ct = ct % len(lstTokens)
-        headers = {"Authorization": "Bearer {}".format(lsttoken[ct])}
-        request = requests.get(url, headers=headers)
-        jsonData = json.loads(request.content)
-        ct += 1
-    except Exception as e:
-        pass
-        print(e)
-    return jsonData, ct
-
-
 def load_source_files(path):
     source_files = set()
     with open(path, newline="", encoding="utf-8") as f:
@@ -35,23 +22,33 @@ def load_source_files(path):
     return source_files
 
 
-def collect_file_touches(repo, source_files, lstTokens):
+# Only commits newer than watermark (the newest commit of the last run) are collected.
+# Returns the rows and the watermark of the newest commit seen.
+def collect_file_touches(repo, source_files, lstTokens, watermark=None):
     ipage = 1
     ct = 0
     rows = []
+    newest = None
 
     while True:
         spage = str(ipage)
         commitsUrl = (
             "https://api.github.com/repos/" + repo + "/commits?page=" + spage + "&per_page=100"
         )
+        if watermark:
+            commitsUrl += "&since=" + watermark["date"]
         jsonCommits, ct = github_auth(commitsUrl, lstTokens, ct)
 
         if len(jsonCommits) == 0:
             break
+        if newest is None:
+            newest = watermark_of(jsonCommits[0])
 
         for shaObject in jsonCommits:
             sha = shaObject["sha"]
+            # already collected by the previous run
+            if watermark and sha == watermark["sha"]:
+                return rows, newest
             author = shaObject["commit"]["author"]["name"]
             date = shaObject["commit"]["author"]["date"]
 
@@ -67,7 +64,7 @@ def collect_file_touches(repo, source_files, lstTokens):
 
         ipage += 1
 
-    return rows
+    return rows, newest
 
 
 if __name__ == "__main__":
@@ -79,12 +76,18 @@ if __name__ == "__main__":
     lstTokens = [token]
 
     source_files = load_source_files(SOURCE_FILES_CSV)
-    touches = collect_file_touches(REPO, source_files, lstTokens)
-
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["filename", "author", "date"])
-        writer.writerows(touches)
+    watermark = load_watermark(OUTPUT_CSV)
+    touches, newest = collect_file_touches(REPO, source_files, lstTokens, watermark)
+
+    if watermark:
+        # new touches go on top of the ones already in the file
+        prepend_csv_rows(OUTPUT_CSV, ["filename", "author", "date"], touches)
+    else:
+        with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["filename", "author", "date"])
+            writer.writerows(touches)
+    save_watermark(OUTPUT_CSV, newest or watermark)
 
     print(f"File written to: {OUTPUT_CSV}")
-    print(f"Total author file touches: {len(touches)}")
+    print(f"New author file touches: {len(touches)}")
@@ -1,61 +1,44 @@
-import csv
 import os
-from datetime import datetime
 
 import matplotlib.pyplot as plt
+import pandas as pd
+
+from touch_csv import read_touch_csv
 
 INPUT_CSV = "repo_mining/data/nevryk_file_touches_authors_dates.csv"
 OUTPUT_PNG = "repo_mining/data/nevryk_weeks_vs_files.png"
 
 
-def parse_date(value):
-    return datetime.fromisoformat(value.replace("Z", "+00:00"))
-
-
 def load_touches(path):
-    rows = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if not row or row[0] == "filename":
-                continue
-            filename, author, date_str = row
-            rows.append((filename, author, parse_date(date_str)))
+    """The touches as a DataFrame: filename, author and date (UTC datetimes)."""
+    rows = read_touch_csv(path).dropna(subset=["date"])
+    # an author without a name is "" in the CSV, and is an author like any other
+    rows["author"] = rows["author"].fillna("")
     return rows
 
 
 def main():
     rows = load_touches(INPUT_CSV)
-    if not rows:
+    if rows.empty:
         print("No data found in", INPUT_CSV)
         return
 
-    start_date = min(r[2] for r in rows)
+    start_date = rows["date"].min()
 
-    file_to_idx = {}
-    author_to_color = {}
+    # files and authors numbered in order of first appearance
+    file_idx, files = pd.factorize(rows["filename"])
+    author_idx, authors = pd.factorize(rows["author"])
     color_cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+    author_colors = [color_cycle[i % len(color_cycle)] for i in range(len(authors))]
 
-    x_vals = []
-    y_vals = []
-    colors = []
-
-    for filename, author, dt in rows:
-        if filename not in file_to_idx:
-            file_to_idx[filename] = len(file_to_idx)
-
-        if author not in author_to_color:
-            author_to_color[author] = color_cycle[len(author_to_color) % len(color_cycle)]
-
-        week_index = (dt - start_date).days // 7
-        x_vals.append(week_index)
-        y_vals.append(file_to_idx[filename])
-        colors.append(author_to_color[author])
+    x_vals = (rows["date"] - start_date).dt.days // 7
+    y_vals = file_idx
+    colors = [author_colors[i] for i in author_idx]
 
     plt.figure(figsize=(12, 6))
     plt.scatter(x_vals, y_vals, c=colors, s=30, alpha=0.75)
 
-    file_labels = [os.path.basename(f) for f in file_to_idx.keys()]
+    file_labels = [os.path.basename(f) for f in files]
     plt.yticks(range(len(file_labels)), file_labels)
     plt.xlabel("Weeks since project start")
     plt.ylabel("File")
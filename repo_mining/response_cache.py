@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from commit_store import EVICT_TO, cache_entries, evict_lru
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", ".response_cache")
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds an entry may go unused before it is dropped
+
+
+class ResponseCache:
+    """
+    Cache of mutable GitHub responses (e.g. commits?page=N listings), keyed by URL.
+
+    Each entry keeps the ETag / Last-Modified validators with the body, so the
+    next request for the URL can be made conditional. GitHub answers an unchanged
+    resource with 304 Not Modified, which does not count against the rate limit,
+    and the cached body is used instead.
+
+    Listings of repos that are no longer mined would pile up, so entries are
+    evicted as in CommitStore: least recently used first (by mtime, refreshed
+    on every read) once the cache passes max_bytes, and any entry unused for
+    max_age seconds.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.total_bytes = None  # computed on first write
+        self.revalidated = 0  # 304 answers served from the cache
+
+    def path(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key[:2], key + ".json.gz")
+
+    def get(self, url):
+        """Return the cached entry {"etag", "last_modified", "link", "body"} for url, or None."""
+        path = self.path(url)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        # guard against a hash collision between two URLs
+        return entry if entry.get("url") == url else None
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, response):
+        """Store a 200 response if it carries a validator."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+        entry = {"url": url, "etag": etag, "last_modified": last_modified,
+                 "link": response.headers.get("Link"),
+                 "body": response.content.decode("utf-8")}
+
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(entry).encode("utf-8"))
+        size = os.path.getsize(tmp_path)
+
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            if self.total_bytes is None:
+                # first write of this run: also the time to drop the entries nobody used for max_age
+                self.total_bytes = self._expire()
+            else:
+                self.total_bytes += size - old_size
+            if self.total_bytes > self.max_bytes:
+                self.total_bytes = evict_lru(self.root, int(self.max_bytes * EVICT_TO))
+
+    def _expire(self):
+        """Remove the entries unused for max_age; returns the bytes left."""
+        cutoff = time.time() - self.max_age
+        total = 0
+        for path, size, mtime in cache_entries(self.root):
+            if mtime < cutoff:
+                try:
+                    os.remove(path)
+                    continue
+                except OSError:
+                    pass
+            total += size
+        return total
+
+    def hit(self):
+        with self.lock:
+            self.revalidated += 1
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.total_bytes = None
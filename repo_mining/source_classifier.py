@@ -0,0 +1,109 @@
+import fnmatch
+import re
+
+# Map GitHub language names -> file extensions considered "source"
+LANGUAGE_EXTENSIONS = {
+    "Java": {".java"},
+    "Kotlin": {".kt", ".kts"},
+    "C": {".c", ".h"},
+    "C++": {".cpp", ".cc", ".cxx", ".hpp", ".hh", ".hxx", ".h"},
+    "CMake": {".cmake"},
+}
+
+# Map GitHub language names -> exact file names considered "source"
+LANGUAGE_BASENAMES = {
+    "CMake": {"CMakeLists.txt"},
+}
+
+# Directories holding vendored or generated code, after GitHub linguist's vendor.yml / generated.rb
+# (only dropped when asked for, see exclude_vendored: without them the counts are those of
+# the plain extension checks the miners used before, so older CSVs stay comparable)
+EXCLUDED_DIRS = {
+    "vendor", "vendors", "third_party", "third-party", "thirdparty",
+    "node_modules", "bower_components", "Pods", "Carthage",
+    "generated", "gen", ".gradle", ".idea",
+}
+
+# Vendored or generated files wherever they are
+EXCLUDED_GLOBS = ["*.min.js", "*_pb2.py", "*.pb.h", "*.pb.cc", "*/gradle/wrapper/*", "gradle/wrapper/*"]
+
+# Paths classified so far are remembered, up to this many
+MAX_CACHE = 1 << 18
+
+
+class SourceClassifier:
+    """
+    Decides whether a path is a source file, the way GitHub linguist would.
+
+    Everything is compiled once: extensions and exact basenames are sets, the
+    globs are merged into one regular expression. A call splits the path once
+    (O(path length)) and the answer is memoised, so a path that comes back in
+    thousands of commits is an O(1) dict lookup.
+
+    Nothing is excluded by default; pass EXCLUDED_DIRS / EXCLUDED_GLOBS (or use
+    classifier_for(..., exclude_vendored=True)) to drop vendored and generated code.
+    """
+
+    def __init__(self, extensions=(), basenames=(), globs=(), excluded_dirs=(), excluded_globs=()):
+        self.extensions = frozenset(e.lower() for e in extensions)
+        self.basenames = frozenset(basenames)
+        self.excluded_dirs = frozenset(excluded_dirs)
+        self.glob = _compile_globs(globs)
+        self.excluded_glob = _compile_globs(excluded_globs)
+        self.cache = {}
+
+    def __call__(self, path):
+        try:
+            return self.cache[path]
+        except KeyError:
+            pass
+        if len(self.cache) >= MAX_CACHE:
+            self.cache.clear()
+        result = self.cache[path] = self.classify(path)
+        return result
+
+    def classify(self, path):
+        """Same answer as calling the classifier, without the cache."""
+        if not path:
+            return False
+        *dirs, basename = path.split("/")
+        if self.excluded_dirs and not self.excluded_dirs.isdisjoint(dirs):
+            return False
+        if self.excluded_glob is not None and self.excluded_glob.match(path):
+            return False
+        if basename in self.basenames:
+            return True
+        dot = basename.rfind(".")
+        if dot > 0 and basename[dot:].lower() in self.extensions:
+            return True
+        return self.glob is not None and self.glob.match(path) is not None
+
+
+def _compile_globs(globs):
+    if not globs:
+        return None
+    return re.compile("|".join(fnmatch.translate(glob) for glob in globs))
+
+
+# Classifiers already built, by set of languages
+_classifiers = {}
+
+
+# @exclude_vendored, also reject the paths of EXCLUDED_DIRS and EXCLUDED_GLOBS
+def classifier_for(languages, exclude_vendored=False):
+    """The shared classifier for a repo's languages (as returned by get_repo_languages)."""
+    key = (frozenset(languages), exclude_vendored)
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        extensions = set()
+        basenames = set()
+        for lang in key[0]:
+            extensions |= LANGUAGE_EXTENSIONS.get(lang, set())
+            basenames |= LANGUAGE_BASENAMES.get(lang, set())
+        if exclude_vendored:
+            classifier = SourceClassifier(extensions, basenames, excluded_dirs=EXCLUDED_DIRS,
+                                          excluded_globs=EXCLUDED_GLOBS)
+        else:
+            classifier = SourceClassifier(extensions, basenames)
+        _classifiers[key] = classifier
+    return classifier
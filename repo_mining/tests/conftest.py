@@ -0,0 +1,69 @@
+"""
+Shared fixtures: a mock_github server the miners are pointed at, and a small touches history
+"""
+
+import pytest
+
+import github_api
+from mining_backends import open_touches_csv
+from mock_github import MockGitHubServer
+from source_classifier import classifier_for
+
+# Languages the mock server reports for every repo
+MOCK_LANGUAGES = {"Java", "Kotlin"}
+
+
+def expected_counts(repo, is_source=None):
+    """Touch counts of every (source) file of a SyntheticRepo, counted without any request"""
+    is_source = is_source or classifier_for(MOCK_LANGUAGES)
+    counts = {}
+    for i in range(repo.n_commits):
+        for filename in repo.files_of(i):
+            if is_source(filename):
+                counts[filename] = counts.get(filename, 0) + 1
+    return counts
+
+
+@pytest.fixture()
+def github(monkeypatch):
+    """Start a MockGitHubServer for some SyntheticRepos and send every GitHub request to it"""
+    servers = []
+
+    def serve(*repos, **options):
+        server = MockGitHubServer(list(repos), **options)
+        server.start()
+        servers.append(server)
+        monkeypatch.setattr(github_api, "api_url", server.url)
+        return server
+
+    # nothing shared with real runs through the on-disk caches, a fresh token pool, quick retries
+    monkeypatch.setattr(github_api, "commit_store", None)
+    monkeypatch.setattr(github_api, "response_cache", None)
+    monkeypatch.setattr(github_api, "_pools", {})
+    monkeypatch.setattr(github_api, "BACKOFF_BASE", 0.01)
+    yield serve
+    for server in servers:
+        server.stop()
+
+
+# A small touches history: (Filename, CommitSHA, AuthorLogin, AuthorName, AuthorEmail, CommitDate)
+# lib/A.java shares its short name with src/A.java, Bob has no login, the last touch has no date
+TOUCHES = [
+    ["src/A.java", "a1" * 20, "ada", "Ada", "ada@example.com", "2024-01-01T10:00:00Z"],
+    ["src/B.java", "a1" * 20, "ada", "Ada", "ada@example.com", "2024-01-01T10:00:00Z"],
+    ["src/A.java", "b2" * 20, "", "Bob", "bob@example.com", "2024-01-03T09:30:00Z"],
+    ["lib/A.java", "c3" * 20, "cy", "Cy", "cy@example.com", "2024-01-09T12:00:00Z"],
+    ["src/C.kt", "d4" * 20, "ada", "Ada", "ada@example.com", "2024-01-10T08:00:00Z"],
+    ["src/A.java", "d4" * 20, "ada", "Ada", "ada@example.com", "2024-01-10T08:00:00Z"],
+    ["src/B.java", "e5" * 20, "cy", "Cy", "cy@example.com", ""],
+]
+
+
+@pytest.fixture()
+def touches_csv(tmp_path):
+    """TOUCHES written as a touches CSV"""
+    path = str(tmp_path / "file_touches_authors_dates.csv")
+    with open_touches_csv(path) as writer:
+        for row in TOUCHES:
+            writer.writerow(row)
+    return path
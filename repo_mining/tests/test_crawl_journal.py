@@ -0,0 +1,54 @@
+"""
+Test Cases for resuming an interrupted crawl
+
+RichardSserunjogi_CollectFiles.mine_repo journals every commit it counts:
+- 5xx answers are retried and do not change the counts
+- a crawl that dies leaves its journal behind, and the next run resumes from it
+- the resumed counts are those of a clean run, and the journal is removed
+"""
+
+import os
+
+import pytest
+
+import github_api
+from conftest import expected_counts
+from crawl_journal import journal_path
+from mock_github import SyntheticRepo
+from RichardSserunjogi_CollectFiles import mine_repo
+from watermark import load_watermark
+
+REPO = "mock/journal"
+
+
+class TestJournalResume:
+    """Test cases for crawling through server errors"""
+
+    def test_retries_server_errors(self, github, tmp_path):
+        """It should count the same touches when some requests fail with 502"""
+        repo = SyntheticRepo(REPO, commits=350, seed=1)
+        github(repo, error_rate=0.2)
+        output = str(tmp_path / "file_journal.csv")
+        assert mine_repo(REPO, ["token"], output) == expected_counts(repo)
+
+    def test_resumes_after_failure(self, github, monkeypatch, tmp_path):
+        """It should resume a failed crawl from its journal and match a clean run"""
+        repo = SyntheticRepo(REPO, commits=650, seed=2)
+        server = github(repo)
+        monkeypatch.setattr(github_api, "MAX_RETRIES", 1)
+        # every request fails once the first few pages are done
+        monkeypatch.setattr(server, "should_fail", lambda: server.stats[200] >= 300)
+        output = str(tmp_path / "file_journal.csv")
+
+        with pytest.raises(SystemExit):
+            mine_repo(REPO, ["token"], output)
+        assert os.path.exists(journal_path(output))
+        assert not os.path.exists(output)
+
+        monkeypatch.setattr(server, "should_fail", lambda: False)
+        requests_before = server.stats[200]
+        assert mine_repo(REPO, ["token"], output) == expected_counts(repo)
+        assert not os.path.exists(journal_path(output))
+        assert load_watermark(output)["sha"] == repo.shas[0]
+        # the commits of the finished pages were not asked for again
+        assert server.stats[200] - requests_before < repo.n_commits
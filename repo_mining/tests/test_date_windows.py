@@ -0,0 +1,61 @@
+"""
+Test Cases for crawling by date windows
+
+plan_windows bisects a date range until every window fits, and crawl_windows
+crawls them in parallel:
+- the windows cover the range without gaps and hold at most max_commits commits
+- a commit on the second where two windows meet is handed over once
+- the counts are those of a crawl of the whole history
+"""
+
+import datetime
+
+from conftest import expected_counts
+from date_windows import plan_windows, crawl_windows, countfiles_by_date, parse_date, format_date
+from mock_github import SyntheticRepo
+
+REPO = "mock/windows"
+
+
+def one_second_before(date):
+    return format_date(parse_date(date) - datetime.timedelta(seconds=1))
+
+
+class TestDateWindows:
+    """Test cases for splitting the history by date"""
+
+    def test_bisects_until_windows_fit(self, github):
+        """It should split the range into contiguous windows of at most max_commits commits"""
+        repo = SyntheticRepo(REPO, commits=1000, seed=4)
+        github(repo)
+        since, until = repo.date_of(999), repo.date_of(0)
+        windows = plan_windows(REPO, ["token"], since, until, max_commits=200)
+
+        assert len(windows) > 1
+        assert all(pages <= 2 for _, _, pages in windows)
+        # newest first, each window starting one second after the next one ends
+        assert windows[0][1] == until and windows[-1][0] == since
+        for newer, older in zip(windows, windows[1:]):
+            assert one_second_before(newer[0]) == older[1]
+        assert sum(len(repo.listing(start, None, end)) for start, end, _ in windows) == repo.n_commits
+
+    def test_dedupes_window_edges(self, github):
+        """It should hand over a commit listed by two windows once, newest first"""
+        repo = SyntheticRepo(REPO, commits=300, seed=5)
+        github(repo)
+        edge = repo.date_of(150)
+        # both bounds are inclusive: commit 150 is in both windows
+        windows = [(edge, repo.date_of(0), 2), (repo.date_of(299), edge, 2)]
+        shas = []
+        newest = crawl_windows(REPO, ["token"], windows, lambda sha, filenames: shas.append(sha), parallel=2)
+        assert shas == repo.shas
+        assert newest == {"sha": repo.shas[0], "date": repo.date_of(0)}
+
+    def test_counts_match_whole_history(self, github):
+        """It should count the touches of a crawl of the whole history"""
+        repo = SyntheticRepo(REPO, commits=800, seed=6)
+        github(repo)
+        dictfiles, newest = {}, {}
+        countfiles_by_date(dictfiles, ["token"], REPO, max_commits=300, newest=newest)
+        assert dictfiles == expected_counts(repo)
+        assert newest["sha"] == repo.shas[0]
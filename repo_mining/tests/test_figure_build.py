@@ -0,0 +1,60 @@
+"""
+Test Cases for the figure build
+
+build_figures only draws the figures whose inputs changed:
+- a figure whose inputs, parameters and render code are unchanged is skipped
+- a changed input, a changed parameter or a deleted output rebuilds it
+- a failing figure is reported and built again next time
+"""
+
+import os
+
+import pandas as pd
+
+from figure_build import FigureJob, build_figures
+
+
+def render_counts(output, counts, title):
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(title + "\n" + counts.to_csv())
+
+
+def render_failure(output, title):
+    raise RuntimeError(title)
+
+
+def build(jobs, tmp_path, **options):
+    return build_figures(jobs, manifest_path=str(tmp_path / ".build.json"), workers=1, **options)
+
+
+class TestFigureBuild:
+    """Test cases for skipping unchanged figures"""
+
+    def job(self, tmp_path, counts=(3, 1), title="Touches"):
+        return FigureJob(str(tmp_path / "figures" / "counts.txt"), render_counts,
+                         inputs={"counts": pd.Series(counts, index=["A.java", "B.java"], name="touches")},
+                         params={"title": title})
+
+    def test_skips_unchanged_figure(self, tmp_path):
+        """It should build a figure once and skip it while nothing changed"""
+        assert build([self.job(tmp_path)], tmp_path) == {str(tmp_path / "figures" / "counts.txt"): "built"}
+        mtime = os.path.getmtime(tmp_path / "figures" / "counts.txt")
+        assert build([self.job(tmp_path)], tmp_path) == {str(tmp_path / "figures" / "counts.txt"): "skipped"}
+        assert os.path.getmtime(tmp_path / "figures" / "counts.txt") == mtime
+
+    def test_rebuilds_changed_figure(self, tmp_path):
+        """It should build a figure again when its inputs, parameters or output change"""
+        output = str(tmp_path / "figures" / "counts.txt")
+        build([self.job(tmp_path)], tmp_path)
+        assert build([self.job(tmp_path, counts=(3, 2))], tmp_path) == {output: "built"}
+        assert build([self.job(tmp_path, counts=(3, 2), title="Top files")], tmp_path) == {output: "built"}
+        os.remove(output)
+        assert build([self.job(tmp_path, counts=(3, 2), title="Top files")], tmp_path) == {output: "built"}
+        assert build([self.job(tmp_path, counts=(3, 2), title="Top files")], tmp_path, force=True) == {
+            output: "built"}
+
+    def test_reports_failure(self, tmp_path):
+        """It should report a failing figure and try it again on the next build"""
+        job = FigureJob(str(tmp_path / "figures" / "broken.txt"), render_failure, params={"title": "boom"})
+        assert build([job], tmp_path)[job.output].startswith("failed: RuntimeError")
+        assert build([job], tmp_path)[job.output].startswith("failed: RuntimeError")
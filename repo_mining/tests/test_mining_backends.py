@@ -0,0 +1,117 @@
+"""
+Test Cases for the local git mining backend
+
+LocalGitBackend must report the same commits and files as the GitHub API:
+- every commit reachable from HEAD, newest first
+- a merge commit lists the files of its diff against the first parent
+- a renamed file is counted under its new name
+- dates are in UTC ("2024-01-01T10:00:00Z"), and there is no GitHub login
+- paths with tabs, quotes or non-ASCII characters are reported verbatim
+"""
+
+import csv
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from mining_backends import LocalGitBackend, main, FILE_COUNTS_HEADER, TOUCHES_HEADER
+from watermark import load_watermark
+
+AUTHOR = {"GIT_AUTHOR_NAME": "Ada", "GIT_AUTHOR_EMAIL": "ada@example.com",
+          "GIT_COMMITTER_NAME": "Ada", "GIT_COMMITTER_EMAIL": "ada@example.com"}
+
+
+def git(repo, *args, date=None):
+    env = dict(os.environ, **AUTHOR)
+    if date:
+        env.update(GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    result = subprocess.run(["git", "-C", str(repo), *args], env=env, check=True,
+                            capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def write(repo, path, text):
+    os.makedirs(os.path.dirname(os.path.join(repo, path)) or str(repo), exist_ok=True)
+    with open(os.path.join(repo, path), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+@pytest.fixture()
+def repo(tmp_path):
+    """A repo with a rename on main and a merged feature branch, one commit per hour (+02:00)"""
+    repo = tmp_path / "demo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    write(repo, "src/A.java", "class A {}\n")
+    write(repo, "src/B.java", "class B {}\n")
+    write(repo, "README.md", "demo\n")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "initial", date="2024-01-01T12:00:00+02:00")
+    git(repo, "checkout", "-q", "-b", "feature")
+    write(repo, "src/A.java", "class A { int x; }\n")
+    git(repo, "commit", "-q", "-am", "feature", date="2024-01-01T13:00:00+02:00")
+    git(repo, "checkout", "-q", "main")
+    git(repo, "mv", "src/B.java", "src/C.java")
+    git(repo, "commit", "-q", "-m", "rename", date="2024-01-01T14:00:00+02:00")
+    git(repo, "merge", "-q", "--no-ff", "feature", "-m", "merge", date="2024-01-01T15:00:00+02:00")
+    return repo
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+class TestLocalGitBackend:
+    """Test cases for mining a local clone"""
+
+    def test_writes_file_counts(self, repo, tmp_path):
+        """It should count merges against their first parent and renames under the new name"""
+        out = tmp_path / "data"
+        main([str(repo), "--out-dir", str(out), "--no-columnar"])
+        rows = read_csv(out / "file_demo.csv")
+        assert rows[0] == FILE_COUNTS_HEADER
+        assert {filename: int(count) for filename, count in rows[1:]} == {
+            "src/A.java": 3,  # initial, feature and the merge bringing it into main
+            "src/B.java": 1,
+            "src/C.java": 1,
+        }
+
+    def test_writes_touches(self, repo, tmp_path):
+        """It should write one row per commit and source file, newest first, with UTC dates"""
+        out = tmp_path / "data"
+        main([str(repo), "--out-dir", str(out), "--no-columnar"])
+        shas = git(repo, "log", "--format=%H", "--date-order").split()
+        merge, rename, feature, initial = shas
+        rows = read_csv(out / "file_touches_authors_dates_demo.csv")
+        assert rows[0] == TOUCHES_HEADER
+        assert sorted(rows[1:]) == sorted([
+            ["src/A.java", merge, "", "Ada", "ada@example.com", "2024-01-01T13:00:00Z"],
+            ["src/C.java", rename, "", "Ada", "ada@example.com", "2024-01-01T12:00:00Z"],
+            ["src/A.java", feature, "", "Ada", "ada@example.com", "2024-01-01T11:00:00Z"],
+            ["src/A.java", initial, "", "Ada", "ada@example.com", "2024-01-01T10:00:00Z"],
+            ["src/B.java", initial, "", "Ada", "ada@example.com", "2024-01-01T10:00:00Z"],
+        ])
+        assert [row[1] for row in rows[1:]] == [merge, rename, feature, initial, initial]
+
+    def test_saves_watermark(self, repo, tmp_path):
+        """It should record the newest commit as the watermark of the counts CSV"""
+        out = tmp_path / "data"
+        main([str(repo), "--out-dir", str(out), "--no-columnar"])
+        watermark = load_watermark(str(out / "file_demo.csv"))
+        assert watermark == {"sha": git(repo, "rev-parse", "HEAD"), "date": "2024-01-01T13:00:00Z"}
+
+    def test_reports_paths_verbatim(self, repo):
+        """It should report paths with tabs, quotes and non-ASCII characters as they are named"""
+        odd = ["src/tab\tname.java", 'src/"quoted".java', "src/Ünïcödé.java"]
+        for path in odd:
+            write(repo, path, "class X {}\n")
+        git(repo, "add", "-A")
+        git(repo, "commit", "-q", "-m", "odd names", date="2024-01-01T16:00:00+02:00")
+        commits = []
+        LocalGitBackend(str(repo)).crawl(commits.append)
+        assert sorted(commits[0].filenames) == sorted(odd)
+        assert len(commits) == 5
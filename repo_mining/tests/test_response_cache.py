@@ -0,0 +1,65 @@
+"""
+Test Cases for the response cache
+
+ResponseCache keeps listing pages with their validators, within limits:
+- an entry is only kept for a 200 response with an ETag or Last-Modified
+- past max_bytes the least recently read entries are evicted first
+- entries unused for max_age are dropped
+"""
+
+import os
+import time
+
+from response_cache import ResponseCache
+
+
+class Response:
+    """The parts of a requests.Response the cache reads"""
+
+    def __init__(self, body, etag='"v1"', status_code=200):
+        self.status_code = status_code
+        self.headers = {"ETag": etag} if etag else {}
+        self.content = body.encode("utf-8")
+
+
+def url(i):
+    return f"https://api.github.com/repos/mock/cache/commits?page={i}&per_page=100"
+
+
+class TestResponseCache:
+    """Test cases for storing and evicting entries"""
+
+    def test_stores_validated_responses(self, tmp_path):
+        """It should keep a 200 response with a validator and nothing else"""
+        cache = ResponseCache(str(tmp_path))
+        cache.put(url(1), Response("[1]"))
+        cache.put(url(2), Response("[2]", etag=None))
+        cache.put(url(3), Response("{}", status_code=404))
+        assert cache.get(url(1))["body"] == "[1]"
+        assert cache.conditional_headers(cache.get(url(1))) == {"If-None-Match": '"v1"'}
+        assert cache.get(url(2)) is None and cache.get(url(3)) is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """It should evict the entries read longest ago once it passes max_bytes"""
+        body = os.urandom(2000).hex()  # does not compress
+        cache = ResponseCache(str(tmp_path), max_bytes=10 * 2500)
+        for i in range(8):
+            cache.put(url(i), Response(body))
+            os.utime(cache.path(url(i)), (1000 + i, 1000 + i))
+        cache.get(url(0))  # read: now the most recently used
+        for i in range(8, 12):
+            cache.put(url(i), Response(body))
+        kept = [i for i in range(12) if os.path.exists(cache.path(url(i)))]
+        assert 0 in kept and 1 not in kept and 11 in kept
+        assert sum(os.path.getsize(cache.path(url(i))) for i in kept) <= 10 * 2500
+
+    def test_expires_unused_entries(self, tmp_path):
+        """It should drop the entries unused for max_age"""
+        ResponseCache(str(tmp_path)).put(url(1), Response("[1]"))
+        old = time.time() - 3600
+        os.utime(ResponseCache(str(tmp_path)).path(url(1)), (old, old))
+
+        cache = ResponseCache(str(tmp_path), max_age=600)
+        cache.put(url(2), Response("[2]"))
+        assert cache.get(url(1)) is None
+        assert cache.get(url(2))["body"] == "[2]"
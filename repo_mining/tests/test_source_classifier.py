@@ -0,0 +1,41 @@
+"""
+Test Cases for the source file classifier
+
+SourceClassifier answers like the extension checks it replaced:
+- a path is a source file when its extension (any case) or its exact name is listed
+- vendored and generated code is only dropped when asked for
+"""
+
+import os
+
+from source_classifier import SourceClassifier, classifier_for
+
+PATHS = ["src/A.java", "src/B.KT", "build.gradle.kts", "README.md", ".java", "src.java/notes",
+         "app/CMakeLists.txt", "gen/R.java", "vendor/lib/C.java", "gradle/wrapper/Wrapper.java"]
+
+
+def legacy_is_source(filename, source_ext):
+    _, ext = os.path.splitext(filename)
+    return ext.lower() in source_ext
+
+
+class TestSourceClassifier:
+    """Test cases for classifying paths"""
+
+    def test_matches_extension_check(self):
+        """It should accept the same paths as os.path.splitext against the extensions"""
+        source_ext = [".kt", ".java", ".kts", ".md"]
+        is_source = SourceClassifier(source_ext)
+        assert [is_source(p) for p in PATHS] == [legacy_is_source(p, source_ext) for p in PATHS]
+
+    def test_languages(self):
+        """It should take the extensions and file names of a repo's languages"""
+        is_source = classifier_for({"Java", "CMake"})
+        assert [p for p in PATHS if is_source(p)] == [
+            "src/A.java", "app/CMakeLists.txt", "gen/R.java", "vendor/lib/C.java", "gradle/wrapper/Wrapper.java"]
+
+    def test_excludes_vendored_on_request(self):
+        """It should drop vendored and generated paths only with exclude_vendored"""
+        is_source = classifier_for({"Java"}, exclude_vendored=True)
+        assert [p for p in PATHS if is_source(p)] == ["src/A.java"]
+        assert classifier_for({"Java"}) is not is_source
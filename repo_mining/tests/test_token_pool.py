@@ -0,0 +1,81 @@
+"""
+Test Cases for the token pool
+
+TokenPool hands out the token with the most rate-limit budget left:
+- tokens of unknown budget take turns
+- when every token is spent, acquire() waits for the earliest reset
+- a Retry-After park does not wait for the end of the budget window
+"""
+
+import threading
+
+from token_pool import TokenPool
+
+
+class FakeClock:
+    """A clock that only moves when the pool waits"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.waits = []
+
+    def __call__(self):
+        return self.now
+
+
+def make_pool(tokens, clock):
+    pool = TokenPool(tokens, clock=clock)
+
+    # waiting for a reset moves the clock instead of sleeping
+    class Condition(type(pool.cond)):
+        def wait(self, timeout=None):
+            clock.waits.append(timeout)
+            clock.now += timeout
+            return False
+
+    pool.cond = Condition(threading.Lock())
+    return pool
+
+
+def headers(remaining, reset, limit=5000):
+    return {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(reset),
+            "X-RateLimit-Limit": str(limit)}
+
+
+class TestTokenPool:
+    """Test cases for picking a token"""
+
+    def test_picks_most_budget(self):
+        """It should hand out the token with the most requests left"""
+        clock = FakeClock()
+        pool = make_pool(["a", "b", "c"], clock)
+        pool.update("a", headers(10, 4000))
+        pool.update("b", headers(50, 4000))
+        pool.update("c", headers(5, 4000))
+        assert pool.acquire() == "b"
+        pool.update("b", headers(3, 4000))
+        assert pool.acquire() == "a"
+
+    def test_rotates_unknown_budgets(self):
+        """It should spread the first requests over the tokens whose budget is not known yet"""
+        pool = make_pool(["a", "b", "c"], FakeClock())
+        assert sorted(pool.acquire() for _ in range(3)) == ["a", "b", "c"]
+
+    def test_waits_for_earliest_reset(self):
+        """It should wait for the token whose budget comes back first"""
+        clock = FakeClock()
+        pool = make_pool(["a", "b"], clock)
+        pool.update("a", headers(0, clock.now + 30))
+        pool.update("b", headers(0, clock.now + 10))
+        assert pool.acquire() == "b"
+        assert clock.now < 1030
+        assert clock.waits == [11]
+
+    def test_park_ends_before_reset(self):
+        """It should use a parked token again once its Retry-After is over, before its reset"""
+        clock = FakeClock()
+        pool = make_pool(["a"], clock)
+        pool.update("a", headers(100, clock.now + 3000))
+        pool.exhaust("a", clock.now + 60)
+        assert pool.acquire() == "a"
+        assert 1060 <= clock.now < 1100
@@ -0,0 +1,52 @@
+"""
+Test Cases for the typed touch CSV loader
+
+read_touch_csv reads a touches CSV with typed columns:
+- dates are UTC datetimes, NaT where they are missing
+- a current columnar copy of the CSV gives the same DataFrame without parsing it
+- a columnar copy older than the CSV is ignored
+"""
+
+import os
+
+import pandas as pd
+
+from conftest import TOUCHES
+from touch_csv import read_touch_csv, current_store
+from touch_store import TouchStoreWriter, store_path
+
+CUBE_COLUMNS = ("Filename", "AuthorLogin", "CommitDate")
+
+
+def write_store(csv_path, rows):
+    with TouchStoreWriter(store_path(csv_path)) as writer:
+        for row in rows:
+            writer.writerow(row)
+
+
+class TestReadTouchCsv:
+    """Test cases for loading touches"""
+
+    def test_typed_columns(self, touches_csv):
+        """It should parse the dates to UTC and keep the other columns as strings"""
+        df = read_touch_csv(touches_csv)
+        assert str(df["CommitDate"].dt.tz) == "UTC"
+        assert df["CommitDate"].isna().tolist() == [False] * 6 + [True]
+        assert df["Filename"].tolist() == [row[0] for row in TOUCHES]
+        assert df["AuthorLogin"].isna().tolist() == [False, False, True, False, False, False, False]
+
+    def test_reads_store_like_csv(self, touches_csv):
+        """It should build the same DataFrame from a current columnar store"""
+        write_store(touches_csv, TOUCHES)
+        assert current_store(touches_csv) == store_path(touches_csv)
+        pd.testing.assert_frame_equal(read_touch_csv(touches_csv), read_touch_csv(touches_csv, prefer_store=False))
+        pd.testing.assert_frame_equal(read_touch_csv(touches_csv, usecols=CUBE_COLUMNS),
+                                      read_touch_csv(touches_csv, usecols=CUBE_COLUMNS, prefer_store=False))
+
+    def test_ignores_stale_store(self, touches_csv):
+        """It should read the CSV when it was written after its columnar store"""
+        write_store(touches_csv, TOUCHES[:2])
+        stat = os.stat(store_path(touches_csv))
+        os.utime(touches_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert current_store(touches_csv) is None
+        assert len(read_touch_csv(touches_csv)) == len(TOUCHES)
@@ -0,0 +1,69 @@
+"""
+Test Cases for the touch cube
+
+TouchCube counts the touches per (short file name, author, project week):
+- rankings are those of value_counts() on the touches, ties in order of first appearance
+- weeks start on Monday, week 0 being the week of the first touch
+- cube_for reuses the saved cube until the touches CSV changes
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import touch_cube
+from touch_csv import read_touch_csv
+from touch_cube import build_cube, cube_for, cube_path
+
+
+class TestTouchCube:
+    """Test cases for building and caching the cube"""
+
+    def test_rankings(self, touches_csv):
+        """It should rank short file names and authors as value_counts() does"""
+        df = read_touch_csv(touches_csv)
+        cube = build_cube(df)
+        # the touch without a date is left out, src/A.java and lib/A.java are both A.java
+        assert cube.touches() == 6
+        assert cube.file_totals().to_dict() == {"A.java": 4, "B.java": 1, "C.kt": 1}
+        assert cube.file_totals().index.tolist() == ["A.java", "B.java", "C.kt"]
+        assert cube.author_totals().index.tolist() == ["ada", "unknown", "cy"]
+
+        dated = df.dropna(subset=["CommitDate"])
+        value_counts = dated["Filename"].map(os.path.basename).value_counts()
+        assert cube.file_totals().to_dict() == value_counts.to_dict()
+
+    def test_weeks(self, touches_csv):
+        """It should number weeks from the Monday of the first touch"""
+        cube = build_cube(read_touch_csv(touches_csv))
+        assert cube.project_start == pd.Timestamp("2024-01-01")
+        per_week = pd.Series(cube.count).groupby(cube.week).sum().to_dict()
+        assert per_week == {0: 3, 1: 3}
+        assert cube.week_start(1) == pd.Timestamp("2024-01-08")
+
+    def test_reuses_saved_cube(self, touches_csv, monkeypatch):
+        """It should load the saved cube while the CSV is unchanged and rebuild it after"""
+        cube = cube_for(touches_csv)
+        assert os.path.exists(cube_path(touches_csv))
+
+        def read_touches(*args, **kwargs):
+            raise AssertionError("the touches were read again")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(touch_cube, "read_touches", read_touches)
+            cached = cube_for(touches_csv)
+        assert cached.file_totals().to_dict() == cube.file_totals().to_dict()
+
+        with open(touches_csv, "a", encoding="utf-8") as f:
+            f.write("src/D.java," + "f6" * 20 + ",ada,Ada,ada@example.com,2024-01-11T08:00:00Z\n")
+        rebuilt = cube_for(touches_csv)
+        assert rebuilt.touches() == cube.touches() + 1
+
+    def test_rejects_other_version(self, touches_csv, tmp_path, monkeypatch):
+        """It should refuse to load a cube saved in another format"""
+        path = str(tmp_path / "old.cube.npz")
+        build_cube(read_touch_csv(touches_csv)).save(path)
+        monkeypatch.setattr(touch_cube, "CUBE_VERSION", touch_cube.CUBE_VERSION + 1)
+        with pytest.raises(ValueError):
+            touch_cube.TouchCube.load(path)
@@ -0,0 +1,54 @@
+"""
+Test Cases for the touches database
+
+TouchDB normalises the touches into files, authors, commits and touches:
+- importing the same rows again inserts nothing
+- a touches CSV and its columnar store import to the same database
+- rankings count touches, ties broken by name, within the date bounds
+"""
+
+from conftest import TOUCHES
+from touch_db import TouchDB, parse_bound
+from touch_store import TouchStoreWriter, store_path
+
+
+class TestTouchDB:
+    """Test cases for importing and querying touches"""
+
+    def test_reimport_inserts_nothing(self, touches_csv, tmp_path):
+        """It should skip every row of a CSV it already holds"""
+        path = str(tmp_path / "touches.sqlite")
+        with TouchDB(path) as db:
+            db.import_csv(touches_csv)
+            assert db.inserted == len(TOUCHES)
+            stats = db.stats()
+        assert stats == {"files": 4, "authors": 3, "commits": 5, "touches": 7}
+
+        with TouchDB(path) as db:
+            db.import_csv(touches_csv)
+            assert db.inserted == 0
+            assert db.stats() == stats
+
+    def test_imports_store_like_csv(self, touches_csv, tmp_path):
+        """It should import a columnar store to the same rows as its CSV"""
+        with TouchStoreWriter(store_path(touches_csv)) as writer:
+            for row in TOUCHES:
+                writer.writerow(row)
+        with TouchDB(str(tmp_path / "from_csv.sqlite")) as from_csv, \
+                TouchDB(str(tmp_path / "from_store.sqlite")) as from_store:
+            from_csv.import_csv(touches_csv)
+            from_store.import_store(store_path(touches_csv))
+            assert from_store.stats() == from_csv.stats()
+            assert from_store.top_files(n=10) == from_csv.top_files(n=10)
+            assert from_store.file_timeline("src/A.java") == from_csv.file_timeline("src/A.java")
+
+    def test_rankings(self, touches_csv, tmp_path):
+        """It should rank files and authors by touches within the date bounds"""
+        with TouchDB(str(tmp_path / "touches.sqlite")) as db:
+            db.import_csv(touches_csv)
+            assert db.top_files(n=2) == [("src/A.java", 3), ("src/B.java", 2)]
+            # Bob has no login and is shown by name
+            assert db.top_authors() == [("ada", 4), ("cy", 2), ("Bob", 1)]
+            assert db.top_authors(since=parse_bound("2024-01-02"), until=parse_bound("2024-01-10")) == [
+                ("Bob", 1), ("cy", 1)]
+            assert db.top_files(author="cy") == [("lib/A.java", 1), ("src/B.java", 1)]
@@ -0,0 +1,63 @@
+"""
+Test Cases for the columnar touch store
+
+TouchStoreWriter writes the touches as .npy columns and a dictionary:
+- the rows read back are the rows written, across several flushes
+- a missing date, SHA or author field reads back as missing, as it does from the CSV
+- only the finished columns are left on disk
+"""
+
+import os
+
+import pandas as pd
+
+from conftest import TOUCHES
+from mining_backends import TOUCHES_HEADER
+from touch_store import TouchStoreWriter, load_touch_store, store_path
+
+
+def write_store(path, rows, flush_every=2):
+    with TouchStoreWriter(path, flush_every=flush_every) as writer:
+        for row in rows:
+            writer.writerow(row)
+
+
+class TestTouchStore:
+    """Test cases for writing and reading a store"""
+
+    def test_store_path(self):
+        """It should keep the store next to its CSV, compressed or not"""
+        assert store_path("data/touches.csv") == os.path.join("data", "touches.touches")
+        assert store_path("data/touches.csv.gz") == os.path.join("data", "touches.touches")
+
+    def test_round_trip(self, tmp_path):
+        """It should read back every row as written, over several flushes"""
+        path = str(tmp_path / "t.touches")
+        write_store(path, TOUCHES)
+        assert sorted(os.listdir(path)) == ["author_id.npy", "date.npy", "dictionary.json", "file_id.npy",
+                                            "sha.npy"]
+
+        store = load_touch_store(path)
+        assert len(store) == len(TOUCHES)
+        df = store.to_dataframe(with_sha=True)
+        assert list(df.columns) == TOUCHES_HEADER
+        expected = pd.DataFrame(TOUCHES, columns=TOUCHES_HEADER)
+        for column in TOUCHES_HEADER[:5]:
+            assert [v if isinstance(v, str) else "" for v in df[column]] == expected[column].tolist()
+        assert df["AuthorLogin"].isna().sum() == 1  # Bob
+        dates = pd.to_datetime(expected["CommitDate"].replace("", None), utc=True)
+        assert df["CommitDate"].isna().tolist() == dates.isna().tolist()
+        assert df["CommitDate"].dropna().tolist() == dates.dropna().tolist()
+
+    def test_missing_sha(self, tmp_path):
+        """It should read a touch without a SHA back without one"""
+        path = str(tmp_path / "t.touches")
+        write_store(path, [["src/A.java", "", "ada", "Ada", "ada@example.com", "2024-01-01T10:00:00Z"]])
+        assert load_touch_store(path).to_dataframe(with_sha=True)["CommitSHA"].tolist() == [None]
+
+    def test_rewrites_store(self, tmp_path):
+        """It should replace an old store rather than append to it"""
+        path = str(tmp_path / "t.touches")
+        write_store(path, TOUCHES)
+        write_store(path, TOUCHES[:2])
+        assert len(load_touch_store(path, mmap=False)) == 2
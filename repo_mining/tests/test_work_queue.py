@@ -0,0 +1,129 @@
+"""
+Test Cases for the work queue
+
+WorkQueue splits a crawl into leased units of listing pages:
+- a unit whose lease expired is handed out again
+- only the worker holding a unit's lease can renew or complete it
+- a heartbeat keeps the lease while the crawl waits
+- a failing unit is given back, and set aside as failed after MAX_ATTEMPTS
+- the merged counts of every unit are those of a sequential crawl, and the
+  merged CSV's watermark is the queued head
+"""
+
+import time
+
+import pytest
+
+from conftest import expected_counts
+from mock_github import SyntheticRepo
+from watermark import load_watermark
+from work_queue import WorkQueue, Heartbeat, MAX_ATTEMPTS, enqueue_repo, work, merge
+
+REPO = "mock/queue"
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=300, clock=FakeClock())
+    yield queue
+    queue.close()
+
+
+class TestWorkQueue:
+    """Test cases for leasing units"""
+
+    def test_splits_pages_into_units(self, queue):
+        """It should cut the listing pages into units of pages_per_unit pages"""
+        assert queue.enqueue(REPO, "a" * 40, 25, {"Java"}, pages_per_unit=10)
+        assert not queue.enqueue(REPO, "a" * 40, 25, {"Java"}, pages_per_unit=10)
+        units = [queue.lease("w1") for _ in range(3)]
+        assert [(u["first_page"], u["last_page"]) for u in units] == [(1, 10), (11, 20), (21, 25)]
+        assert queue.lease("w1") is None
+
+    def test_reclaims_expired_lease(self, queue):
+        """It should hand an expired unit to another worker and ignore its first owner"""
+        queue.enqueue(REPO, "a" * 40, 5, {"Java"}, pages_per_unit=10)
+        unit = queue.lease("w1")
+        assert queue.lease("w2") is None
+        assert queue.renew("w1", unit)
+
+        queue.clock.now += 301
+        reclaimed = queue.lease("w2")
+        assert reclaimed["unit"] == unit["unit"]
+        assert not queue.renew("w1", unit)
+        assert not queue.complete("w1", unit, [(0, "b" * 40, ["A.java"])])
+        assert queue.complete("w2", reclaimed, [(0, "c" * 40, ["B.java"])])
+        assert queue.status(REPO) == {"done": 1}
+        assert queue.file_counts(REPO) == {"B.java": 1}
+
+    def test_release_makes_unit_pending(self, queue):
+        """It should hand a released unit out again at once"""
+        queue.enqueue(REPO, "a" * 40, 5, {"Java"})
+        unit = queue.lease("w1")
+        queue.release("w1", unit)
+        assert queue.status(REPO) == {"pending": 1}
+        assert queue.lease("w2")["unit"] == unit["unit"]
+
+    def test_release_sets_failed_unit_aside(self, queue):
+        """It should mark a unit failed after MAX_ATTEMPTS and queue it again on retry_failed"""
+        queue.enqueue(REPO, "a" * 40, 5, {"Java"})
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            unit = queue.lease("w1")
+            assert queue.release("w1", unit) == ("failed" if attempt == MAX_ATTEMPTS else "pending")
+        assert queue.lease("w1") is None
+        assert queue.retry_failed(REPO) == 1
+        assert queue.lease("w1")["unit"] == unit["unit"]
+
+    def test_heartbeat_keeps_lease(self, tmp_path):
+        """It should keep renewing the lease of a unit while it is crawled"""
+        queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=0.3)
+        try:
+            queue.enqueue(REPO, "a" * 40, 5, {"Java"})
+            unit = queue.lease("w1")
+            heartbeat = Heartbeat(queue, "w1", unit, interval=0.05)
+            heartbeat.start()
+            time.sleep(0.6)
+            assert queue.lease("w2") is None
+            heartbeat.stop()
+            assert not heartbeat.lost
+            time.sleep(0.4)
+            assert queue.lease("w2")["unit"] == unit["unit"]
+        finally:
+            queue.close()
+
+    def test_merge_needs_every_unit(self, queue):
+        """It should refuse to merge a repo with units left"""
+        queue.enqueue(REPO, "a" * 40, 5, {"Java"})
+        with pytest.raises(RuntimeError):
+            queue.file_counts(REPO)
+
+    def test_crawl_and_merge(self, github, queue, tmp_path):
+        """It should merge the units into the counts of a sequential crawl"""
+        repo = SyntheticRepo(REPO, commits=450, seed=3)
+        github(repo)
+        assert enqueue_repo(queue, REPO, ["token"], pages_per_unit=2) == 5
+        assert work(queue, ["token"], owner="w1", concurrency=4) == 3
+
+        output = str(tmp_path / "file_queue.csv")
+        assert merge(queue, REPO, output) == (output, len(expected_counts(repo)))
+        assert queue.file_counts(REPO) == expected_counts(repo)
+        assert load_watermark(output) == {"sha": repo.shas[0], "date": repo.date_of(0)}
+
+    def test_keeps_going_after_failure(self, github, queue):
+        """It should give a failing unit back and crawl the others"""
+        repo = SyntheticRepo(REPO, commits=450, seed=3)
+        github(repo)
+        enqueue_repo(queue, REPO, ["token"], pages_per_unit=2)
+        # a repo the server does not know: its unit fails on every attempt
+        queue.enqueue("mock/missing", "a" * 40, 1, {"Java"})
+        assert work(queue, ["token"], owner="w1", concurrency=4) == 3
+        assert queue.status(REPO) == {"done": 3}
+        assert queue.status("mock/missing") == {"failed": 1}
@@ -0,0 +1,164 @@
+import threading
+import time
+
+# Requests per hour GitHub grants an authenticated / anonymous caller
+AUTHENTICATED_LIMIT = 5000
+ANONYMOUS_LIMIT = 60
+
+
+# Budget of one token, as last reported by GitHub
+class _TokenState:
+    def __init__(self, token):
+        self.token = token
+        self.limit = AUTHENTICATED_LIMIT if token else ANONYMOUS_LIMIT
+        self.remaining = None  # unknown until the first response comes back
+        self.reset = 0.0       # epoch seconds when the budget refills
+        self.unconfirmed = 0   # requests granted while remaining is unknown
+        self.parked = 0.0      # epoch seconds before which the token is not handed out (Retry-After)
+
+    def budget(self):
+        if self.remaining is None:
+            # counted down locally, so that tokens of unknown budget take turns
+            return self.limit - self.unconfirmed
+        return self.remaining
+
+    def usable_at(self):
+        """Epoch time from which the token can be handed out again."""
+        return max(self.parked, self.reset if self.remaining is not None and self.remaining <= 0 else 0.0)
+
+
+class TokenPool:
+    """
+    Hands out GitHub tokens based on their rate-limit budget.
+
+    Every response's X-RateLimit-Remaining / X-RateLimit-Reset headers are fed
+    back with update(), and acquire() always picks the token with the most
+    budget left. When every token is exhausted or parked, acquire() blocks
+    until the earliest one can be used again instead of letting the request
+    fail. A park (exhaust()) is kept apart from the budget's reset: a short
+    Retry-After does not wait for the end of the hour's window.
+    """
+
+    def __init__(self, tokens, clock=time.time):
+        if not tokens:
+            raise ValueError("TokenPool needs at least one token")
+        # the same token listed twice still has a single budget
+        self.states = [_TokenState(token) for token in dict.fromkeys(tokens)]
+        self.clock = clock
+        self.cond = threading.Condition()
+        self.granted = {}  # share name -> requests granted to it
+        self.waiting = {}  # share name -> callers currently blocked in acquire()
+
+    def __len__(self):
+        return len(self.states)
+
+    def share(self, name):
+        """A view of the pool whose requests are counted against name for fairness."""
+        with self.cond:
+            if name not in self.granted:
+                # a late share starts level with the others instead of owing them nothing
+                self.granted[name] = min(self.granted.values(), default=0)
+        return TokenShare(self, name)
+
+    def acquire(self, share=None):
+        """Return the token with the most budget left, waiting for a reset if needed."""
+        with self.cond:
+            if share is not None:
+                self.waiting[share] = self.waiting.get(share, 0) + 1
+            try:
+                while True:
+                    now = self.clock()
+                    for state in self.states:
+                        if state.remaining is not None and state.remaining <= 0 and state.reset <= now:
+                            state.remaining = None  # window rolled over, budget is back
+                            state.unconfirmed = 0
+
+                    available = [s for s in self.states if s.budget() > 0 and s.parked <= now]
+                    if available and self._is_turn_of(share):
+                        best = max(available, key=_TokenState.budget)
+                        if best.remaining is not None:
+                            best.remaining -= 1  # reserve it for the request in flight
+                        else:
+                            best.unconfirmed += 1
+                        if share is not None:
+                            self.granted[share] += 1
+                            self.cond.notify_all()  # the next share in line may go now
+                        return best.token
+
+                    if available:
+                        self.cond.wait()  # another share is behind and goes first
+                        continue
+                    wait = max(min(s.usable_at() for s in self.states) - now, 0) + 1
+                    print(f"All {len(self.states)} tokens are rate limited, waiting {wait:.0f}s for a reset")
+                    self.cond.wait(wait)
+            finally:
+                if share is not None:
+                    self.waiting[share] -= 1
+
+    def _is_turn_of(self, share):
+        if share is None:
+            return True
+        fewest = min(self.granted[name] for name, count in self.waiting.items() if count > 0)
+        return self.granted[share] <= fewest
+
+    def update(self, token, headers):
+        """Record the rate-limit headers of a response sent with token."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        limit = headers.get("X-RateLimit-Limit")
+        if remaining is None or reset is None:
+            return
+
+        remaining, reset = int(remaining), float(reset)
+        with self.cond:
+            state = self._state_for(token)
+            if limit is not None:
+                state.limit = int(limit)
+            # responses can arrive out of order, so only a newer window raises the budget
+            if reset > state.reset or state.remaining is None:
+                state.remaining = remaining
+            else:
+                state.remaining = min(state.remaining, remaining)
+            state.reset = max(state.reset, reset)
+            state.unconfirmed = 0
+            self.cond.notify_all()
+
+    def exhaust(self, token, until):
+        """
+        Park token until the given epoch time (e.g. after a 403/429 or Retry-After).
+        Its budget and reset stay as update() recorded them.
+        """
+        with self.cond:
+            state = self._state_for(token)
+            state.parked = until
+            self.cond.notify_all()
+
+    def _state_for(self, token):
+        for state in self.states:
+            if state.token == token:
+                return state
+        raise KeyError("token is not part of this pool")
+
+
+class TokenShare:
+    """The part of a TokenPool used by one repo; accepted wherever a token list is."""
+
+    def __init__(self, pool, name):
+        self.pool = pool
+        self.name = name
+
+    def __len__(self):
+        return len(self.pool)
+
+    def acquire(self):
+        return self.pool.acquire(self.name)
+
+    def update(self, token, headers):
+        self.pool.update(token, headers)
+
+    def exhaust(self, token, until):
+        self.pool.exhaust(token, until)
+
+    def granted(self):
+        with self.pool.cond:
+            return self.pool.granted[self.name]
@@ -0,0 +1,114 @@
+import os
+
+import pandas as pd
+
+from touch_store import load_touch_store, store_path
+
+# Configurations
+THREADED = True  # use pyarrow's multithreaded CSV reader when it is installed
+PREFER_STORE = True  # read the columnar copy of a touches CSV (touch_store.py) when it is current
+# Read files and authors as categoricals: about a quarter of the memory, but
+# slower than plain strings on the C engine (the codes are built after the parse)
+CATEGORIES = False
+
+# The touch CSVs written by the miners, by header. Column kinds:
+# "file" and "author" are strings (or categoricals), "date" UTC datetimes, "text" strings
+TOUCHES_HEADER = ("Filename", "CommitSHA", "AuthorLogin", "AuthorName", "AuthorEmail", "CommitDate")
+SCHEMAS = {
+    # Richard_authorsFileTouches.py / mining_backends.TOUCHES_HEADER, the only one with a columnar copy
+    TOUCHES_HEADER:
+        {"Filename": "file", "CommitSHA": "text", "AuthorLogin": "author", "AuthorName": "author",
+         "AuthorEmail": "author", "CommitDate": "date"},
+    # Jacob_authorsFileTouches.py
+    ("file", "author", "date"): {"file": "file", "author": "author", "date": "date"},
+    # Thomas_authorsFileTouches.py
+    ("File", "Author", "Date"): {"File": "file", "Author": "author", "Date": "date"},
+    # Matthew-Jackson_authorsFileTouches.py
+    ("Filename", "Author", "Date"): {"Filename": "file", "Author": "author", "Date": "date"},
+    # nevryk_authorsFileTouches.py
+    ("filename", "author", "date"): {"filename": "file", "author": "author", "date": "date"},
+}
+
+CATEGORICAL_KINDS = ("file", "author")
+
+
+def csv_engine(threaded=THREADED):
+    if threaded:
+        try:
+            import pyarrow  # noqa: F401
+            return "pyarrow"
+        except ImportError:
+            pass
+    return "c"
+
+
+def parse_dates(values):
+    """
+    Commit dates (strings) as UTC datetimes, NaT where they do not parse.
+    The format is given as ISO-8601 rather than inferred, which keeps pandas
+    on its vectorised ISO parser for every row (with or without an offset)
+    instead of falling back to per-element parsing when inference fails;
+    each distinct date is parsed once (a commit's date repeats for every
+    file it touches).
+    """
+    return pd.to_datetime(values, format="ISO8601", utc=True, errors="coerce", cache=True)
+
+
+def read_header(path):
+    return tuple(pd.read_csv(path, nrows=0).columns)
+
+
+# @schema, {column: kind}, see SCHEMAS; found from the file's header when None
+# The columnar copy of a touches CSV, if it was written at least as late as the CSV
+def current_store(path):
+    store = store_path(path)
+    if not os.path.exists(os.path.join(store, "dictionary.json")):
+        return None
+    if os.path.exists(path) and os.path.getmtime(store) < os.path.getmtime(path):
+        return None
+    return store
+
+
+# @usecols, only read these columns
+# @categories, read files and authors as categoricals, see CATEGORIES
+# @prefer_store, read the columnar copy instead when there is a current one, see PREFER_STORE
+def read_touch_csv(path, schema=None, usecols=None, threaded=THREADED, categories=CATEGORIES,
+                   prefer_store=PREFER_STORE):
+    """
+    A touch CSV with typed columns: UTC datetime dates, files and authors as
+    strings or categoricals. Parsing text costs most of the time even with
+    pyarrow; when the miner also wrote the touches as a columnar store, the
+    same DataFrame is built from its memory-mapped columns instead.
+    """
+    store = current_store(path) if prefer_store else None
+    if store is not None and schema in (None, SCHEMAS[TOUCHES_HEADER]):
+        return read_store(store, usecols, categories)
+    if schema is None:
+        header = read_header(path)
+        if header not in SCHEMAS:
+            raise ValueError(f"{path}: unknown touch CSV header {header}")
+        schema = SCHEMAS[header]
+    columns = [c for c in schema if usecols is None or c in usecols]
+    # every column is read as strings: a category dtype in read_csv is slower still
+    df = pd.read_csv(path, usecols=columns, dtype=str, engine=csv_engine(threaded))
+    for column in columns:
+        if schema[column] == "date":
+            df[column] = parse_dates(df[column])
+        elif categories and schema[column] in CATEGORICAL_KINDS:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_store(store, usecols=None, categories=CATEGORIES):
+    """The touches of a columnar store as read_touch_csv returns them from its CSV."""
+    columns = [c for c in TOUCHES_HEADER if usecols is None or c in usecols]
+    df = load_touch_store(store).to_dataframe(with_sha="CommitSHA" in columns)[columns]
+    if "CommitDate" in columns:
+        # the store keeps whole seconds; parse_dates picks pandas' default resolution
+        df["CommitDate"] = df["CommitDate"].astype(parse_dates(pd.Series(["1970-01-01T00:00:00Z"])).dtype)
+    if not categories:
+        for column in columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                # typed as read_csv(dtype=str) types them, missing values included
+                df[column] = pd.Series(df[column].to_numpy(dtype=object), index=df.index, dtype=str)
+    return df
@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from touch_csv import read_touch_csv
+from touch_store import store_path
+
+# Format of the saved cube; bump it when the layout changes
+CUBE_VERSION = 2
+
+# Configurations
+CSV_PATH = "data/file_touches_authors_dates.csv"
+AUTHOR_COL = "AuthorLogin"
+DATE_COL = "CommitDate"
+FILE_COL = "Filename"
+TOP_N = 15
+
+
+# Where the cube of a touches CSV is kept:
+# data/file_touches_authors_dates.csv -> data/file_touches_authors_dates.cube.npz
+def cube_path(csv_path):
+    base = csv_path[:-3] if csv_path.endswith(".gz") else csv_path
+    return os.path.splitext(base)[0] + ".cube.npz"
+
+
+class TouchCube:
+    """
+    Touches counted per (file, author, project week), kept sparse: one entry
+    per non-empty cell in the parallel arrays file_id, author_id, week and
+    count.
+
+    Files are short names (basenames), as the figures show them, authors are
+    AUTHOR_COL with "unknown" for a missing author, both numbered in order of
+    first appearance in the touches, and week 0 is the (Monday-started) week
+    of the first touch, project_start. Every figure and ranking is a sum over
+    some of the cells, so none needs the touches.
+    """
+
+    def __init__(self, files, authors, project_start, file_id, author_id, week, count):
+        self.files = np.asarray(files, dtype=object)
+        self.authors = np.asarray(authors, dtype=object)
+        self.project_start = pd.Timestamp(project_start)
+        self.file_id = np.asarray(file_id, dtype=np.int32)
+        self.author_id = np.asarray(author_id, dtype=np.int32)
+        self.week = np.asarray(week, dtype=np.int32)
+        self.count = np.asarray(count, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.count)
+
+    def touches(self):
+        return int(self.count.sum())
+
+    def week_start(self, week):
+        return self.project_start + pd.to_timedelta(np.asarray(week) * 7, unit="D")
+
+    def _totals(self, ids, names):
+        totals = pd.Series(np.bincount(ids, weights=self.count, minlength=len(names)).astype(np.int64),
+                           index=pd.Index(names, dtype=object))
+        totals = totals[totals > 0]
+        # most touched first, ties in order of first appearance (ids are), as value_counts() has them
+        return totals.iloc[np.argsort(-totals.to_numpy(), kind="stable")]
+
+    def file_totals(self):
+        """Touches per file, most touched first."""
+        return self._totals(self.file_id, self.files)
+
+    def author_totals(self):
+        """Touches per author, most touches first."""
+        return self._totals(self.author_id, self.authors)
+
+    def cells_of_files(self, files):
+        """Index of the cells of the given files, and the position of each one's file in files."""
+        position = np.full(len(self.files), -1)
+        lookup = {name: i for i, name in enumerate(self.files)}
+        position[[lookup[f] for f in files]] = np.arange(len(files))
+        cells = np.flatnonzero(position[self.file_id] >= 0)
+        return cells, position[self.file_id[cells]]
+
+    def save(self, path, source=None):
+        """Write the cube; source identifies the data it was built from (see cube_for)."""
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, file_id=self.file_id, author_id=self.author_id, week=self.week, count=self.count,
+                 meta=np.array(json.dumps({
+                     "version": CUBE_VERSION, "source": source,
+                     "project_start": self.project_start.isoformat(),
+                     "files": self.files.tolist(), "authors": self.authors.tolist()})))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != CUBE_VERSION:
+                raise ValueError(f"{path} has version {meta['version']}, expected {CUBE_VERSION}")
+            cube = cls(meta["files"], meta["authors"], meta["project_start"],
+                       data["file_id"], data["author_id"], data["week"], data["count"])
+        cube.source = meta["source"]
+        return cube
+
+
+def build_cube(df, file_col=FILE_COL, author_col=AUTHOR_COL, date_col=DATE_COL):
+    """Count the touches of a touches DataFrame (CommitDate parsed to UTC datetimes) into a cube."""
+    df = df.dropna(subset=[date_col, file_col])
+    dates = df[date_col]
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    day = dates.dt.normalize()
+    week_start = day - pd.to_timedelta(day.dt.weekday, unit="D")  # the week's Monday
+    project_start = week_start.min()
+    week = ((week_start - project_start).dt.days // 7).to_numpy()
+
+    # short file names; basename per distinct file, not per touch. Files and authors
+    # are numbered in order of first appearance, which is how rankings break ties
+    # (as plain strings: a categorical would be numbered in category order)
+    file_codes, file_names = pd.factorize(np.asarray(df[file_col], dtype=object))
+    short_codes, short_names = pd.factorize(pd.Index(file_names).map(os.path.basename))
+    file_id = short_codes[file_codes]
+    author_id, authors = pd.factorize(df[author_col].astype(object).fillna("unknown").astype(str))
+
+    n_weeks = int(week.max()) + 1 if len(week) else 1
+    keys = (file_id.astype(np.int64) * len(authors) + author_id) * n_weeks + week
+    cells, count = np.unique(keys, return_counts=True)
+    rest, week = np.divmod(cells, n_weeks)
+    file_id, author_id = np.divmod(rest, max(len(authors), 1))
+    return TouchCube(short_names, authors, project_start, file_id, author_id, week, count)
+
+
+# @usecols, only read these columns
+def read_touches(csv_path, usecols=None):
+    """The touches as a DataFrame: from the columnar store when it is current, else from the CSV."""
+    return read_touch_csv(csv_path, usecols=usecols)
+
+
+# What a cube was built from: the touches CSV and its store, by size and modification time
+def _source_signature(csv_path, columns):
+    signature = {"columns": list(columns)}
+    for path in (csv_path, os.path.join(store_path(csv_path), "dictionary.json")):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature[path] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def cube_for(csv_path=CSV_PATH, file_col=FILE_COL, author_col=AUTHOR_COL, date_col=DATE_COL, path=None):
+    """
+    The cube of a touches CSV. It is built once and saved next to the CSV;
+    while the CSV and its store are unchanged it is loaded from there
+    without reading the touches at all.
+    """
+    path = path or cube_path(csv_path)
+    source = _source_signature(csv_path, (file_col, author_col, date_col))
+    if os.path.exists(path):
+        try:
+            cube = TouchCube.load(path)
+            if cube.source == source:
+                return cube
+        except (ValueError, KeyError, OSError):
+            pass  # an old or damaged cube is rebuilt
+    cube = build_cube(read_touches(csv_path, (file_col, author_col, date_col)), file_col, author_col, date_col)
+    cube.save(path, source)
+    return cube
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Top and bottom authors and files of a touches CSV.")
+    parser.add_argument("csv", nargs="?", default=CSV_PATH)
+    parser.add_argument("-n", type=int, default=TOP_N)
+    args = parser.parse_args(argv)
+
+    cube = cube_for(args.csv)
+    authors, files = cube.author_totals(), cube.file_totals()
+    print(f"{cube.touches()} touches, {len(files)} files, {len(authors)} authors, "
+          f"{int(cube.week.max()) + 1 if len(cube) else 0} weeks from {cube.project_start.date()}")
+    for title, ranking in [("Top authors", authors.head(args.n)), ("Top files", files.head(args.n)),
+                           ("Bottom authors", authors.tail(args.n)), ("Bottom files", files.tail(args.n))]:
+        print(f"\n{title}")
+        for name, touches in ranking.items():
+            print(f"{touches:8d}  {name}")
+
+
+if __name__ == "__main__":
+    main()
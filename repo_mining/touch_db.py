@@ -0,0 +1,302 @@
+import argparse
+import calendar
+import csv
+import gzip
+import os
+import sqlite3
+import sys
+import time
+
+from touch_table import NO_DATE, date_to_epoch, epoch_to_date
+
+# Configurations
+TOUCH_DB = "data/touches.sqlite"
+BATCH_SIZE = 10000  # rows inserted per executemany
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    login TEXT NOT NULL DEFAULT '',   -- '' when the commit author has no GitHub account
+    name TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    UNIQUE (login, name, email)
+);
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    sha TEXT NOT NULL UNIQUE,
+    author_id INTEGER NOT NULL REFERENCES authors (id),
+    date INTEGER                       -- epoch seconds, UTC
+);
+CREATE TABLE IF NOT EXISTS touches (
+    commit_id INTEGER NOT NULL REFERENCES commits (id),
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    PRIMARY KEY (commit_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS touches_file ON touches (file_id, commit_id);
+CREATE INDEX IF NOT EXISTS commits_date ON commits (date);
+CREATE INDEX IF NOT EXISTS commits_author ON commits (author_id, date);
+"""
+
+
+class TouchDB:
+    """
+    The mined touches, normalised into files, authors, commits and touches.
+
+    Inserting is idempotent (a commit is keyed by its SHA, a touch by its
+    commit and file), so the output of a new crawl can be added on top of an
+    old one and overlapping rows are simply skipped.
+    """
+
+    def __init__(self, path=TOUCH_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.file_ids = {}
+        self.author_ids = {}
+        self.commit_ids = {}
+        self.pending = []
+        self.inserted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def add(self, filename, sha, author_login, author_name, author_email, date_iso):
+        """Queue one touch; rows reach the database in batches (see flush)."""
+        self.pending.append((filename, sha, author_login or "", author_name or "", author_email or "",
+                             date_iso))
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    # a touches CSV row (see mining_backends.touch_row) has the same fields, in the same order
+    def writerow(self, row):
+        self.add(*row)
+
+    def flush(self):
+        if not self.pending:
+            return
+        with self.db:
+            touches = []
+            for filename, sha, login, name, email, date_iso in self.pending:
+                commit_id = self._commit_id(sha, self._author_id(login, name, email), date_iso)
+                touches.append((commit_id, self._file_id(filename)))
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO touches VALUES (?, ?)", touches)
+            self.inserted += self.db.total_changes - before
+        self.pending = []
+
+    def _file_id(self, path):
+        file_id = self.file_ids.get(path)
+        if file_id is None:
+            self.db.execute("INSERT OR IGNORE INTO files (path) VALUES (?)", (path,))
+            file_id = self.file_ids[path] = self.db.execute(
+                "SELECT id FROM files WHERE path = ?", (path,)).fetchone()[0]
+        return file_id
+
+    def _author_id(self, login, name, email):
+        key = (login, name, email)
+        author_id = self.author_ids.get(key)
+        if author_id is None:
+            self.db.execute("INSERT OR IGNORE INTO authors (login, name, email) VALUES (?, ?, ?)", key)
+            author_id = self.author_ids[key] = self.db.execute(
+                "SELECT id FROM authors WHERE login = ? AND name = ? AND email = ?", key).fetchone()[0]
+        return author_id
+
+    def _commit_id(self, sha, author_id, date_iso):
+        commit_id = self.commit_ids.get(sha)
+        if commit_id is None:
+            self.db.execute("INSERT OR IGNORE INTO commits (sha, author_id, date) VALUES (?, ?, ?)",
+                            (sha, author_id, _epoch_or_none(date_iso)))
+            commit_id = self.commit_ids[sha] = self.db.execute(
+                "SELECT id FROM commits WHERE sha = ?", (sha,)).fetchone()[0]
+        return commit_id
+
+    def import_csv(self, path):
+        """Add the rows of a Filename,CommitSHA,AuthorLogin,AuthorName,AuthorEmail,CommitDate CSV (.gz too)."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                if len(row) == 6 and row[1]:
+                    self.add(*row)
+        self.flush()
+
+    def import_store(self, path):
+        """Add the rows of a columnar touch store (see touch_store.py)."""
+        from touch_store import load_touch_store
+
+        store = load_touch_store(path)
+        for i in range(len(store)):
+            sha = store.sha[i]
+            if not sha.any():
+                continue
+            login, name, email = store.authors[store.author_id[i]]
+            self.add(store.files[store.file_id[i]], bytes(sha).hex(), login, name, email,
+                     epoch_to_date(int(store.date[i])))
+        self.flush()
+
+    # Queries; since/until are epoch seconds (until exclusive), None for no bound
+
+    def top_files(self, n=15, since=None, until=None, author=None):
+        return self.db.execute(
+            "SELECT files.path, COUNT(*) AS touches FROM touches "
+            "JOIN commits ON commits.id = touches.commit_id JOIN files ON files.id = touches.file_id "
+            "WHERE " + _date_filter(since, until) + " AND " + _author_filter(author) +
+            " GROUP BY files.id ORDER BY touches DESC, files.path LIMIT ?",
+            _date_args(since, until) + _author_args(author) + [n]).fetchall()
+
+    def top_authors(self, n=15, since=None, until=None, file=None):
+        return self.db.execute(
+            "SELECT " + _AUTHOR_LABEL + ", COUNT(*) AS touches FROM touches "
+            "JOIN commits ON commits.id = touches.commit_id JOIN authors ON authors.id = commits.author_id "
+            "WHERE " + _date_filter(since, until) + " AND " + _file_filter(file) +
+            " GROUP BY 1 ORDER BY touches DESC, 1 LIMIT ?",
+            _date_args(since, until) + _file_args(file) + [n]).fetchall()
+
+    def file_timeline(self, file, since=None, until=None):
+        """(date, sha, author, path) of every commit touching file, oldest first."""
+        return [(epoch_to_date(date) if date is not None else None, sha, author, path) for date, sha, author, path in self.db.execute(
+            "SELECT commits.date, commits.sha, " + _AUTHOR_LABEL + ", files.path FROM touches "
+            "JOIN commits ON commits.id = touches.commit_id JOIN authors ON authors.id = commits.author_id "
+            "JOIN files ON files.id = touches.file_id "
+            "WHERE " + _file_filter(file) + " AND " + _date_filter(since, until) +
+            " ORDER BY commits.date", _file_args(file) + _date_args(since, until))]
+
+    def author_activity(self, author, since=None, until=None, period="month"):
+        """(period, commits, touches, files) for author, oldest period first."""
+        fmt = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m", "year": "%Y"}[period]
+        return self.db.execute(
+            "SELECT strftime(?, commits.date, 'unixepoch') AS period, COUNT(DISTINCT commits.id), "
+            "COUNT(*), COUNT(DISTINCT touches.file_id) FROM touches "
+            "JOIN commits ON commits.id = touches.commit_id JOIN authors ON authors.id = commits.author_id "
+            "WHERE " + _author_filter(author) + " AND " + _date_filter(since, until) +
+            " GROUP BY period ORDER BY period", [fmt] + _author_args(author) + _date_args(since, until)).fetchall()
+
+    def stats(self):
+        return {table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("files", "authors", "commits", "touches")}
+
+
+_AUTHOR_LABEL = "COALESCE(NULLIF(authors.login, ''), authors.name)"
+
+
+# only the bounds that are set, so that SQLite can range-scan the commits_date index
+def _date_filter(since, until):
+    bounds = []
+    if since is not None:
+        bounds.append("commits.date >= ?")
+    if until is not None:
+        bounds.append("commits.date < ?")
+    return " AND ".join(bounds) or "1"
+
+
+def _date_args(since, until):
+    return [bound for bound in (since, until) if bound is not None]
+
+
+def _author_filter(author):
+    if author is None:
+        return "1"
+    return "commits.author_id IN (SELECT id FROM authors WHERE login = ? OR name = ? OR email = ?)"
+
+
+def _author_args(author):
+    return [] if author is None else [author, author, author]
+
+
+# a file is given by its path or just its name ("RootBeer.java")
+def _file_filter(file):
+    if file is None:
+        return "1"
+    return "touches.file_id IN (SELECT id FROM files WHERE path = ? OR path LIKE ? ESCAPE '\\')"
+
+
+def _file_args(file):
+    if file is None:
+        return []
+    escaped = file.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return [file, "%/" + escaped]
+
+
+def _epoch_or_none(date_iso):
+    epoch = date_to_epoch(date_iso)
+    return None if epoch == NO_DATE else epoch
+
+
+def parse_bound(value):
+    """'2023', '2023-04' or '2023-04-01' (UTC) as epoch seconds at the start of that period."""
+    if value is None:
+        return None
+    parts = [int(p) for p in value[:10].split("-")]
+    year, month, day = (parts + [1, 1])[:3]
+    return calendar.timegm((year, month, day, 0, 0, 0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the mined file touches.")
+    parser.add_argument("--db", default=TOUCH_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    imported = commands.add_parser("import", help="add touches CSVs (.csv, .csv.gz) or .touches stores")
+    imported.add_argument("paths", nargs="+")
+
+    def add_range(command):
+        command.add_argument("--since", help="from this date on, e.g. 2023 or 2023-04-01")
+        command.add_argument("--until", help="before this date (exclusive), e.g. 2024")
+        return command
+
+    top_files = add_range(commands.add_parser("top-files", help="most touched files"))
+    top_files.add_argument("-n", type=int, default=15)
+    top_files.add_argument("--author")
+    top_authors = add_range(commands.add_parser("top-authors", help="authors with the most touches"))
+    top_authors.add_argument("-n", type=int, default=15)
+    top_authors.add_argument("--file")
+    timeline = add_range(commands.add_parser("file", help="who touched a file and when"))
+    timeline.add_argument("file", help="path, or just the file name")
+    activity = add_range(commands.add_parser("author", help="activity of an author over time"))
+    activity.add_argument("author", help="login, name or email")
+    activity.add_argument("--by", choices=["day", "week", "month", "year"], default="month")
+    commands.add_parser("stats", help="number of files, authors, commits and touches")
+    args = parser.parse_args(argv)
+
+    with TouchDB(args.db) as db:
+        start = time.perf_counter()
+        since, until = parse_bound(getattr(args, "since", None)), parse_bound(getattr(args, "until", None))
+        if args.command == "import":
+            for path in args.paths:
+                if os.path.isdir(path):
+                    db.import_store(path)
+                else:
+                    db.import_csv(path)
+            rows = [("new touches", db.inserted)] + list(db.stats().items())
+        elif args.command == "top-files":
+            rows = db.top_files(args.n, since, until, args.author)
+        elif args.command == "top-authors":
+            rows = db.top_authors(args.n, since, until, args.file)
+        elif args.command == "file":
+            rows = db.file_timeline(args.file, since, until)
+        elif args.command == "author":
+            rows = db.author_activity(args.author, since, until, args.by)
+        else:
+            rows = list(db.stats().items())
+        elapsed = (time.perf_counter() - start) * 1000
+
+    writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+    writer.writerows(rows)
+    print(f"({len(rows)} rows, {elapsed:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from touch_table import TouchTable, NO_DATE, SHA_BYTES
+
+# Format of the dictionary sidecar; bump it when the layout changes
+STORE_VERSION = 1
+
+# Rows kept in memory before the columns are appended to disk
+FLUSH_EVERY = 65536
+
+# name, dtype and TouchTable attribute of every column
+COLUMNS = [
+    ("file_id", np.uint32, "file_ids"),
+    ("author_id", np.uint32, "author_ids"),
+    ("date", np.int64, "dates"),
+    ("sha", np.uint8, "shas"),  # SHA_BYTES per row
+]
+
+
+# Where the columnar copy of a touches CSV lives:
+# data/file_touches_authors_dates.csv(.gz) -> data/file_touches_authors_dates.touches/
+def store_path(csv_path):
+    base = csv_path[:-3] if csv_path.endswith(".gz") else csv_path
+    return os.path.splitext(base)[0] + ".touches"
+
+
+class TouchStoreWriter:
+    """
+    Writes touches as memory-mappable .npy columns plus a dictionary sidecar:
+
+        file_id.npy    uint32   index into dictionary.json "files"
+        author_id.npy  uint32   index into dictionary.json "authors" ([login, name, email])
+        date.npy       int64    commit date, epoch seconds UTC (NO_DATE when missing)
+        sha.npy        uint8    (rows, 20) raw commit SHAs
+
+    Rows are interned through a TouchTable and appended to raw column files
+    every FLUSH_EVERY rows, so memory only grows with the number of distinct
+    files and authors. close() turns the raw files into .npy and writes
+    dictionary.json last: a store without it is incomplete.
+    """
+
+    def __init__(self, path, flush_every=FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.table = TouchTable()
+        self.rows = 0
+        self.closed = False
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        self.raw = {name: open(os.path.join(path, name + ".raw"), "wb") for name, _, _ in COLUMNS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, filename, sha, author_login, author_name, author_email, date_iso):
+        self.table.append(filename, sha, author_login, author_name, author_email, date_iso)
+        self.rows += 1
+        if len(self.table) >= self.flush_every:
+            self.flush()
+
+    # a touches CSV row (see mining_backends.touch_row) has the same fields, in the same order
+    def writerow(self, row):
+        self.append(*row)
+
+    def flush(self):
+        for name, _, attribute in COLUMNS:
+            self.raw[name].write(getattr(self.table, attribute).tobytes()
+                                 if attribute != "shas" else bytes(self.table.shas))
+            del getattr(self.table, attribute)[:]
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        for name, dtype, _ in COLUMNS:
+            self.raw[name].close()
+            shape = (self.rows, SHA_BYTES) if name == "sha" else (self.rows,)
+            _raw_to_npy(os.path.join(self.path, name + ".raw"), os.path.join(self.path, name + ".npy"),
+                        dtype, shape)
+        with open(os.path.join(self.path, "dictionary.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": STORE_VERSION, "rows": self.rows,
+                       "files": self.table.files.values,
+                       "authors": [list(author) for author in self.table.authors.values]}, f)
+
+
+def _raw_to_npy(raw_path, npy_path, dtype, shape):
+    with open(npy_path, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_1_0(out, {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                   "fortran_order": False, "shape": shape})
+        shutil.copyfileobj(raw, out, 1 << 20)
+    os.remove(raw_path)
+
+
+def write_touch_store(path, table):
+    """Write a whole TouchTable (or any iterable of touch row dicts) as a store."""
+    with TouchStoreWriter(path) as writer:
+        for r in table:
+            writer.append(r["filename"], r["sha"], r["author_login"], r["author_name"], r["author_email"],
+                          r["date_iso"])
+
+
+class TouchStore:
+    """A store opened for reading: the columns are memory-mapped, not read."""
+
+    def __init__(self, path, mmap=True):
+        with open(os.path.join(path, "dictionary.json"), encoding="utf-8") as f:
+            dictionary = json.load(f)
+        if dictionary["version"] != STORE_VERSION:
+            raise ValueError(f"{path} has version {dictionary['version']}, expected {STORE_VERSION}")
+        self.path = path
+        self.files = dictionary["files"]
+        self.authors = [tuple(author) for author in dictionary["authors"]]
+        mode = "r" if mmap else None
+        self.file_id = np.load(os.path.join(path, "file_id.npy"), mmap_mode=mode)
+        self.author_id = np.load(os.path.join(path, "author_id.npy"), mmap_mode=mode)
+        self.date = np.load(os.path.join(path, "date.npy"), mmap_mode=mode)
+        self.sha = np.load(os.path.join(path, "sha.npy"), mmap_mode=mode)
+
+    def __len__(self):
+        return len(self.file_id)
+
+    def to_dataframe(self, with_sha=False):
+        """
+        The touches as a DataFrame with the columns of the touches CSV.
+        Filename and the author columns are categoricals built straight from
+        the stored codes and CommitDate is already a UTC datetime, so nothing
+        is parsed. CommitSHA (hex strings) is only built when asked for.
+        """
+        import pandas as pd
+
+        def categorical(codes, categories):
+            return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int32), categories=categories)
+
+        data = {"Filename": categorical(self.file_id, self.files)}
+        if with_sha:
+            data["CommitSHA"] = sha_hex(self.sha)
+        for i, column in enumerate(["AuthorLogin", "AuthorName", "AuthorEmail"]):
+            # authors are (login, name, email) triples: recode each part on its own
+            # (an empty value is missing, as it reads back from the CSV)
+            values = [author[i] for author in self.authors]
+            categories = sorted({v for v in values if v})
+            index = {v: code for code, v in enumerate(categories)}
+            author_to_code = np.array([index[v] if v else -1 for v in values] or [0], dtype=np.int32)
+            data[column] = categorical(author_to_code[self.author_id], categories)
+        dates = np.asarray(self.date)
+        commit_date = pd.to_datetime(np.where(dates == NO_DATE, 0, dates), unit="s", utc=True)
+        data["CommitDate"] = commit_date.where(dates != NO_DATE)
+        return pd.DataFrame(data)
+
+
+# Hex digits of every (rows, SHA_BYTES) raw SHA at once, None for a missing (all-zero) one
+def sha_hex(shas):
+    shas = np.asarray(shas, dtype=np.uint8).reshape(-1, SHA_BYTES)
+    digits = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+    chars = np.empty((len(shas), SHA_BYTES * 2), dtype=np.uint8)
+    chars[:, 0::2] = digits[shas >> 4]
+    chars[:, 1::2] = digits[shas & 0x0F]
+    hexes = chars.view(f"S{SHA_BYTES * 2}").ravel().astype(f"U{SHA_BYTES * 2}").astype(object)
+    hexes[~shas.any(axis=1)] = None
+    return hexes
+
+
+def load_touch_store(path, mmap=True):
+    return TouchStore(path, mmap)
@@ -0,0 +1,113 @@
+import array
+import calendar
+import datetime
+
+# Dates are kept as epoch seconds; this one stands for a missing date
+NO_DATE = -(1 << 63)
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+SHA_BYTES = 20
+
+
+class StringPool:
+    """Interns values (strings, or tuples of strings) to dense integer ids, in first-seen order."""
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def date_to_epoch(date_iso):
+    if not date_iso:
+        return NO_DATE
+    date = datetime.datetime.fromisoformat(date_iso.replace("Z", "+00:00"))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return calendar.timegm(date.utctimetuple())
+
+
+def epoch_to_date(epoch):
+    if epoch == NO_DATE:
+        return None
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime(DATE_FORMAT)
+
+
+class TouchTable:
+    """
+    Column store of file touches: one (file, commit, author, date) per row.
+
+    Filenames and authors (login, name, email) are interned once and rows only
+    hold their ids; SHAs are packed as 20 raw bytes and dates as epoch seconds
+    (in UTC). A touch costs 36 bytes instead of a dict and its strings, and the
+    rows come back out as the same dicts, so the same CSVs can be written.
+    """
+    __slots__ = ("files", "authors", "file_ids", "author_ids", "shas", "dates")
+
+    def __init__(self):
+        self.files = StringPool()
+        self.authors = StringPool()
+        self.file_ids = array.array("I")
+        self.author_ids = array.array("I")
+        self.shas = bytearray()
+        self.dates = array.array("q")
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    def append(self, filename, sha, author_login, author_name, author_email, date_iso):
+        self.file_ids.append(self.files.intern(filename))
+        self.author_ids.append(self.authors.intern((author_login, author_name, author_email)))
+        self.shas += bytes.fromhex(sha) if sha else bytes(SHA_BYTES)
+        self.dates.append(date_to_epoch(date_iso))
+
+    def add(self, r):
+        """Append a touch given as a row dict (the format of mine_touches and collect_file_touches)."""
+        self.append(r["filename"], r["sha"], r["author_login"], r["author_name"], r["author_email"],
+                    r["date_iso"])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        author_login, author_name, author_email = self.authors.values[self.author_ids[i]]
+        sha = self.shas[i * SHA_BYTES:(i + 1) * SHA_BYTES]
+        return {
+            "filename": self.files.values[self.file_ids[i]],
+            "sha": sha.hex() if any(sha) else None,
+            "author_login": author_login,
+            "author_name": author_name,
+            "author_email": author_email,
+            "date_iso": epoch_to_date(self.dates[i]),
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def file_counts(self):
+        """{filename: touches}, files in the order they were first seen."""
+        counts = [0] * len(self.files)
+        for file_id in self.file_ids:
+            counts[file_id] += 1
+        return dict(zip(self.files.values, counts))
+
+    def by_file(self):
+        """The rows grouped by file (files in first-seen order, touches in insertion order)."""
+        order = sorted(range(len(self)), key=self.file_ids.__getitem__)
+        for i in order:
+            yield self[i]
+
+    def nbytes(self):
+        """Memory held by the columns (the interned strings are not counted)."""
+        return (self.file_ids.itemsize * len(self.file_ids) + self.author_ids.itemsize * len(self.author_ids)
+                + len(self.shas) + self.dates.itemsize * len(self.dates))
@@ -0,0 +1,102 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+
+from crawl_journal import journal_path
+
+
+# Where the watermark of an output CSV is kept: data/file_rootbeer.csv -> data/file_rootbeer.watermark.json
+def watermark_path(output_csv):
+    return os.path.splitext(output_csv)[0] + ".watermark.json"
+
+
+def load_watermark(output_csv):
+    """
+    Return the newest commit seen by the run that wrote output_csv, as
+    {"sha": ..., "date": ...}, or None when the history must be crawled from scratch.
+    """
+    path = watermark_path(output_csv)
+    if not os.path.exists(output_csv) or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        watermark = json.load(f)
+    # the CSV was replaced but the run died before saving the watermark that goes with it
+    stamp = watermark.pop("csv", None)
+    if stamp is not None and stamp != csv_stamp(output_csv):
+        return None
+    return watermark
+
+
+# Size and modification time of output_csv, saved with its watermark
+def csv_stamp(output_csv):
+    st = os.stat(output_csv)
+    return [st.st_size, st.st_mtime_ns]
+
+
+# Save the watermark once output_csv has been written (atomically, so a crash
+# leaves either the old watermark or the new one)
+def save_watermark(output_csv, watermark):
+    if watermark is None:
+        return
+    entry = dict(watermark)
+    if os.path.exists(output_csv):
+        entry["csv"] = csv_stamp(output_csv)
+    path = watermark_path(output_csv)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# The counts of output_csv were rewritten: the watermark moves to the newest
+# commit they include, or is dropped when it is not known, so that the next
+# incremental run does not count the same commits again. The journal of a
+# half-done crawl is dropped first: a crash must not leave it next to a
+# watermark that already covers its commits.
+def reset_watermark(output_csv, watermark=None):
+    if os.path.exists(journal_path(output_csv)):
+        os.remove(journal_path(output_csv))
+    if watermark is not None:
+        save_watermark(output_csv, watermark)
+    elif os.path.exists(watermark_path(output_csv)):
+        os.remove(watermark_path(output_csv))
+
+
+# Watermark of a commit from the commits listing: its SHA and committer date,
+# which is what the listing's since= parameter filters on
+def watermark_of(shaObject):
+    commitMeta = shaObject.get("commit") or {}
+    committer = commitMeta.get("committer") or commitMeta.get("author") or {}
+    return {"sha": shaObject["sha"], "date": committer.get("date")}
+
+
+# Add new touch counts to the Filename,Touches CSV written by a previous run
+def merge_file_counts(output_csv, dictfiles):
+    merged = {}
+    if os.path.exists(output_csv):
+        with open(output_csv, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                if row:
+                    merged[row[0]] = int(row[1])
+    for filename, count in dictfiles.items():
+        merged[filename] = merged.get(filename, 0) + count
+    return merged
+
+
+# Write new rows (newest first) in front of the rows of a previous run
+def prepend_csv_rows(output_csv, header, rows):
+    os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_csv) or ".", suffix=".csv")
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(header)
+        writer.writerows(rows)
+        if os.path.exists(output_csv):
+            with open(output_csv, newline="", encoding="utf-8") as old:
+                old.readline()  # header
+                shutil.copyfileobj(old, out)
+    os.replace(tmp_path, output_csv)
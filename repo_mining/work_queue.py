@@ -0,0 +1,364 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from async_fetch import crawl_commit_details, API_URL, DEFAULT_CONCURRENCY
+from github_api import github_auth, github_request, last_page
+from mining_backends import write_file_counts_csv
+from RichardSserunjogi_CollectFiles import get_repo_languages, output_csv_for
+from source_classifier import classifier_for
+from watermark import watermark_of
+
+# Configurations
+QUEUE_DB = "data/work_queue.sqlite"  # put it on the shared filesystem to spread workers over machines
+PAGES_PER_UNIT = 10    # listing pages (of 100 commits) per work unit
+LEASE_SECONDS = 300    # a unit whose worker stopped renewing its lease for this long is handed out again
+MAX_ATTEMPTS = 3       # a unit that failed this many times is marked failed instead of pending
+PER_PAGE = 100
+
+# put your tokens here
+# Remember to empty the list when going to commit to GitHub.
+lstTokens = [""]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    head TEXT NOT NULL,          -- commit whose history is crawled, so pages do not shift
+    pages INTEGER NOT NULL,
+    languages TEXT NOT NULL,     -- JSON list, from the /languages endpoint
+    head_date TEXT               -- committer date of head, for the watermark of the merged CSV
+);
+CREATE TABLE IF NOT EXISTS units (
+    repo TEXT NOT NULL,
+    unit INTEGER NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',   -- pending, leased, done or failed
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, unit)
+);
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    unit INTEGER NOT NULL,
+    position INTEGER NOT NULL,   -- place of the commit in the history, newest first
+    sha TEXT NOT NULL,
+    files TEXT NOT NULL,         -- JSON list of the source files it touched
+    PRIMARY KEY (repo, unit, position)
+);
+"""
+
+
+class WorkQueue:
+    """
+    Durable queue of countfiles work units, kept in SQLite so that several
+    processes, or several machines sharing the database file, can crawl one
+    repo at once.
+
+    A unit is a range of listing pages of a pinned head commit. Workers take a
+    lease on a unit and keep renewing it while they crawl (see Heartbeat); a
+    unit whose lease expired (its worker died) goes back to the next worker
+    that asks. A unit's commits are stored in the same transaction that marks
+    it done, and only by the worker still holding its lease, so a unit is
+    never counted twice. A unit that failed MAX_ATTEMPTS times is set aside
+    as failed until retry_failed() queues it again.
+    """
+
+    def __init__(self, path=QUEUE_DB, lease_seconds=LEASE_SECONDS, clock=time.time):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        # autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.executescript(SCHEMA)
+        # queues created before head_date was recorded
+        if "head_date" not in [row[1] for row in self.db.execute("PRAGMA table_info(repos)")]:
+            self.db.execute("ALTER TABLE repos ADD COLUMN head_date TEXT")
+
+    def close(self):
+        self.db.close()
+
+    def _transaction(self):
+        return _Transaction(self.db)
+
+    def enqueue(self, repo, head, pages, languages, pages_per_unit=PAGES_PER_UNIT, head_date=None):
+        """Split the crawl of repo into units; does nothing if repo is already queued."""
+        with self._transaction():
+            if self.db.execute("SELECT 1 FROM repos WHERE repo = ?", (repo,)).fetchone():
+                return False
+            self.db.execute("INSERT INTO repos (repo, head, pages, languages, head_date) VALUES (?, ?, ?, ?, ?)",
+                            (repo, head, pages, json.dumps(sorted(languages)), head_date))
+            for unit, first in enumerate(range(1, pages + 1, pages_per_unit)):
+                self.db.execute("INSERT INTO units (repo, unit, first_page, last_page) VALUES (?, ?, ?, ?)",
+                                (repo, unit, first, min(first + pages_per_unit - 1, pages)))
+            return True
+
+    def lease(self, owner, repo=None):
+        """Take the next pending (or expired) unit; returns a dict describing it, or None if none is left."""
+        now = self.clock()
+        with self._transaction():
+            query = ("SELECT units.repo, unit, first_page, last_page, head, languages FROM units "
+                     "JOIN repos USING (repo) "
+                     "WHERE (state = 'pending' OR (state = 'leased' AND lease_until < ?))")
+            args = [now]
+            if repo is not None:
+                query += " AND units.repo = ?"
+                args.append(repo)
+            # units that failed before go last, so one bad unit does not hold up the others
+            row = self.db.execute(query + " ORDER BY units.repo, attempts, unit LIMIT 1", args).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE units SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                            "WHERE repo = ? AND unit = ?", (owner, now + self.lease_seconds, row[0], row[1]))
+        return {"repo": row[0], "unit": row[1], "first_page": row[2], "last_page": row[3],
+                "head": row[4], "languages": set(json.loads(row[5]))}
+
+    def renew(self, owner, unit):
+        """Extend the lease on unit; returns False if it was lost to another worker."""
+        with self._transaction():
+            cursor = self.db.execute("UPDATE units SET lease_until = ? "
+                                     "WHERE repo = ? AND unit = ? AND owner = ? AND state = 'leased'",
+                                     (self.clock() + self.lease_seconds, unit["repo"], unit["unit"], owner))
+            return cursor.rowcount == 1
+
+    def complete(self, owner, unit, commits):
+        """Store the (position, sha, files) of a unit and mark it done, if owner still holds it."""
+        with self._transaction():
+            cursor = self.db.execute("UPDATE units SET state = 'done', lease_until = NULL "
+                                     "WHERE repo = ? AND unit = ? AND owner = ? AND state = 'leased'",
+                                     (unit["repo"], unit["unit"], owner))
+            if cursor.rowcount != 1:
+                return False
+            self.db.execute("DELETE FROM commits WHERE repo = ? AND unit = ?", (unit["repo"], unit["unit"]))
+            self.db.executemany("INSERT INTO commits VALUES (?, ?, ?, ?, ?)",
+                                [(unit["repo"], unit["unit"], position, sha, json.dumps(files))
+                                 for position, sha, files in commits])
+            return True
+
+    def release(self, owner, unit, max_attempts=MAX_ATTEMPTS):
+        """
+        Give a unit back after a failure, so another worker can take it at once;
+        after max_attempts leases it is marked failed instead. Returns its new state.
+        """
+        with self._transaction():
+            self.db.execute("UPDATE units SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                            "owner = NULL, lease_until = NULL "
+                            "WHERE repo = ? AND unit = ? AND owner = ? AND state = 'leased'",
+                            (max_attempts, unit["repo"], unit["unit"], owner))
+            row = self.db.execute("SELECT state FROM units WHERE repo = ? AND unit = ?",
+                                  (unit["repo"], unit["unit"])).fetchone()
+            return row[0] if row else None
+
+    def retry_failed(self, repo):
+        """Queue the failed units of repo again, with a fresh attempt count; returns how many."""
+        with self._transaction():
+            cursor = self.db.execute("UPDATE units SET state = 'pending', attempts = 0 "
+                                     "WHERE repo = ? AND state = 'failed'", (repo,))
+            return cursor.rowcount
+
+    def status(self, repo):
+        """{state: number of units} for repo."""
+        rows = self.db.execute("SELECT state, COUNT(*) FROM units WHERE repo = ? GROUP BY state", (repo,))
+        return dict(rows.fetchall())
+
+    def head(self, repo):
+        """Watermark ({"sha", "date"}) of the commit whose history was queued, None if its date is unknown."""
+        row = self.db.execute("SELECT head, head_date FROM repos WHERE repo = ?", (repo,)).fetchone()
+        if row is None or row[1] is None:
+            return None
+        return {"sha": row[0], "date": row[1]}
+
+    def file_counts(self, repo):
+        """
+        Touch counts of a fully crawled repo, in the order the sequential crawl
+        would have found the files. A commit listed in two units (at a page
+        boundary) is only counted once.
+        """
+        status = self.status(repo)
+        if not status or set(status) != {"done"}:
+            raise RuntimeError(f"{repo} is not fully crawled yet: {status}")
+        dictfiles = {}
+        seen = set()
+        rows = self.db.execute("SELECT sha, files FROM commits WHERE repo = ? ORDER BY position", (repo,))
+        for sha, files in rows:
+            if sha in seen:
+                continue
+            seen.add(sha)
+            for filename in json.loads(files):
+                dictfiles[filename] = dictfiles.get(filename, 0) + 1
+        return dictfiles
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error; IMMEDIATE takes the write lock up front."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *exc):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+# Queue the crawl of repo: pins its current head and splits its listing pages into units
+def enqueue_repo(queue, repo, lsttokens, pages_per_unit=PAGES_PER_UNIT):
+    jsonCommits, headers = github_request(f"{API_URL}/repos/{repo}/commits?page=1&per_page={PER_PAGE}", lsttokens)
+    if not jsonCommits:
+        raise RuntimeError(f"no commits listed for {repo}")
+    pages = last_page(headers.get("Link")) or 1
+    languages = get_repo_languages(repo, lsttokens)
+    head = watermark_of(jsonCommits[0])
+    queue.enqueue(repo, head["sha"], pages, languages, pages_per_unit, head["date"])
+    return pages
+
+
+class Heartbeat(threading.Thread):
+    """
+    Renews the lease on a unit every interval seconds (a third of the lease by
+    default) while it is crawled. A crawl can sit in github_request far longer
+    than a lease, waiting up to an hour for a token's rate limit to reset, and
+    must not lose its unit meanwhile. Uses its own connection: an SQLite
+    connection stays in the thread that opened it.
+    """
+
+    def __init__(self, queue, owner, unit, interval=None):
+        super().__init__(daemon=True)
+        self.path = queue.path
+        self.lease_seconds = queue.lease_seconds
+        self.clock = queue.clock
+        self.owner = owner
+        self.unit = unit
+        self.interval = interval or queue.lease_seconds / 3
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        queue = WorkQueue(self.path, self.lease_seconds, self.clock)
+        try:
+            while not self.stopped.wait(self.interval):
+                if not queue.renew(self.owner, self.unit):
+                    self.lost = True
+                    return
+        finally:
+            queue.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# Crawl one leased unit; returns its (position, sha, files) rows
+# @heartbeat, the Heartbeat renewing the lease; without one it is renewed after every page
+def crawl_unit(queue, owner, unit, lsttokens, concurrency=DEFAULT_CONCURRENCY, heartbeat=None):
+    is_source = classifier_for(unit["languages"])
+    rows = []
+    page = []  # (sha, files) of the page being handed over
+
+    def count_commit(shaObject, shaDetails):
+        files = [f["filename"] for f in shaDetails["files"]
+                 if f["filename"] and is_source(f["filename"])]
+        page.append((shaObject["sha"], files))
+
+    def page_done(ipage):
+        # the page number gives the place of its commits in the whole history
+        for i, (sha, files) in enumerate(page):
+            rows.append(((ipage - 1) * PER_PAGE + i, sha, files))
+        page.clear()
+        lost = heartbeat.lost if heartbeat is not None else not queue.renew(owner, unit)
+        if lost:
+            raise LeaseLost(f"lease on {unit['repo']} unit {unit['unit']} expired")
+
+    crawl_commit_details(unit["repo"], lsttokens, github_auth, count_commit, concurrency=concurrency,
+                         start_page=unit["first_page"], end_page=unit["last_page"], ref=unit["head"],
+                         on_page_done=page_done)
+    return rows
+
+
+class LeaseLost(Exception):
+    pass
+
+
+# Lease and crawl units until the queue is empty; a unit that fails is given
+# back (see WorkQueue.release) and the worker goes on with the next one
+# Returns the number of units this worker completed
+def work(queue, lsttokens, repo=None, owner=None, concurrency=DEFAULT_CONCURRENCY):
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    while True:
+        unit = queue.lease(owner, repo)
+        if unit is None:
+            return done
+        print(f"{owner}: {unit['repo']} unit {unit['unit']} (pages {unit['first_page']}-{unit['last_page']})")
+        heartbeat = Heartbeat(queue, owner, unit)
+        heartbeat.start()
+        try:
+            rows = crawl_unit(queue, owner, unit, lsttokens, concurrency, heartbeat)
+        except LeaseLost as e:
+            print(f"{owner}: {e}, skipping it")
+            continue
+        except Exception as e:
+            state = queue.release(owner, unit)
+            print(f"{owner}: {unit['repo']} unit {unit['unit']} failed: {e!r} (now {state})")
+            continue
+        finally:
+            heartbeat.stop()
+        if queue.complete(owner, unit, rows):
+            done += 1
+
+
+# Write data/file_<repo>.csv from the units of a fully crawled repo; its watermark
+# becomes the queued head, so RichardSserunjogi_CollectFiles.py continues from there
+def merge(queue, repo, output_csv=None):
+    output_csv = output_csv or output_csv_for(repo)
+    dictfiles = queue.file_counts(repo)
+    write_file_counts_csv(output_csv, dictfiles, queue.head(repo))
+    return output_csv, len(dictfiles)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a countfiles crawl between several worker processes.")
+    parser.add_argument("--db", default=QUEUE_DB, help="queue database, shared by all the workers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enqueue = commands.add_parser("enqueue", help="queue the crawl of a repo")
+    enqueue.add_argument("repo")
+    enqueue.add_argument("--pages-per-unit", type=int, default=PAGES_PER_UNIT)
+    worker = commands.add_parser("work", help="crawl queued units until none is left")
+    worker.add_argument("--repo")
+    worker.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    status = commands.add_parser("status", help="show the state of the units of a repo")
+    status.add_argument("repo")
+    retry = commands.add_parser("retry", help="queue the failed units of a repo again")
+    retry.add_argument("repo")
+    merged = commands.add_parser("merge", help="write data/file_<repo>.csv once every unit is done")
+    merged.add_argument("repo")
+    merged.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    queue = WorkQueue(args.db)
+    try:
+        if args.command == "enqueue":
+            pages = enqueue_repo(queue, args.repo, lstTokens, args.pages_per_unit)
+            print(f"{args.repo}: {pages} pages queued ({queue.status(args.repo)})")
+        elif args.command == "work":
+            print(f"{work(queue, lstTokens, args.repo, concurrency=args.concurrency)} units done")
+        elif args.command == "status":
+            print(queue.status(args.repo))
+        elif args.command == "retry":
+            print(f"{queue.retry_failed(args.repo)} failed units queued again")
+        else:
+            output_csv, nfiles = merge(queue, args.repo, args.out)
+            print(f"{nfiles} files written to {output_csv}")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()